@@ -0,0 +1,124 @@
+import threading
+from collections import OrderedDict
+import pandas as pd
+from dataset_cache import frame_nbytes
+
+# Charts drawn from one aggregate per category (or pair of categories)
+CUBE_CHARTS = ('bar', 'pie', 'doughnut', 'stacked_bar', 'heatmap')
+CUBE_STATS = ['count', 'sum', 'mean', 'min', 'max']
+# Rows per group, including those whose values are missing
+ROWS = ('', 'rows')
+
+
+def cube_grouping(chart_type, x_column, y_column, stack_column, column_info, max_groups):
+    """Grouping columns a chart's aggregates come from, or None if the cube can't serve it
+
+    Groupings are one categorical column, or two for stacked bars and
+    categorical heatmaps, with at most max_groups combinations by the
+    profile's distinct counts.
+    """
+    def is_type(column, col_type):
+        return column in column_info and column_info[column]['type'] == col_type
+
+    if chart_type == 'heatmap':
+        keys = (x_column, y_column)
+    elif chart_type == 'stacked_bar' and stack_column:
+        keys = (x_column, stack_column)
+        if not is_type(y_column, 'numeric'):
+            return None
+    elif chart_type in CUBE_CHARTS:
+        keys = (x_column,)
+        if not is_type(y_column, 'numeric'):
+            return None
+    else:
+        return None
+    if len(set(keys)) != len(keys) or not all(is_type(key, 'categorical') for key in keys):
+        return None
+
+    n_groups = 1
+    for key in keys:
+        n_groups *= column_info[key].get('cardinality') or 0
+    return keys if 0 < n_groups <= max_groups else None
+
+
+def build_cell(df, keys, value_columns):
+    """Count, sum, mean, min, max and sum of squares of every value column per group of keys
+
+    Columns are (value column, stat) pairs, as in a multi-stat groupby, plus
+    ROWS; groups are ordered as groupby orders them, so charts come out the
+    same whichever way their aggregates were computed.
+    """
+    keys = list(keys)
+    grouped = df.groupby(keys, observed=True)
+    parts = []
+    if value_columns:
+        parts.append(grouped[value_columns].agg(CUBE_STATS))
+        # Kept so variances can be derived without another pass
+        squares = (df[value_columns].astype(float) ** 2).groupby([df[key] for key in keys], observed=True).sum()
+        squares.columns = pd.MultiIndex.from_product([value_columns, ['sumsq']])
+        parts.append(squares)
+    rows = grouped.size()
+    rows.name = ROWS
+    parts.append(rows.to_frame())
+    cell = pd.concat(parts, axis=1)
+    cell.columns = pd.MultiIndex.from_tuples(cell.columns)
+    return cell
+
+
+class AggregationCube:
+    """Per-dataset group aggregates, built one grouping at a time on first use
+
+    Each cell holds every numeric column's aggregates for one grouping, so
+    a bar, pie or stacked bar over any value column reads its data from an
+    already built cell. Cells are evicted least recently used first to keep
+    the cube within max_bytes.
+    """
+
+    def __init__(self, max_bytes=64 * 1024 * 1024, max_groups=10000):
+        self.max_bytes = max_bytes
+        self.max_groups = max_groups
+        self._cells = OrderedDict()  # (dataset, keys) -> (frame, nbytes)
+        self._lock = threading.Lock()
+        self.current_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key, build):
+        with self._lock:
+            entry = self._cells.get(key)
+            if entry is not None:
+                self._cells.move_to_end(key)
+                self.hits += 1
+                return entry[0]
+            self.misses += 1
+
+        cell = build()
+        nbytes = frame_nbytes(cell)
+        with self._lock:
+            if key in self._cells:
+                self.current_bytes -= self._cells.pop(key)[1]
+            if nbytes <= self.max_bytes:
+                self._cells[key] = (cell, nbytes)
+                self.current_bytes += nbytes
+                while self.current_bytes > self.max_bytes:
+                    _, (_, evicted) = self._cells.popitem(last=False)
+                    self.current_bytes -= evicted
+                    self.evictions += 1
+        return cell
+
+    def clear(self):
+        with self._lock:
+            self._cells.clear()
+            self.current_bytes = 0
+
+    def stats(self):
+        with self._lock:
+            return {
+                'entries': len(self._cells),
+                'current_bytes': self.current_bytes,
+                'max_bytes': self.max_bytes,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions
+            }
@@ -0,0 +1,233 @@
+import os
+import json
+import time
+import hashlib
+import logging
+import threading
+import urllib.request
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+
+logger = logging.getLogger(__name__)
+
+AI_MODEL = os.getenv('AI_MODEL', 'gpt-3.5-turbo')
+
+
+class OpenAIBackend:
+    def __init__(self, api_key=None, base_url=None, model=AI_MODEL, timeout=10):
+        import openai
+        self.openai = openai
+        self.api_key = api_key or os.getenv('OPENAI_API_KEY')
+        self.base_url = base_url
+        self.model = model
+        self.timeout = timeout
+
+    def complete(self, prompt, max_tokens=200, temperature=0.7):
+        messages = [{"role": "user", "content": prompt}]
+        if hasattr(self.openai, 'OpenAI'):
+            client = self.openai.OpenAI(api_key=self.api_key, base_url=self.base_url,
+                                        timeout=self.timeout, max_retries=0)
+            response = client.chat.completions.create(model=self.model, messages=messages,
+                                                      max_tokens=max_tokens, temperature=temperature)
+        else:
+            # Pre-1.0 openai package
+            self.openai.api_key = self.api_key
+            response = self.openai.ChatCompletion.create(model=self.model, messages=messages,
+                                                         max_tokens=max_tokens, temperature=temperature,
+                                                         request_timeout=self.timeout)
+        return response.choices[0].message.content.strip()
+
+
+class HTTPBackend:
+    """Any OpenAI-compatible /chat/completions endpoint, e.g. a local stub server"""
+
+    def __init__(self, base_url, api_key=None, model=AI_MODEL, timeout=10):
+        self.url = base_url.rstrip('/') + '/chat/completions'
+        self.api_key = api_key
+        self.model = model
+        self.timeout = timeout
+
+    def complete(self, prompt, max_tokens=200, temperature=0.7):
+        payload = json.dumps({
+            'model': self.model,
+            'messages': [{"role": "user", "content": prompt}],
+            'max_tokens': max_tokens,
+            'temperature': temperature
+        }).encode('utf-8')
+        headers = {'Content-Type': 'application/json'}
+        if self.api_key:
+            headers['Authorization'] = f'Bearer {self.api_key}'
+        request = urllib.request.Request(self.url, data=payload, headers=headers, method='POST')
+        with urllib.request.urlopen(request, timeout=self.timeout) as response:
+            body = json.loads(response.read().decode('utf-8'))
+        return body['choices'][0]['message']['content'].strip()
+
+
+def create_backend_from_env(timeout=10):
+    # AI_BACKEND: openai (default when a key is set), http (needs AI_BASE_URL) or none
+    backend = os.getenv('AI_BACKEND')
+    base_url = os.getenv('AI_BASE_URL')
+    if backend is None:
+        backend = 'openai' if os.getenv('OPENAI_API_KEY') else 'none'
+    if backend == 'http' and base_url:
+        return HTTPBackend(base_url, api_key=os.getenv('OPENAI_API_KEY'), timeout=timeout)
+    if backend == 'openai':
+        try:
+            return OpenAIBackend(base_url=base_url, timeout=timeout)
+        except ImportError:
+            logger.warning("openai package not installed; using heuristic recommendations")
+    return None
+
+
+def schema_fingerprint(profile):
+    schema = [[col['name'], col['type']] for col in profile['columns']]
+    payload = json.dumps([profile['shape'], schema], sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+def build_prompt(profile, chart_type, x_column, y_column, size_column=None, stack_column=None):
+    data_info = {
+        'shape': profile['shape'],
+        'numeric_columns': profile['numeric_columns'][:5],
+        'categorical_columns': profile['categorical_columns'][:5]
+    }
+
+    context = f"Chart: {chart_type}, X: {x_column}, Y: {y_column}"
+    if size_column:
+        context += f", Size: {size_column}"
+    if stack_column:
+        context += f", Stack: {stack_column}"
+
+    return f"""
+        Data context: {json.dumps(data_info, default=str)}
+        Selected: {context}
+
+        Provide 3-4 brief insights about this visualization choice.
+        Format as JSON array of strings. Each insight should be 1 sentence.
+        """
+
+
+def heuristic_recommendations(profile, chart_type, x_column, y_column=None):
+    """Insights computed locally from the dataset profile"""
+    chart_name = (chart_type or 'chart').replace('_', ' ').title()
+    columns = {col['name']: col for col in profile['columns']}
+    n_rows = profile['shape'][0] or 0
+    insights = [f"📊 {chart_name} visualization selected for {x_column}" + (f" and {y_column}" if y_column else "")]
+
+    x_info = columns.get(x_column)
+    if x_info and x_info['type'] == 'categorical' and x_info.get('cardinality'):
+        cardinality = x_info['cardinality']
+        if chart_type in ('pie', 'doughnut') and cardinality > 8:
+            insights.append(f"💡 {x_column} has {cardinality} categories; only the largest 8 are shown")
+        elif cardinality > 15:
+            insights.append(f"💡 {x_column} has {cardinality} categories; consider filtering to the most relevant ones")
+        else:
+            insights.append(f"✅ {x_column} has {cardinality} categories, a readable number to compare")
+
+    for column in (x_column, y_column):
+        info = columns.get(column)
+        if info and n_rows and info['null_count']:
+            share = info['null_count'] / n_rows * 100
+            insights.append(f"⚠️ {column} is missing in {share:.1f}% of rows; those rows are left out")
+
+    describe = profile.get('describe') or {}
+    if y_column in describe.get('columns', []) or x_column in describe.get('columns', []):
+        column = y_column if y_column in describe.get('columns', []) else x_column
+        values = dict(zip(describe['index'], [row[describe['columns'].index(column)] for row in describe['values']]))
+        mean, median, std = values.get('mean'), values.get('50%'), values.get('std')
+        if None not in (mean, median, std) and std:
+            skew = (mean - median) / std
+            if abs(skew) > 0.2:
+                direction = 'right' if skew > 0 else 'left'
+                insights.append(f"🎯 {column} is skewed to the {direction} (mean {mean:.2f} vs median {median:.2f}); "
+                                f"a box plot or histogram shows the spread well")
+            else:
+                insights.append(f"🎯 {column} is fairly symmetric around {median:.2f}")
+
+    insights.append("💡 Make sure your data is clean for best results")
+    return insights[:4]
+
+
+class RecommendationService:
+    """Cached, time-bounded and concurrency-limited chart recommendations"""
+
+    def __init__(self, backend=None, timeout=5, max_concurrency=4, cache_size=512, cache_ttl=3600):
+        self.backend = backend
+        self.timeout = timeout
+        self.cache_size = cache_size
+        self.cache_ttl = cache_ttl
+        self._cache = OrderedDict()  # key -> (expires_at, recommendations)
+        self._lock = threading.Lock()
+        self._slots = threading.BoundedSemaphore(max_concurrency)
+        self._executor = ThreadPoolExecutor(max_workers=max_concurrency, thread_name_prefix='ai')
+        self.hits = 0
+        self.misses = 0
+        self.timeouts = 0
+        self.fallbacks = 0
+
+    def recommend(self, profile, chart_type, x_column, y_column=None, size_column=None, stack_column=None):
+        key = json.dumps([schema_fingerprint(profile), chart_type, x_column, y_column, size_column, stack_column])
+        cached = self._get_cached(key)
+        if cached is not None:
+            return cached
+
+        fallback = heuristic_recommendations(profile, chart_type, x_column, y_column)
+        if self.backend is None:
+            return fallback
+
+        # Never queue behind slow calls: when every slot is busy answer locally
+        if not self._slots.acquire(blocking=False):
+            self.fallbacks += 1
+            return fallback
+
+        prompt = build_prompt(profile, chart_type, x_column, y_column, size_column, stack_column)
+        future = self._executor.submit(self._call_backend, key, prompt)
+        try:
+            return future.result(timeout=self.timeout)
+        except FutureTimeoutError:
+            # The call keeps running and fills the cache for the next request
+            self.timeouts += 1
+            return fallback
+        except Exception as e:
+            logger.warning(f"AI recommendations failed: {e}")
+            self.fallbacks += 1
+            return fallback
+
+    def stats(self):
+        with self._lock:
+            return {
+                'entries': len(self._cache),
+                'hits': self.hits,
+                'misses': self.misses,
+                'timeouts': self.timeouts,
+                'fallbacks': self.fallbacks
+            }
+
+    def _call_backend(self, key, prompt):
+        try:
+            text = self.backend.complete(prompt)
+        finally:
+            self._slots.release()
+        recommendations = json.loads(text)
+        if not isinstance(recommendations, list):
+            raise ValueError('expected a JSON array of insights')
+        recommendations = [str(item) for item in recommendations][:4]
+        self._put_cached(key, recommendations)
+        return recommendations
+
+    def _get_cached(self, key):
+        with self._lock:
+            entry = self._cache.get(key)
+            if entry is None or entry[0] < time.time():
+                self.misses += 1
+                return None
+            self._cache.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def _put_cached(self, key, recommendations):
+        with self._lock:
+            self._cache[key] = (time.time() + self.cache_ttl, recommendations)
+            self._cache.move_to_end(key)
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
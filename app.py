@@ -1,25 +1,517 @@
 import os
+import json
+import time
 import uuid
+import hashlib
+import numpy as np
 import pandas as pd
-from flask import Flask, render_template, request, session, jsonify
+from flask import Flask, render_template, request, session, jsonify, g
 from werkzeug.utils import secure_filename
 from dotenv import load_dotenv
-from eda_functions import get_data_preview, get_statistics, create_chart_with_api, get_ai_recommendations
-from chart_logic import get_compatible_columns, get_chart_requirements
+from eda_functions import (get_data_preview, get_preview_positions, get_statistics_from_profile, create_chart_with_api,
+                           get_correlation_method)
+from chart_logic import get_compatible_columns_from_types, get_chart_requirements, get_chart_columns
+from dataset_cache import DatasetCache, file_signature, file_content_hash
+from chart_cache import ChartResultCache, chart_cache_key
+from columnar_store import (read_dataset, read_dataset_rows, write_columnar, write_converted, resolve_dataset_path,
+                            COLUMNAR_SUFFIX)
+from dataset_profile import build_profile, save_profile, load_profile, get_profile_column_types
+from streaming_stats import ingest_csv_streaming
+from ingest_jobs import IngestJobManager
+from ai_service import RecommendationService, create_backend_from_env
+from batch_charts import get_batch_columns, plan_group_aggregates, compute_group_aggregates
+from dtype_optimizer import optimize_dtypes, memory_report, MemoryUsage
+from row_pages import SortIndexCache, page_positions, frame_to_columns
+from excel_ingest import is_excel, get_excel_engine, list_excel_sheets, read_excel_sheet
+from correlation import CorrelationCache, CORRELATION_METHODS, correlation_matrix, top_pairs
+from request_metrics import RequestMetrics, stage, server_timing_header
+from serialization import FastJSONProvider, dumps, compress_response
+from upload_storage import UploadStorage, stored_content_hash
+from shared_datasets import SharedDatasetRegistry
+from histogram_pyramid import HistogramPyramid, PyramidCache, build_pyramids, save_pyramids, load_pyramid
+from type_inference import convert_frame, apply_inferred_types, annotate_profile
+from aggregation_cube import AggregationCube, cube_grouping, build_cell
+from row_filters import (FilterCache, FilterError, ValueIndex, VALUE_INDEX_MAX_VALUES, parse_filter, filter_leaves,
+                         filter_columns, evaluate_filter, predicate_mask)
 import logging
 
 load_dotenv()
 
 app = Flask(__name__)
+app.json = FastJSONProvider(app)
 app.secret_key = os.getenv('FLASK_SECRET_KEY', os.urandom(24))
 UPLOAD_FOLDER = "uploads"
 app.config["UPLOAD_FOLDER"] = UPLOAD_FOLDER
-app.config['MAX_CONTENT_LENGTH'] = 50 * 1024 * 1024
+app.config['MAX_CONTENT_LENGTH'] = int(os.getenv('MAX_UPLOAD_MB', 50)) * 1024 * 1024
+app.config['STREAMING_INGEST_MB'] = int(os.getenv('STREAMING_INGEST_MB', 32))
+app.config['INGEST_CHUNK_ROWS'] = int(os.getenv('INGEST_CHUNK_ROWS', 100000))
+app.config['DATASET_CACHE_MB'] = int(os.getenv('DATASET_CACHE_MB', 512))
+app.config['CHART_CACHE_MB'] = int(os.getenv('CHART_CACHE_MB', 64))
+app.config['INGEST_WORKERS'] = int(os.getenv('INGEST_WORKERS', 2))
+app.config['INGEST_MAX_PENDING'] = int(os.getenv('INGEST_MAX_PENDING', 16))
+app.config['INGEST_WAIT_SECONDS'] = float(os.getenv('INGEST_WAIT_SECONDS', 10))
+app.config['AI_TIMEOUT_SECONDS'] = float(os.getenv('AI_TIMEOUT_SECONDS', 5))
+app.config['AI_MAX_CONCURRENCY'] = int(os.getenv('AI_MAX_CONCURRENCY', 4))
+app.config['MAX_BATCH_CHARTS'] = int(os.getenv('MAX_BATCH_CHARTS', 24))
+app.config['DTYPE_COMPACTION'] = os.getenv('DTYPE_COMPACTION', '1') == '1'
+app.config['TYPE_INFERENCE'] = os.getenv('TYPE_INFERENCE', '1') == '1'
+app.config['ARROW_STRINGS'] = os.getenv('ARROW_STRINGS', '0') == '1'
+app.config['CORRELATION_SAMPLE_ROWS'] = int(os.getenv('CORRELATION_SAMPLE_ROWS', 0))
+app.config['REQUEST_LOGGING'] = os.getenv('REQUEST_LOGGING', '1') == '1'
+app.config['COMPRESS_MIN_BYTES'] = int(os.getenv('COMPRESS_MIN_BYTES', 1024))
+app.config['UPLOAD_TTL_HOURS'] = float(os.getenv('UPLOAD_TTL_HOURS', 24))
+app.config['UPLOAD_QUOTA_MB'] = int(os.getenv('UPLOAD_QUOTA_MB', 2048))
+app.config['UPLOAD_SWEEP_SECONDS'] = int(os.getenv('UPLOAD_SWEEP_SECONDS', 300))
+app.config['SHARED_DATASET_DIR'] = os.getenv('SHARED_DATASET_DIR') or None
+app.config['FILTER_CACHE_MB'] = int(os.getenv('FILTER_CACHE_MB', 128))
+app.config['AGGREGATION_CUBE_MB'] = int(os.getenv('AGGREGATION_CUBE_MB', 64))
+app.config['CUBE_MAX_GROUPS'] = int(os.getenv('CUBE_MAX_GROUPS', 10000))
+app.config['SORT_INDEX_CACHE_MB'] = int(os.getenv('SORT_INDEX_CACHE_MB', 256))
 os.makedirs(UPLOAD_FOLDER, exist_ok=True)
 
+shared_datasets = SharedDatasetRegistry(os.path.join(UPLOAD_FOLDER, '.leases'), app.config['SHARED_DATASET_DIR'])
+# Cache keys are a dataset name or (name, columns); each cached frame holds one attachment
+dataset_cache = DatasetCache(max_bytes=app.config['DATASET_CACHE_MB'] * 1024 * 1024,
+                             on_remove=lambda key: shared_datasets.release(key[0] if isinstance(key, tuple) else key))
+chart_cache = ChartResultCache(max_bytes=app.config['CHART_CACHE_MB'] * 1024 * 1024)
+ingest_jobs = IngestJobManager(max_workers=app.config['INGEST_WORKERS'],
+                               max_pending=app.config['INGEST_MAX_PENDING'])
+sort_index_cache = SortIndexCache(max_bytes=app.config['SORT_INDEX_CACHE_MB'] * 1024 * 1024)
+correlation_cache = CorrelationCache()
+histogram_cache = PyramidCache()
+filter_cache = FilterCache(max_bytes=app.config['FILTER_CACHE_MB'] * 1024 * 1024)
+aggregation_cube = AggregationCube(max_bytes=app.config['AGGREGATION_CUBE_MB'] * 1024 * 1024,
+                                   max_groups=app.config['CUBE_MAX_GROUPS'])
+request_metrics = RequestMetrics()
+request_logger = logging.getLogger('datalens.requests')
+upload_storage = UploadStorage(UPLOAD_FOLDER,
+                               ttl_seconds=app.config['UPLOAD_TTL_HOURS'] * 3600,
+                               quota_bytes=app.config['UPLOAD_QUOTA_MB'] * 1024 * 1024,
+                               on_remove=lambda name: (dataset_cache.invalidate_dataset(name),
+                                                       shared_datasets.unpublish(name)))
+upload_storage.start(app.config['UPLOAD_SWEEP_SECONDS'])
+recommendation_service = RecommendationService(
+    backend=create_backend_from_env(timeout=app.config['AI_TIMEOUT_SECONDS']),
+    timeout=app.config['AI_TIMEOUT_SECONDS'],
+    max_concurrency=app.config['AI_MAX_CONCURRENCY'])
+
 def allowed_file(filename):
     return '.' in filename and filename.rsplit('.', 1)[1].lower() in {'csv', 'xlsx', 'xls'}
 
+def get_session_filepath():
+    return upload_storage.path(session['uploaded_file'])
+
+def get_session_dataset_path():
+    # The shared published copy when there is one, else the upload's own columnar copy
+    return shared_datasets.resolve(session['uploaded_file'], resolve_dataset_path(get_session_filepath()))
+
+def restore_inferred_types(df, path):
+    # Only the Arrow copy keeps inferred types; text copies are converted again with the recorded formats
+    if path.endswith(COLUMNAR_SUFFIX):
+        return df
+    profile = load_profile(get_session_filepath())
+    return apply_inferred_types(df, profile.get('inferred_types') if profile else None)
+
+def attach_dataset(dataset_id, path, columns=None):
+    return restore_inferred_types(shared_datasets.attach(dataset_id, path, columns), path)
+
+def load_session_dataframe(columns=None):
+    # Parsed frames are shared across routes until the upload changes or is evicted
+    # Keyed by stored file, so sessions that uploaded the same content share one frame
+    dataset_id = session['uploaded_file']
+    dataset_path = get_session_dataset_path()
+    with stage('load'):
+        if columns:
+            full_df = dataset_cache.peek(dataset_id, dataset_path)
+            if full_df is not None:
+                return full_df[columns]
+            return dataset_cache.get((dataset_id, tuple(columns)), dataset_path,
+                                     lambda path: attach_dataset(dataset_id, path, columns))
+        return dataset_cache.get(dataset_id, dataset_path, lambda path: attach_dataset(dataset_id, path))
+
+def load_session_rows(positions):
+    # Slice the cached frame when there is one, otherwise read just these rows from the mapped file
+    # Keyed by stored file, so sessions that uploaded the same content share one frame
+    dataset_id = session['uploaded_file']
+    dataset_path = get_session_dataset_path()
+    with stage('load'):
+        full_df = dataset_cache.peek(dataset_id, dataset_path)
+        if full_df is not None:
+            return full_df.iloc[positions]
+        return restore_inferred_types(read_dataset_rows(dataset_path, positions), dataset_path)
+
+def load_session_profile():
+    # Column types were inferred at ingest; reading them back is a request's type inference
+    filepath = get_session_filepath()
+    with stage('infer'):
+        profile = load_profile(filepath)
+    if profile is None:
+        # Uploads from before profiles existed get one built on first use
+        df = load_session_dataframe()
+        with stage('infer'):
+            profile = build_profile(df)
+            save_profile(profile, filepath)
+    if 'content_hash' not in profile:
+        profile['content_hash'] = file_content_hash(filepath)
+        save_profile(profile, filepath)
+    return profile
+
+def load_session_correlations(method, sample_rows=None):
+    # One matrix per dataset, method and sample size, shared by heatmaps and /correlations
+    profile = load_session_profile()
+    sample_rows = sample_rows or app.config['CORRELATION_SAMPLE_ROWS'] or None
+    columns = profile['numeric_columns']
+    
+    def compute():
+        df = load_session_dataframe(columns)
+        with stage('compute'):
+            return correlation_matrix(df, method, columns, sample_rows)
+    
+    return correlation_cache.get((profile['content_hash'], method, sample_rows), compute)
+
+def get_chart_correlations(spec):
+    # Numeric-by-numeric heatmaps draw on the dataset's cached correlation matrix
+    # It covers every row, so filtered charts compute their own
+    if spec['chart_type'] != 'heatmap' or spec['filters'] is not None:
+        return None
+    column_types = get_profile_column_types(load_session_profile())
+    if column_types.get(spec['x_column']) != 'numeric' or column_types.get(spec['y_column']) != 'numeric':
+        return None
+    return load_session_correlations(get_correlation_method(spec['options']))
+
+def get_chart_histograms(spec):
+    # Histograms and numeric-x bars re-aggregate a cached pyramid instead of rescanning the column
+    x_column, y_column = spec['x_column'], spec['y_column']
+    if spec['filters'] is not None:
+        return None
+    if spec['chart_type'] == 'histogram':
+        y_column = None
+    elif spec['chart_type'] != 'bar':
+        return None
+    profile = load_session_profile()
+    column_types = get_profile_column_types(profile)
+    if column_types.get(x_column) != 'numeric' or (y_column and column_types.get(y_column) != 'numeric'):
+        return None
+    
+    def compute():
+        # Column histograms were built at ingest; binned means are built on first use
+        pyramid = None if y_column else load_pyramid(get_session_filepath(), x_column)
+        if pyramid is None:
+            df = load_session_dataframe([x_column, y_column] if y_column else [x_column])
+            with stage('compute'):
+                pyramid = HistogramPyramid.from_series(df[x_column], df[y_column] if y_column else None)
+        return pyramid
+    
+    return histogram_cache.get((profile['content_hash'], x_column, y_column), compute)
+
+def get_chart_aggregates(spec):
+    # Categorical charts read their groups from the dataset's aggregation cube instead of grouping every row
+    # The cube covers every row, so filtered charts group their own
+    if spec['filters'] is not None:
+        return None
+    profile = load_session_profile()
+    keys = cube_grouping(spec['chart_type'], spec['x_column'], spec['y_column'], spec['stack_column'],
+                         {col['name']: col for col in profile['columns']}, aggregation_cube.max_groups)
+    if keys is None:
+        return None
+    
+    def build():
+        # One cell per grouping holds every numeric column, so later charts on it need no scan
+        value_columns = [col for col in profile['numeric_columns'] if col not in keys]
+        df = load_session_dataframe(list(keys) + value_columns)
+        with stage('compute'):
+            return build_cell(df, keys, value_columns)
+    
+    cell = aggregation_cube.get((profile['content_hash'], keys), build)
+    return {keys[0] if len(keys) == 1 else keys: cell}
+
+def load_filter_mask(expr, profile):
+    """Rows of the session's dataset matching a parsed filter
+
+    Each single-column predicate's mask is cached per dataset, so refining a
+    filter only computes the new condition and ANDs it with the cached ones.
+    """
+    columns = {col['name']: col for col in profile['columns']}
+    unknown = sorted(filter_columns(expr) - columns.keys())
+    if unknown:
+        raise FilterError(f"Unknown column: {', '.join(unknown)}")
+    leaves = filter_leaves(expr)
+    content_hash = profile['content_hash']
+    
+    def leaf_mask(leaf):
+        column = leaf[1]
+        
+        def compute():
+            series = load_session_dataframe([column])[column]
+            with stage('filter'):
+                index = None
+                if leaf[2] in ('in', 'not_in') and (columns[column].get('cardinality') or 0) <= VALUE_INDEX_MAX_VALUES:
+                    # Built once per column; membership tests then scatter row positions instead of scanning
+                    index = filter_cache.get(('index', content_hash, column), lambda: ValueIndex(series))
+                return predicate_mask(series, leaf, index)
+        
+        return filter_cache.get(('mask', content_hash, leaf), compute)
+    
+    masks = {leaf: leaf_mask(leaf) for leaf in leaves}
+    with stage('filter'):
+        return evaluate_filter(expr, masks.__getitem__)
+
+def filter_session_frame(df, expr, profile):
+    # Cached frames always hold every row; filtering is a mask over them
+    if expr is None:
+        return df
+    mask = load_filter_mask(expr, profile)
+    with stage('filter'):
+        return df[mask]
+
+def load_filtered_profile(expr, profile):
+    # Statistics of the matching rows, keeping the dataset's column types rather than re-deriving them from a subset
+    df = filter_session_frame(load_session_dataframe(), expr, profile)
+    with stage('compute'):
+        filtered = build_profile(df)
+    column_types = get_profile_column_types(profile)
+    for col in filtered['columns']:
+        col['type'] = column_types.get(col['name'], col['type'])
+    return filtered
+
+def get_upload_summary(profile, filename):
+    summary = {
+        'success': True,
+        'filename': filename,
+        'columns': [col['name'] for col in profile['columns']],
+        'data_types': {col['name']: col['dtype'] for col in profile['columns']},
+        'numeric_columns': profile['numeric_columns'],
+        'categorical_columns': profile['categorical_columns'],
+        'shape': profile['shape']
+    }
+    if 'sheets' in profile:
+        summary['sheets'] = profile['sheets']
+        summary['sheet'] = profile['sheet']
+    return summary
+
+def elapsed_since(started):
+    return round(time.perf_counter() - started, 3)
+
+def publish_dataset(dataset_id, filepath, df=None):
+    # Other workers map the published copy; this one swaps its parsed frame for the mapping too
+    store = shared_datasets.publish(dataset_id, resolve_dataset_path(filepath))
+    if df is None:
+        return
+    if store.endswith(COLUMNAR_SUFFIX):
+        df = shared_datasets.attach(dataset_id, store)
+    dataset_cache.put(dataset_id, file_signature(store), df)
+
+def ingest_upload(job, filepath, filename, dataset_id, sheet=None, content_hash=None):
+    # Runs on the ingest pool; progress and phase timings are reported through the job
+    total_bytes = os.path.getsize(filepath)
+    streaming_threshold = app.config['STREAMING_INGEST_MB'] * 1024 * 1024
+    sheets = None
+    started = time.perf_counter()
+    if filename.lower().endswith('.csv') and total_bytes > streaming_threshold:
+        # Large CSVs are profiled chunk by chunk so memory stays bounded by the chunk size
+        job.update(phase='parsing')
+        profile = ingest_csv_streaming(
+            filepath, app.config['INGEST_CHUNK_ROWS'],
+            on_chunk=lambda rows, bytes_parsed: job.update(rows=rows, bytes_parsed=bytes_parsed),
+            infer=app.config['TYPE_INFERENCE'])
+        publish_dataset(dataset_id, filepath)
+        job.metrics['parse_seconds'] = elapsed_since(started)
+        store = resolve_dataset_path(filepath)
+        if store.endswith(COLUMNAR_SUFFIX) and profile['numeric_columns']:
+            # Numeric columns are mapped, not loaded, so this stays within the streaming memory bound
+            started = time.perf_counter()
+            job.update(phase='profiling')
+            numeric_df = read_dataset(store, profile['numeric_columns'])
+            save_pyramids(build_pyramids(numeric_df, profile['numeric_columns']), filepath)
+            job.metrics['histogram_seconds'] = elapsed_since(started)
+    else:
+        job.update(phase='parsing')
+        if is_excel(filename):
+            # Workbooks are parsed exactly once; every later read uses the converted copy
+            sheets = list_excel_sheets(filepath)
+            if sheet is None:
+                sheet = sheets[0]['name']
+            elif sheet not in [s['name'] for s in sheets]:
+                raise ValueError(f"Unknown sheet: {sheet}")
+            job.metrics.update({'engine': get_excel_engine(filepath) or 'default', 'sheet': sheet})
+            df = read_excel_sheet(filepath, sheet)
+        else:
+            df = read_dataset(filepath)
+        job.metrics.update({'parse_seconds': elapsed_since(started), 'rows': len(df), 'columns': df.shape[1]})
+        
+        job.update(bytes_parsed=total_bytes, rows=len(df), phase='inferring')
+        started = time.perf_counter()
+        inferred = {}
+        if app.config['TYPE_INFERENCE']:
+            # Dates, numbers and flags stored as text are parsed once here; the columnar copy keeps their types
+            df, inferred = convert_frame(df)
+        job.metrics['infer_seconds'] = elapsed_since(started)
+        
+        job.update(phase='optimizing')
+        started = time.perf_counter()
+        if app.config['DTYPE_COMPACTION']:
+            df, report = optimize_dtypes(df, arrow_strings=app.config['ARROW_STRINGS'])
+        else:
+            report = memory_report(df)
+        job.metrics['optimize_seconds'] = elapsed_since(started)
+        
+        job.update(phase='converting')
+        started = time.perf_counter()
+        # Convert once at ingest so later requests can read just the columns they need
+        if sheets is not None:
+            write_converted(df, filepath)
+        else:
+            write_columnar(df, filepath)
+        publish_dataset(dataset_id, filepath, df)
+        job.metrics['convert_seconds'] = elapsed_since(started)
+        
+        job.update(phase='profiling')
+        started = time.perf_counter()
+        profile = annotate_profile(build_profile(df), inferred)
+        profile['memory_report'] = report
+        if sheets is not None:
+            profile['sheets'] = sheets
+            profile['sheet'] = sheet
+        job.metrics['profile_seconds'] = elapsed_since(started)
+        
+        started = time.perf_counter()
+        save_pyramids(build_pyramids(df, profile['numeric_columns']), filepath)
+        job.metrics['histogram_seconds'] = elapsed_since(started)
+    
+    job.update(phase='hashing', bytes_parsed=total_bytes, rows=profile['shape'][0])
+    started = time.perf_counter()
+    # Stored uploads were hashed as they were saved
+    content_hash = content_hash or file_content_hash(filepath)
+    if sheets is not None:
+        # Each sheet is its own dataset as far as cached results are concerned
+        content_hash = hashlib.sha256(f'{content_hash}:{sheet}'.encode('utf-8')).hexdigest()
+    profile['content_hash'] = content_hash
+    job.metrics['hash_seconds'] = elapsed_since(started)
+    profile['ingest_metrics'] = dict(job.metrics)
+    save_profile(profile, filepath)
+    return get_upload_summary(profile, filename)
+
+def start_ingest(stored_name, filename, sheet=None):
+    """Ingest a stored upload for this session, unless its results already exist
+
+    Identical content shares one stored copy, so a second upload of a file
+    reuses the first one's profile and columnar copy, or joins its ingest
+    if that is still running.
+    """
+    filepath = upload_storage.path(stored_name)
+    session['uploaded_file'] = stored_name
+    profile = load_profile(filepath)
+    if profile is not None:
+        session.pop('session_id', None)
+        return jsonify(get_upload_summary(profile, filename))
+    
+    content_hash = stored_content_hash(session.get('source_file', stored_name))
+    
+    def task(job):
+        with upload_storage.in_use(stored_name):
+            return ingest_upload(job, filepath, filename, stored_name, sheet, content_hash)
+    
+    job = ingest_jobs.submit(str(uuid.uuid4()), task, total_bytes=os.path.getsize(filepath), key=stored_name)
+    if job is None:
+        return jsonify({'error': 'Server is busy processing other uploads. Please try again shortly.'}), 503
+    session['session_id'] = job.job_id
+    
+    return jsonify({
+        'success': True,
+        'job_id': job.job_id,
+        'filename': filename,
+        'status': job.status
+    }), 202
+
+def parse_chart_spec(data):
+    return {
+        'chart_type': data.get('chartType'),
+        'x_column': data.get('xColumn'),
+        'y_column': data.get('yColumn'),
+        'size_column': data.get('sizeColumn'),
+        'stack_column': data.get('stackColumn'),
+        'filters': parse_filter(data.get('filters')),
+        'options': {
+            'target_points': data.get('targetPoints'),
+            'downsample': data.get('downsampleMode'),
+            'correlation_method': data.get('correlationMethod'),
+            'payload_format': data.get('payloadFormat'),
+            'bins': data.get('bins'),
+            'bin_range': data.get('binRange')
+        }
+    }
+
+def get_spec_cache_key(spec, content_hash):
+    # Identical data + request always yields the same chart, so the key doubles as a strong ETag
+    options = spec['options'] if spec['filters'] is None else {**spec['options'], 'filters': spec['filters']}
+    return chart_cache_key(content_hash, spec['chart_type'],
+                           [spec['x_column'], spec['y_column'], spec['size_column'], spec['stack_column']],
+                           options)
+
+def render_chart_body(spec, df, aggregates=None, correlations=None, histograms=None):
+    with stage('compute'):
+        chart_config = create_chart_with_api(df, spec['chart_type'], spec['x_column'], spec['y_column'],
+                                             spec['size_column'], spec['stack_column'], spec['options'], aggregates,
+                                             correlations, histograms)
+    with stage('serialize'):
+        return dumps({
+            'chart_config': chart_config,
+            'success': True
+        })
+
+def wait_for_ingest():
+    # Give a dataset that is still ingesting a moment to finish, then ask the client to retry
+    job = ingest_jobs.get(session.get('session_id'))
+    if job is None:
+        return None
+    if not job.wait(app.config['INGEST_WAIT_SECONDS']):
+        return jsonify({'error': 'Dataset is still being processed', 'job': job.to_dict()}), 409
+    if job.status == 'failed':
+        return jsonify({'error': f'Error processing file: {job.error}'}), 400
+    return None
+
+@app.before_request
+def start_request_timer():
+    g.request_started = time.perf_counter()
+
+@app.before_request
+def touch_session_upload():
+    # Keeps the session's dataset from expiring while it is in use
+    if 'uploaded_file' in session:
+        upload_storage.touch(session['uploaded_file'])
+
+@app.after_request
+def record_request_metrics(response):
+    # Stage timings go out as Server-Timing, into the /metrics histograms and into one log line
+    started = g.pop('request_started', None)
+    if started is None:
+        return response
+    total = time.perf_counter() - started
+    timings = g.get('stage_timings', {})
+    route = request.url_rule.rule if request.url_rule else 'unmatched'
+    chart_type = g.get('chart_type', '')
+    
+    response.headers['Server-Timing'] = server_timing_header(timings, total)
+    request_metrics.observe_request(request.method, route, chart_type, response.status_code, total, timings)
+    if app.config['REQUEST_LOGGING'] and request.endpoint != 'static':
+        request_logger.info(json.dumps({
+            'event': 'request',
+            'method': request.method,
+            'route': route,
+            'status': response.status_code,
+            'chart_type': chart_type or None,
+            'cache': g.get('cache_status'),
+            'duration_ms': round(total * 1000, 2),
+            'stages_ms': {name: round(seconds * 1000, 2) for name, seconds in timings.items()}
+        }))
+    return response
+
+@app.after_request
+def compress_large_response(response):
+    # Registered after the metrics hook so it runs first and its time shows up as a stage
+    with stage('compress'):
+        return compress_response(response, request.accept_encodings, app.config['COMPRESS_MIN_BYTES'])
+
 @app.route("/")
 def index():
     return render_template("index.html")
@@ -34,38 +526,70 @@ def upload_file():
         if file.filename == '' or not allowed_file(file.filename):
             return jsonify({'error': 'Invalid file format. Please upload CSV or Excel files only.'}), 400
 
-        session_id = str(uuid.uuid4())
         filename = secure_filename(file.filename)
-        unique_filename = f"{session_id}_{filename}"
-        filepath = os.path.join(app.config["UPLOAD_FOLDER"], unique_filename)
-        file.save(filepath)
-        
-        session['uploaded_file'] = unique_filename
+        stored_name, _, _ = upload_storage.store(file.stream, os.path.splitext(filename)[1])
+        session['source_file'] = stored_name
         session['original_filename'] = filename
-        session['session_id'] = session_id
         
-        if filename.lower().endswith('.csv'):
-            df = pd.read_csv(filepath)
-        else:
-            df = pd.read_excel(filepath)
+        sheet = request.form.get('sheet') or None
+        if sheet:
+            stored_name = upload_storage.derive(stored_name, sheet)
+        return start_ingest(stored_name, filename, sheet)
+    
+    except Exception as e:
+        return jsonify({'error': f'Error processing file: {str(e)}'}), 500
+
+@app.route("/upload-status/<job_id>", methods=["GET"])
+def get_upload_status(job_id):
+    job = ingest_jobs.get(job_id)
+    if job is not None and job.status == 'done' and session.get('session_id') == job_id:
+        # The job may have been started by another session uploading the same file
+        return jsonify({**job.to_dict(), 'result': {**job.result, 'filename': session['original_filename']}})
+    if job is None:
+        # Another worker may have run the ingest; a saved profile means it finished
+        if session.get('session_id') == job_id:
+            profile = load_profile(get_session_filepath())
+            if profile is not None:
+                return jsonify({'job_id': job_id, 'status': 'done', 'phase': 'done', 'progress': 1.0,
+                                'rows': profile['shape'][0],
+                                'result': get_upload_summary(profile, session['original_filename'])})
+            # Still running there; progress is only known to that worker
+            return jsonify({'job_id': job_id, 'status': 'running', 'phase': 'processing', 'progress': 0.0})
+        return jsonify({'error': 'Unknown upload job'}), 404
+    return jsonify(job.to_dict())
+
+@app.route("/select-sheet", methods=["POST"])
+def select_sheet():
+    try:
+        if 'uploaded_file' not in session:
+            return jsonify({'error': 'No file uploaded'}), 400
         
-        columns = df.columns.tolist()
-        data_types = {col: str(df[col].dtype) for col in columns}
-        numeric_columns = df.select_dtypes(include=['number']).columns.tolist()
-        categorical_columns = df.select_dtypes(include=['object', 'category']).columns.tolist()
+        pending = wait_for_ingest()
+        if pending:
+            return pending
         
-        return jsonify({
-            'success': True,
-            'filename': filename,
-            'columns': columns,
-            'data_types': data_types,
-            'numeric_columns': numeric_columns,
-            'categorical_columns': categorical_columns,
-            'shape': df.shape
-        })
+        filepath = get_session_filepath()
+        if not os.path.exists(filepath):
+            return jsonify({'error': 'File not found'}), 400
+        
+        profile = load_session_profile()
+        filename = session['original_filename']
+        data = request.get_json() or {}
+        sheet = data.get('sheet')
+        if sheet not in [s['name'] for s in profile.get('sheets') or []]:
+            return jsonify({'error': f'Unknown sheet: {sheet}'}), 400
+        if sheet == profile.get('sheet'):
+            return jsonify(get_upload_summary(profile, filename))
+        
+        # Another sheet means another dataset, stored alongside the workbook; the first
+        # sheet is what the workbook itself was ingested as
+        source_file = session.get('source_file', session['uploaded_file'])
+        if sheet == profile['sheets'][0]['name'] and os.path.exists(upload_storage.path(source_file)):
+            return start_ingest(source_file, filename)
+        return start_ingest(upload_storage.derive(source_file, sheet), filename, sheet)
     
     except Exception as e:
-        return jsonify({'error': f'Error processing file: {str(e)}'}), 500
+        return jsonify({'error': f'Error selecting sheet: {str(e)}'}), 500
 
 @app.route("/preview", methods=["POST"])
 def get_preview():
@@ -73,47 +597,128 @@ def get_preview():
         if 'uploaded_file' not in session:
             return jsonify({'error': 'No file uploaded'}), 400
         
-        filepath = os.path.join(app.config["UPLOAD_FOLDER"], session['uploaded_file'])
-        if not os.path.exists(filepath):
+        pending = wait_for_ingest()
+        if pending:
+            return pending
+        
+        if not os.path.exists(get_session_filepath()):
             return jsonify({'error': 'File not found'}), 400
         
-        filename = session['uploaded_file']
-        if filename.lower().endswith('.csv'):
-            df = pd.read_csv(filepath)
-        else:
-            df = pd.read_excel(filepath)
+        profile = load_session_profile()
         
         data = request.get_json()
         table_option = data.get('tableOption', 'head') if data else 'head'
+        include_preview = data.get('includePreview', True) if data else True
+        filters = parse_filter(data.get('filters')) if data else None
         
-        preview_html = get_data_preview(df, table_option)
-        stats_html = get_statistics(df)
+        # Clients that page rows through /rows only need the statistics
+        preview_df = None
+        stats_profile = profile
+        matching_rows = None
+        if filters is not None:
+            # Both the preview and the statistics cover just the matching rows
+            matching = np.flatnonzero(load_filter_mask(filters, profile))
+            matching_rows = len(matching)
+            if include_preview:
+                preview_df = load_session_rows(matching[get_preview_positions(matching_rows, table_option)])
+            stats_profile = load_filtered_profile(filters, profile)
+        elif include_preview and profile.get('ingest') == 'streaming':
+            preview_df = load_session_rows(get_preview_positions(profile['shape'][0], table_option))
+        elif include_preview:
+            preview_df = load_session_dataframe()
+        with stage('compute'):
+            preview_html = get_data_preview(preview_df, table_option) if preview_df is not None else None
+            stats_html = get_statistics_from_profile(stats_profile)
         
-        return jsonify({
-            'preview': preview_html,
-            'statistics': stats_html
-        })
+        with stage('serialize'):
+            return jsonify({
+                'preview': preview_html,
+                'statistics': stats_html,
+                'matching_rows': matching_rows
+            })
     
+    except FilterError as e:
+        return jsonify({'error': str(e)}), 400
     except Exception as e:
         return jsonify({'error': f'Error generating preview: {str(e)}'}), 500
 
+@app.route("/rows", methods=["POST"])
+def get_rows():
+    try:
+        if 'uploaded_file' not in session:
+            return jsonify({'error': 'No file uploaded'}), 400
+        
+        pending = wait_for_ingest()
+        if pending:
+            return pending
+        
+        if not os.path.exists(get_session_filepath()):
+            return jsonify({'error': 'File not found'}), 400
+        
+        data = request.get_json() or {}
+        try:
+            offset = int(data.get('offset', 0))
+            limit = int(data.get('limit', 100))
+        except (TypeError, ValueError):
+            return jsonify({'error': 'offset and limit must be integers'}), 400
+        sort_column = data.get('sortColumn')
+        ascending = data.get('sortAscending', True) is not False
+        filters = parse_filter(data.get('filters'))
+        
+        profile = load_session_profile()
+        total_rows = profile['shape'][0]
+        
+        sort_index = None
+        if sort_column:
+            if sort_column not in get_profile_column_types(profile):
+                return jsonify({'error': f'Unknown column: {sort_column}'}), 400
+            # Sorting happens once per column and direction; every later page is a lookup
+            sort_key = (profile['content_hash'], sort_column, ascending)
+            sort_values = load_session_dataframe([sort_column])[sort_column]
+            with stage('compute'):
+                sort_index = sort_index_cache.get(sort_key, sort_values, ascending)
+        
+        if filters is not None:
+            # Matching rows in display order; pages are then cut from them as from the whole dataset
+            mask = load_filter_mask(filters, profile)
+            sort_index = np.flatnonzero(mask) if sort_index is None else sort_index[mask[sort_index]]
+            total_rows = len(sort_index)
+        
+        page = load_session_rows(page_positions(total_rows, offset, limit, sort_index))
+        
+        with stage('serialize'):
+            return jsonify({
+                'total_rows': total_rows,
+                'offset': offset,
+                'sort_column': sort_column,
+                'sort_ascending': ascending,
+                **frame_to_columns(page)
+            })
+    
+    except FilterError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        return jsonify({'error': f'Error loading rows: {str(e)}'}), 500
+
 @app.route("/get-compatible-columns", methods=["POST"])
 def get_compatible_columns_route():
     try:
         if 'uploaded_file' not in session:
             return jsonify({'error': 'No file uploaded'}), 400
         
-        filepath = os.path.join(app.config["UPLOAD_FOLDER"], session['uploaded_file'])
-        filename = session['uploaded_file']
-        if filename.lower().endswith('.csv'):
-            df = pd.read_csv(filepath)
-        else:
-            df = pd.read_excel(filepath)
+        pending = wait_for_ingest()
+        if pending:
+            return pending
+        
+        if not os.path.exists(get_session_filepath()):
+            return jsonify({'error': 'File not found'}), 400
+        
+        profile = load_session_profile()
         
         data = request.get_json()
         chart_type = data.get('chartType')
         
-        compatible_columns = get_compatible_columns(df, chart_type)
+        compatible_columns = get_compatible_columns_from_types(get_profile_column_types(profile), chart_type)
         
         return jsonify({
             'compatible_columns': compatible_columns,
@@ -129,52 +734,224 @@ def create_visualization():
         if 'uploaded_file' not in session:
             return jsonify({'error': 'No file uploaded'}), 400
         
-        filepath = os.path.join(app.config["UPLOAD_FOLDER"], session['uploaded_file'])
-        filename = session['uploaded_file']
-        if filename.lower().endswith('.csv'):
-            df = pd.read_csv(filepath)
-        else:
-            df = pd.read_excel(filepath)
+        pending = wait_for_ingest()
+        if pending:
+            return pending
         
-        data = request.get_json()
-        chart_type = data.get('chartType')
-        x_column = data.get('xColumn')
-        y_column = data.get('yColumn')
+        if not os.path.exists(get_session_filepath()):
+            return jsonify({'error': 'File not found'}), 400
         
-        chart_config = create_chart_with_api(df, chart_type, x_column, y_column)
+        spec = parse_chart_spec(request.get_json())
+        g.chart_type = spec['chart_type']
         
-        return jsonify({
-            'chart_config': chart_config,
-            'success': True
-        })
+        profile = load_session_profile()
+        cache_key = get_spec_cache_key(spec, profile['content_hash'])
+        # Compressed responses carry the key as a weak ETag, so match weakly
+        if request.if_none_match.contains_weak(cache_key):
+            chart_cache.record_not_modified()
+            g.cache_status = 'not_modified'
+            response = app.response_class(status=304)
+            response.set_etag(cache_key)
+            return response
+        
+        with stage('cache'):
+            body = chart_cache.get(cache_key)
+        g.cache_status = 'hit' if body is not None else 'miss'
+        if body is None:
+            df = load_session_dataframe(get_chart_columns(spec['chart_type'], spec['x_column'], spec['y_column'],
+                                                          spec['size_column'], spec['stack_column']))
+            df = filter_session_frame(df, spec['filters'], profile)
+            body = render_chart_body(spec, df, get_chart_aggregates(spec), get_chart_correlations(spec),
+                                     get_chart_histograms(spec))
+            chart_cache.put(cache_key, body)
+        
+        response = app.response_class(body, mimetype='application/json')
+        response.set_etag(cache_key)
+        return response
     
+    except FilterError as e:
+        return jsonify({'error': str(e)}), 400
     except Exception as e:
         return jsonify({'error': f'Error creating visualization: {str(e)}'}), 500
 
+@app.route("/visualize-batch", methods=["POST"])
+def create_visualization_batch():
+    try:
+        if 'uploaded_file' not in session:
+            return jsonify({'error': 'No file uploaded'}), 400
+        
+        pending = wait_for_ingest()
+        if pending:
+            return pending
+        
+        if not os.path.exists(get_session_filepath()):
+            return jsonify({'error': 'File not found'}), 400
+        
+        data = request.get_json()
+        # A batch-wide filter applies to every chart that doesn't bring its own
+        specs = [parse_chart_spec({'filters': data.get('filters'), **chart}) for chart in (data.get('charts') or [])]
+        if not specs:
+            return jsonify({'error': 'No charts requested'}), 400
+        if len(specs) > app.config['MAX_BATCH_CHARTS']:
+            return jsonify({'error': f"At most {app.config['MAX_BATCH_CHARTS']} charts per batch"}), 400
+        
+        g.chart_type = 'batch'
+        profile = load_session_profile()
+        cache_keys = [get_spec_cache_key(spec, profile['content_hash']) for spec in specs]
+        with stage('cache'):
+            bodies = [chart_cache.get(key) for key in cache_keys]
+        missing = [i for i, body in enumerate(bodies) if body is None]
+        
+        groups = {}
+        for i in missing:
+            groups.setdefault(specs[i]['filters'], []).append(i)
+        for filters, indices in groups.items():
+            # One load and one groupby per key serve every chart over the same rows that still needs computing;
+            # charts the aggregation cube serves are left out of the groupbys
+            cube_aggregates = {i: get_chart_aggregates(specs[i]) for i in indices}
+            group_specs = [specs[i] for i in indices]
+            df = filter_session_frame(load_session_dataframe(get_batch_columns(group_specs)), filters, profile)
+            with stage('compute'):
+                aggregates = compute_group_aggregates(df, plan_group_aggregates(
+                    df, [specs[i] for i in indices if cube_aggregates[i] is None]))
+            for i in indices:
+                try:
+                    bodies[i] = render_chart_body(specs[i], df, cube_aggregates[i] or aggregates,
+                                                  get_chart_correlations(specs[i]), get_chart_histograms(specs[i]))
+                    chart_cache.put(cache_keys[i], bodies[i])
+                except Exception as e:
+                    bodies[i] = jsonify({'error': f'Error creating visualization: {str(e)}'}).get_data()
+        
+        # Each entry is exactly what /visualize would have returned for that chart
+        body = b'{"charts":[' + b','.join(body.strip() for body in bodies) + b'],"success":true}'
+        return app.response_class(body, mimetype='application/json')
+    
+    except FilterError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        return jsonify({'error': f'Error creating visualizations: {str(e)}'}), 500
+
 @app.route("/ai-recommendations", methods=["POST"])
 def get_ai_recommendations_route():
     try:
         if 'uploaded_file' not in session:
             return jsonify({'error': 'No file uploaded'}), 400
         
-        filepath = os.path.join(app.config["UPLOAD_FOLDER"], session['uploaded_file'])
-        filename = session['uploaded_file']
-        if filename.lower().endswith('.csv'):
-            df = pd.read_csv(filepath)
-        else:
-            df = pd.read_excel(filepath)
+        pending = wait_for_ingest()
+        if pending:
+            return pending
+        
+        if not os.path.exists(get_session_filepath()):
+            return jsonify({'error': 'File not found'}), 400
+        
+        profile = load_session_profile()
         
         data = request.get_json()
+        chart_type = data.get('chartType')
         x_column = data.get('xColumn')
         y_column = data.get('yColumn')
+        size_column = data.get('sizeColumn')
+        stack_column = data.get('stackColumn')
         
-        recommendations = get_ai_recommendations(df, x_column, y_column)
+        recommendations = recommendation_service.recommend(profile, chart_type, x_column, y_column,
+                                                           size_column, stack_column)
         
         return jsonify({'recommendations': recommendations})
     
     except Exception as e:
         return jsonify({'error': f'Error getting AI recommendations: {str(e)}'}), 500
 
+@app.route("/memory-report", methods=["GET"])
+def get_memory_report():
+    try:
+        if 'uploaded_file' not in session:
+            return jsonify({'error': 'No file uploaded'}), 400
+        
+        pending = wait_for_ingest()
+        if pending:
+            return pending
+        
+        if not os.path.exists(get_session_filepath()):
+            return jsonify({'error': 'File not found'}), 400
+        
+        profile = load_session_profile()
+        report = profile.get('memory_report')
+        if report is None:
+            # Ingested without a report (e.g. streamed without a columnar copy); measured a
+            # column at a time so a large dataset is never loaded whole
+            usage = MemoryUsage()
+            path = get_session_dataset_path()
+            for col in profile['columns']:
+                usage.update(restore_inferred_types(read_dataset(path, [col['name']]), path))
+            report = usage.report()
+        
+        return jsonify({'memory_report': report})
+    
+    except Exception as e:
+        return jsonify({'error': f'Error building memory report: {str(e)}'}), 500
+
+@app.route("/correlations", methods=["POST"])
+def get_correlations():
+    try:
+        if 'uploaded_file' not in session:
+            return jsonify({'error': 'No file uploaded'}), 400
+        
+        pending = wait_for_ingest()
+        if pending:
+            return pending
+        
+        if not os.path.exists(get_session_filepath()):
+            return jsonify({'error': 'File not found'}), 400
+        
+        data = request.get_json() or {}
+        method = data.get('method') or 'pearson'
+        if method not in CORRELATION_METHODS:
+            return jsonify({'error': f'Unknown correlation method: {method}'}), 400
+        top_n = int(data.get('topN') or 10)
+        sample_rows = int(data.get('sampleRows') or 0) or None
+        
+        matrix = load_session_correlations(method, sample_rows)
+        
+        with stage('serialize'):
+            return jsonify({
+                'method': method,
+                'columns': [str(col) for col in matrix.columns],
+                'matrix': [[None if pd.isna(value) else float(value) for value in row] for row in matrix.to_numpy()],
+                'top_pairs': top_pairs(matrix, top_n),
+                'rows_used': matrix.attrs.get('rows_used')
+            })
+    
+    except Exception as e:
+        return jsonify({'error': f'Error computing correlations: {str(e)}'}), 500
+
+@app.route("/metrics", methods=["GET"])
+def get_metrics():
+    body = request_metrics.render({
+        'dataset': dataset_cache.stats(),
+        'chart': chart_cache.stats(),
+        'correlation': correlation_cache.stats(),
+        'histogram': histogram_cache.stats(),
+        'filter': filter_cache.stats(),
+        'aggregation_cube': aggregation_cube.stats(),
+        'sort_index': sort_index_cache.stats(),
+        'ai_recommendations': recommendation_service.stats()
+    })
+    return app.response_class(body, mimetype='text/plain; version=0.0.4')
+
+@app.route("/cache-stats", methods=["GET"])
+def get_cache_stats():
+    return jsonify({
+        'dataset_cache': dataset_cache.stats(),
+        'chart_cache': chart_cache.stats(),
+        'upload_storage': upload_storage.stats(),
+        'shared_datasets': shared_datasets.stats(),
+        'correlations': correlation_cache.stats(),
+        'histograms': histogram_cache.stats(),
+        'filters': filter_cache.stats(),
+        'aggregation_cube': aggregation_cube.stats(),
+        'sort_indexes': sort_index_cache.stats(),
+        'ai_recommendations': recommendation_service.stats()
+    })
 
 
 logging.basicConfig(
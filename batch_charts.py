@@ -0,0 +1,53 @@
+import pandas as pd
+from chart_logic import get_chart_columns, is_numeric_column
+
+# Charts whose data is one aggregate of y per category of x
+SHARED_GROUP_CHARTS = ('bar', 'pie', 'doughnut', 'stacked_bar')
+GROUP_STATS = ['sum', 'mean', 'size']
+
+
+def get_batch_columns(specs):
+    # Union of every chart's columns, or None if any chart needs the whole frame
+    columns = []
+    for spec in specs:
+        chart_columns = get_chart_columns(spec['chart_type'], spec['x_column'], spec['y_column'],
+                                          spec['size_column'], spec['stack_column'])
+        if chart_columns is None:
+            return None
+        columns.extend(chart_columns)
+    return list(dict.fromkeys(columns))
+
+
+def plan_group_aggregates(df, specs):
+    """Map each grouping column to the value columns the batch aggregates by it"""
+    plan = {}
+    for spec in specs:
+        chart_type = spec['chart_type']
+        x_column, y_column = spec['x_column'], spec['y_column']
+        if chart_type not in SHARED_GROUP_CHARTS or not y_column:
+            continue
+        if x_column not in df.columns or y_column not in df.columns:
+            continue
+        if not pd.api.types.is_numeric_dtype(df[y_column]):
+            # Would fail to aggregate; leave it to compute (and report) on its own
+            continue
+        if chart_type == 'stacked_bar' and spec['stack_column']:
+            continue
+        if chart_type == 'bar' and is_numeric_column(df[x_column]):
+            # Numeric x is binned first, so it has its own grouping
+            continue
+        y_columns = plan.setdefault(x_column, [])
+        if y_column not in y_columns:
+            y_columns.append(y_column)
+    return plan
+
+
+def compute_group_aggregates(df, plan):
+    # One groupby per key computes sum, mean and size for every value column at once
+    aggregates = {}
+    for x_column, y_columns in plan.items():
+        try:
+            aggregates[x_column] = df.groupby(x_column, observed=True)[y_columns].agg(GROUP_STATS)
+        except (TypeError, ValueError):
+            continue
+    return aggregates
@@ -0,0 +1,71 @@
+import numpy as np
+import pandas as pd
+
+SIZES = {'10k': 10_000, '100k': 100_000, '1m': 1_000_000, '10m': 10_000_000}
+
+WIDE_NUMERIC_COLUMNS = 200
+WIDE_CATEGORICAL_COLUMNS = 20
+
+
+def parse_size(size):
+    size = str(size).lower()
+    if size in SIZES:
+        return SIZES[size]
+    return int(size)
+
+
+def _labels(prefix, n_unique, width):
+    return pd.Series([f'{prefix}{i:0{width}d}' for i in range(n_unique)], dtype='str')
+
+
+def _categorical(rng, prefix, n_unique, n_rows, skew=1.2):
+    # Zipf-like popularity so a few values dominate, as in real category columns
+    weights = 1 / np.arange(1, n_unique + 1) ** skew
+    codes = rng.choice(n_unique, size=n_rows, p=weights / weights.sum())
+    width = len(str(n_unique))
+    return _labels(prefix, n_unique, width).iloc[codes].reset_index(drop=True)
+
+
+def _with_missing(rng, values, share):
+    values = values.astype(np.float64)
+    values[rng.random(len(values)) < share] = np.nan
+    return values
+
+
+def make_dataset(n_rows, wide=False, seed=0):
+    """Seeded synthetic dataset with every column kind the app handles
+
+    Numeric (with missing values), low- and mid-cardinality categoricals, a
+    datetime, a boolean and a high-cardinality identifier. The wide variant
+    adds 200 correlated numeric and 20 categorical columns.
+    """
+    rng = np.random.default_rng(seed)
+    n_customers = max(1, n_rows // 5)
+    data = {
+        'date': pd.date_range('2020-01-01', periods=n_rows, freq='min'),
+        'region': _categorical(rng, 'region_', 6, n_rows, skew=0.5),
+        'product': _categorical(rng, 'product_', 200, n_rows),
+        'customer_id': _labels('C', n_customers, 8).iloc[rng.integers(0, n_customers, n_rows)].reset_index(drop=True),
+        'sales': _with_missing(rng, rng.lognormal(4, 1, n_rows), 0.03),
+        'qty': rng.integers(1, 50, n_rows),
+        'price': np.round(rng.uniform(1, 500, n_rows), 2),
+        'discount': _with_missing(rng, rng.beta(2, 8, n_rows), 0.10),
+        'returned': rng.random(n_rows) < 0.05
+    }
+
+    if wide:
+        # A handful of latent factors gives the numeric block real correlation structure
+        factors = rng.normal(size=(n_rows, 8))
+        loadings = rng.normal(size=(8, WIDE_NUMERIC_COLUMNS))
+        block = factors @ loadings + rng.normal(size=(n_rows, WIDE_NUMERIC_COLUMNS))
+        for i in range(WIDE_NUMERIC_COLUMNS):
+            data[f'metric_{i:03d}'] = block[:, i]
+        for i in range(WIDE_CATEGORICAL_COLUMNS):
+            data[f'segment_{i:02d}'] = _categorical(rng, f's{i}_', 10 * (i + 1), n_rows)
+
+    return pd.DataFrame(data)
+
+
+def write_csv(df, path):
+    df.to_csv(path, index=False)
+    return path
@@ -0,0 +1,290 @@
+"""Time (and measure peak memory of) the EDA functions and Flask routes
+
+    python benchmarks/run_benchmarks.py --sizes 10k,1m --wide --output results.json
+    python benchmarks/run_benchmarks.py --sizes 10k --baseline results.json
+
+Results are JSON, one record per benchmark and dataset. With --baseline the
+run is compared against an earlier results file, and the exit status is 1 when
+anything got slower than the threshold allows.
+"""
+import os
+import sys
+import gc
+import json
+import time
+import shutil
+import argparse
+import platform
+import tempfile
+import tracemalloc
+import statistics
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
+# Recommendations must come from the local heuristics, never the network
+os.environ.setdefault('AI_BACKEND', 'none')
+
+import numpy as np
+import pandas as pd
+from datasets import make_dataset, write_csv, parse_size
+from chart_logic import CHART_REQUIREMENTS, get_compatible_columns
+from dataset_profile import build_profile
+from eda_functions import get_data_preview, get_statistics, get_statistics_from_profile, create_chart_with_api
+
+# chart name -> (chart_type, x, y, size, stack)
+CHART_SPECS = {
+    'bar': ('bar', 'region', 'sales', None, None),
+    'bar_numeric_x': ('bar', 'price', 'sales', None, None),
+    'histogram': ('histogram', 'price', None, None, None),
+    'pie': ('pie', 'region', 'sales', None, None),
+    'doughnut': ('doughnut', 'product', 'sales', None, None),
+    'line': ('line', 'date', 'sales', None, None),
+    'scatter': ('scatter', 'price', 'sales', None, None),
+    'box': ('box', 'region', 'sales', None, None),
+    'stacked_bar': ('stacked_bar', 'region', 'sales', None, 'product'),
+    'heatmap': ('heatmap', 'price', 'sales', None, None),
+    'heatmap_categorical': ('heatmap', 'region', 'product', None, None),
+    'area': ('area', 'date', 'qty', None, None),
+    'bubble': ('bubble', 'price', 'sales', 'qty', None)
+}
+TABLE_OPTIONS = ['head', 'tail', 'sample', 'full']
+
+
+class BenchmarkRunner:
+    def __init__(self, repeats=5, measure_memory=True):
+        self.repeats = repeats
+        self.measure_memory = measure_memory
+        self.results = []
+
+    def run(self, name, dataset, fn, setup=None, repeats=None):
+        repeats = repeats or self.repeats
+        times = []
+        error = None
+        try:
+            for _ in range(repeats):
+                if setup:
+                    setup()
+                gc.collect()
+                started = time.perf_counter()
+                fn()
+                times.append(time.perf_counter() - started)
+            peak = self._peak_memory(fn, setup) if self.measure_memory else None
+        except Exception as e:
+            error = str(e)
+            peak = None
+
+        record = {
+            'name': name,
+            'dataset': dataset['name'],
+            'rows': dataset['rows'],
+            'columns': dataset['columns'],
+            'repeats': len(times),
+            'median_seconds': statistics.median(times) if times else None,
+            'min_seconds': min(times) if times else None,
+            'peak_memory_bytes': peak,
+            'error': error
+        }
+        self.results.append(record)
+        status = f"{record['median_seconds'] * 1000:10.2f} ms" if times and not error else f"FAILED: {error}"
+        memory = f"  peak {peak / 1024 / 1024:8.1f} MB" if peak is not None else ''
+        print(f"  {name:<45} {status}{memory}", flush=True)
+        return record
+
+    @staticmethod
+    def _peak_memory(fn, setup=None):
+        # A separate traced run, since tracing slows allocation-heavy code down
+        if setup:
+            setup()
+        gc.collect()
+        tracemalloc.start()
+        try:
+            fn()
+            return tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+
+
+def benchmark_functions(runner, df, dataset):
+    for option in TABLE_OPTIONS:
+        runner.run(f'get_data_preview:{option}', dataset, lambda: get_data_preview(df, option))
+    runner.run('get_statistics', dataset, lambda: get_statistics(df))
+    runner.run('build_profile', dataset, lambda: build_profile(df))
+    profile = build_profile(df)
+    runner.run('get_statistics_from_profile', dataset, lambda: get_statistics_from_profile(profile))
+
+    for chart_type in CHART_REQUIREMENTS:
+        runner.run(f'get_compatible_columns:{chart_type}', dataset, lambda: get_compatible_columns(df, chart_type))
+
+    for name, (chart_type, x, y, size, stack) in CHART_SPECS.items():
+        runner.run(f'create_chart_with_api:{name}', dataset,
+                   lambda: create_chart_with_api(df, chart_type, x, y, size, stack))
+
+
+def _json(response):
+    if response.status_code >= 400:
+        raise RuntimeError(f"HTTP {response.status_code}: {response.get_json()}")
+    return response.get_json()
+
+
+def benchmark_routes(runner, df, dataset, workdir):
+    import app as app_module
+    flask_app = app_module.app
+    flask_app.config['UPLOAD_FOLDER'] = os.path.join(workdir, 'uploads')
+    flask_app.config['MAX_CONTENT_LENGTH'] = None
+    os.makedirs(flask_app.config['UPLOAD_FOLDER'], exist_ok=True)
+    app_module.upload_storage.folder = flask_app.config['UPLOAD_FOLDER']
+    client = flask_app.test_client()
+
+    csv_path = write_csv(df, os.path.join(workdir, f"{dataset['name']}.csv"))
+
+    def upload():
+        with open(csv_path, 'rb') as f:
+            data = _json(client.post('/upload', data={'file': (f, 'benchmark.csv')},
+                                     content_type='multipart/form-data'))
+        if 'job_id' not in data:
+            # Content that is already stored comes back with its summary straight away
+            return data
+        while True:
+            status = _json(client.get(f"/upload-status/{data['job_id']}"))
+            if status['status'] == 'done':
+                return status['result']
+            if status['status'] == 'failed':
+                raise RuntimeError(status['error'])
+            time.sleep(0.01)
+
+    # Each timed upload starts from an empty store, so it measures ingest rather than a dedup hit
+    runner.run('route:upload', dataset, upload, setup=app_module.upload_storage.clear,
+               repeats=min(runner.repeats, 3))
+    # Later routes run against one dataset, as a user session would
+    summary = upload()
+
+    runner.run('route:preview', dataset, lambda: _json(client.post('/preview', json={'tableOption': 'head'})))
+    runner.run('route:preview:stats_only', dataset,
+               lambda: _json(client.post('/preview', json={'tableOption': 'full', 'includePreview': False})))
+    runner.run('route:rows', dataset, lambda: _json(client.post('/rows', json={'offset': 0, 'limit': 200})))
+    runner.run('route:rows:sorted', dataset,
+               lambda: _json(client.post('/rows', json={'offset': 0, 'limit': 200, 'sortColumn': 'sales'})),
+               setup=lambda: app_module.sort_index_cache.clear())
+    runner.run('route:memory-report', dataset, lambda: _json(client.get('/memory-report')))
+    runner.run('route:correlations', dataset, lambda: _json(client.post('/correlations', json={'topN': 10})),
+               setup=lambda: app_module.correlation_cache.clear())
+
+    compatible = {}
+    for chart_type in CHART_REQUIREMENTS:
+        runner.run(f'route:get-compatible-columns:{chart_type}', dataset,
+                   lambda: _json(client.post('/get-compatible-columns', json={'chartType': chart_type})))
+        compatible[chart_type] = _json(client.post('/get-compatible-columns',
+                                                   json={'chartType': chart_type}))['compatible_columns']
+
+    requests = {}
+    for name, (chart_type, x, y, size, stack) in CHART_SPECS.items():
+        # CSV ingest may type a column differently (e.g. dates stay text); fall back to what the route offers
+        options = compatible[chart_type]
+        if x not in options['x_columns'] and options['x_columns']:
+            x = options['x_columns'][0]
+        if y and y not in options['y_columns'] and options['y_columns']:
+            y = options['y_columns'][0]
+        requests[name] = {'chartType': chart_type, 'xColumn': x, 'yColumn': y, 'sizeColumn': size, 'stackColumn': stack}
+
+    def clear_chart_caches():
+        # Everything a chart can be served from, so the cold case really computes it
+        for cache in (app_module.chart_cache, app_module.correlation_cache, app_module.aggregation_cube,
+                      app_module.histogram_cache, app_module.filter_cache):
+            cache.clear()
+
+    for name, body in requests.items():
+        runner.run(f'route:visualize:{name}', dataset, lambda: _json(client.post('/visualize', json=body)),
+                   setup=clear_chart_caches)
+        # Chart result gone, but the aggregation cube, pyramids and correlations built for it kept
+        runner.run(f'route:visualize:{name}:warm', dataset, lambda: _json(client.post('/visualize', json=body)),
+                   setup=app_module.chart_cache.clear)
+        runner.run(f'route:visualize:{name}:cached', dataset, lambda: _json(client.post('/visualize', json=body)))
+
+    batch = {'charts': list(requests.values())}
+    runner.run('route:visualize-batch', dataset, lambda: _json(client.post('/visualize-batch', json=batch)),
+               setup=clear_chart_caches)
+    runner.run('route:ai-recommendations', dataset,
+               lambda: _json(client.post('/ai-recommendations', json=requests['bar'])))
+    return summary
+
+
+def compare_results(results, baseline, threshold):
+    """Print each benchmark's change against the baseline; return the regressions"""
+    previous = {(r['name'], r['dataset']): r for r in baseline['results'] if r.get('median_seconds')}
+    regressions = []
+    print(f"\n{'benchmark':<60} {'baseline':>11} {'current':>11} {'ratio':>7}")
+    for record in results:
+        before = previous.get((record['name'], record['dataset']))
+        if before is None or not record.get('median_seconds'):
+            continue
+        ratio = record['median_seconds'] / before['median_seconds']
+        flag = '  SLOWER' if ratio > threshold else ('  faster' if ratio < 1 / threshold else '')
+        print(f"{record['dataset'] + ' ' + record['name']:<60} {before['median_seconds'] * 1000:9.2f}ms "
+              f"{record['median_seconds'] * 1000:9.2f}ms {ratio:6.2f}x{flag}")
+        if ratio > threshold:
+            regressions.append({'name': record['name'], 'dataset': record['dataset'], 'ratio': ratio})
+    return regressions
+
+
+def get_metadata():
+    return {
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'processor': platform.processor(),
+        'cpu_count': os.cpu_count(),
+        'pandas': pd.__version__,
+        'numpy': np.__version__
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Benchmark EDA functions and Flask routes')
+    parser.add_argument('--sizes', default='10k', help='comma-separated row counts, e.g. 10k,1m,10m')
+    parser.add_argument('--wide', action='store_true', help='also run the wide (229-column) variant of each size')
+    parser.add_argument('--suites', default='functions,routes', help='functions, routes or both')
+    parser.add_argument('--repeats', type=int, default=5)
+    parser.add_argument('--no-memory', action='store_true', help='skip the traced peak-memory run')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', help='write results JSON here')
+    parser.add_argument('--baseline', help='results JSON to compare against')
+    parser.add_argument('--threshold', type=float, default=1.2, help='slowdown ratio counted as a regression')
+    args = parser.parse_args(argv)
+
+    suites = set(args.suites.split(','))
+    runner = BenchmarkRunner(repeats=args.repeats, measure_memory=not args.no_memory)
+    workdir = tempfile.mkdtemp(prefix='datalens-bench-')
+    try:
+        for size in args.sizes.split(','):
+            for wide in ([False, True] if args.wide else [False]):
+                n_rows = parse_size(size)
+                df = make_dataset(n_rows, wide=wide, seed=args.seed)
+                dataset = {'name': f"{size}{'-wide' if wide else ''}", 'rows': n_rows, 'columns': df.shape[1]}
+                print(f"\n{dataset['name']}: {n_rows:,} rows x {df.shape[1]} columns")
+                if 'functions' in suites:
+                    benchmark_functions(runner, df, dataset)
+                if 'routes' in suites:
+                    benchmark_routes(runner, df, dataset, workdir)
+                del df
+                gc.collect()
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    output = {'meta': get_metadata(), 'results': runner.results}
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(output, f, indent=2)
+        print(f"\nWrote {len(runner.results)} results to {args.output}")
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        regressions = compare_results(runner.results, baseline, args.threshold)
+        if regressions:
+            print(f"\n{len(regressions)} benchmark(s) slower than {args.threshold}x the baseline")
+            return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,5 +1,8 @@
 import pandas as pd
 
+# Dtypes listed as categorical columns, flags included
+CATEGORICAL_DTYPES = ['object', 'category', 'bool', 'boolean']
+
 CHART_REQUIREMENTS = {
     'bar': {
         'x_types': ['categorical'],
@@ -102,15 +105,23 @@ CHART_REQUIREMENTS = {
     }
 }
 
+def is_numeric_column(series):
+    # pandas counts flags as numbers, but charts treat them as two categories
+    return pd.api.types.is_numeric_dtype(series) and not pd.api.types.is_bool_dtype(series)
+
 def get_column_type(df, column):
     if pd.api.types.is_datetime64_any_dtype(df[column]):
         return 'datetime'
-    elif pd.api.types.is_numeric_dtype(df[column]):
+    elif is_numeric_column(df[column]):
         return 'numeric'
     else:
         return 'categorical'
 
 def get_compatible_columns(df, chart_type):
+    column_types = {column: get_column_type(df, column) for column in df.columns}
+    return get_compatible_columns_from_types(column_types, chart_type)
+
+def get_compatible_columns_from_types(column_types, chart_type):
     if chart_type not in CHART_REQUIREMENTS:
         return {'x_columns': [], 'y_columns': [], 'requires_y': False, 'show_x': True, 'show_y': True}
     
@@ -119,9 +130,7 @@ def get_compatible_columns(df, chart_type):
     x_compatible = []
     y_compatible = []
     
-    for column in df.columns:
-        col_type = get_column_type(df, column)
-        
+    for column, col_type in column_types.items():
         if col_type in requirements['x_types']:
             x_compatible.append(column)
         
@@ -138,6 +147,13 @@ def get_compatible_columns(df, chart_type):
         'example': requirements['example']
     }
 
+def get_chart_columns(chart_type, x_column, y_column=None, size_column=None, stack_column=None):
+    # Columns a chart reads, or None when it needs the whole frame
+    if chart_type == 'heatmap' or (chart_type == 'bubble' and not size_column):
+        return None
+    columns = [x_column, y_column, size_column, stack_column]
+    return list(dict.fromkeys(col for col in columns if col))
+
 def get_chart_requirements(chart_type):
     return CHART_REQUIREMENTS.get(chart_type, {})
 
@@ -0,0 +1,163 @@
+import os
+import logging
+import pandas as pd
+
+try:
+    import pyarrow as pa
+    import pyarrow.compute as pc
+    import pyarrow.feather as feather
+    HAS_PYARROW = True
+except ImportError:
+    HAS_PYARROW = False
+
+COLUMNAR_SUFFIX = '.arrow'
+CONVERTED_CSV_SUFFIX = '.converted.csv'
+
+logger = logging.getLogger(__name__)
+
+
+def columnar_path(filepath):
+    return filepath + COLUMNAR_SUFFIX
+
+
+def converted_csv_path(filepath):
+    return filepath + CONVERTED_CSV_SUFFIX
+
+
+def resolve_dataset_path(filepath):
+    """Prefer the columnar copy of an upload when one has been written"""
+    store = columnar_path(filepath)
+    if HAS_PYARROW and os.path.exists(store):
+        return store
+    converted = converted_csv_path(filepath)
+    if os.path.exists(converted):
+        return converted
+    return filepath
+
+
+def _missing_floats_as_nan(table):
+    # Arrow turns NaN into nulls, and a column with nulls has to be copied on the
+    # way back to pandas; stored as NaN values it can be mapped without copying
+    columns = [pc.fill_null(column, float('nan')) if pa.types.is_floating(column.type) and column.null_count
+               else column for column in table.columns]
+    return pa.Table.from_arrays(columns, schema=table.schema)
+
+
+def write_columnar(df, filepath):
+    # Uncompressed Arrow IPC (Feather v2) so later reads can memory-map it
+    if not HAS_PYARROW:
+        return None
+
+    store = columnar_path(filepath)
+    tmp_path = store + '.tmp'
+    try:
+        table = _missing_floats_as_nan(pa.Table.from_pandas(df, preserve_index=False))
+        feather.write_feather(table, tmp_path, compression='uncompressed')
+        os.replace(tmp_path, store)
+        return store
+    except (pa.ArrowException, ValueError, TypeError) as e:
+        # Mixed-type object columns can't always be represented in Arrow;
+        # keep serving the original file in that case
+        logger.warning(f"Could not write columnar copy of {filepath}: {e}")
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        return None
+
+
+def write_converted(df, filepath):
+    """Columnar copy when possible, otherwise a CSV copy
+
+    Used for sources that are slow to parse (workbooks), so whichever copy is
+    written, later reads never go back to the original file.
+    """
+    for stale in (columnar_path(filepath), converted_csv_path(filepath)):
+        if os.path.exists(stale):
+            os.remove(stale)
+
+    store = write_columnar(df, filepath)
+    if store is not None:
+        return store
+    converted = converted_csv_path(filepath)
+    tmp_path = converted + '.tmp'
+    df.to_csv(tmp_path, index=False)
+    os.replace(tmp_path, converted)
+    return converted
+
+
+def arrow_schema(dtypes):
+    """Arrow schema for columns with the given pandas dtypes; text and anything else become strings"""
+    fields = []
+    for name, dtype in dtypes.items():
+        dtype = pd.api.types.pandas_dtype(dtype)
+        if isinstance(dtype, pd.DatetimeTZDtype):
+            arrow_type = pa.timestamp(dtype.unit, tz=str(dtype.tz))
+        elif pd.api.types.is_bool_dtype(dtype):
+            arrow_type = pa.bool_()
+        elif dtype.kind in 'iufM':
+            arrow_type = pa.from_numpy_dtype(getattr(dtype, 'numpy_dtype', dtype))
+        else:
+            arrow_type = pa.string()
+        fields.append(pa.field(name, arrow_type))
+    return pa.schema(fields)
+
+
+def write_columnar_chunks(chunks, filepath, schema=None):
+    """Stream DataFrame chunks into one Arrow IPC file without holding them all
+
+    Pass the schema when it is known up front: without it the first chunk
+    decides every column's type, and a column that is empty there (Arrow
+    type null) can't take the values of later chunks.
+    """
+    if not HAS_PYARROW:
+        return None
+
+    store = columnar_path(filepath)
+    tmp_path = store + '.tmp'
+    writer = None
+    try:
+        for chunk in chunks:
+            table = pa.Table.from_pandas(chunk, schema=schema, preserve_index=False)
+            if writer is None:
+                schema = table.schema
+                writer = pa.ipc.new_file(tmp_path, schema)
+            elif table.schema != schema:
+                table = table.cast(schema)
+            writer.write_table(_missing_floats_as_nan(table))
+        if writer is None:
+            return None
+        writer.close()
+        writer = None
+        os.replace(tmp_path, store)
+        return store
+    except (pa.ArrowException, ValueError, TypeError) as e:
+        logger.warning(f"Could not write columnar copy of {filepath}: {e}")
+        return None
+    finally:
+        if writer is not None:
+            writer.close()
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+
+def read_dataset_rows(filepath, positions, columns=None):
+    # Only the requested rows are materialised; the rest of the file stays mapped
+    positions = list(positions)
+    if filepath.endswith(COLUMNAR_SUFFIX):
+        table = feather.read_table(filepath, columns=list(columns) if columns else None, memory_map=True)
+        df = table.take(pa.array(positions, type=pa.int64())).to_pandas()
+        df.index = positions
+        return df
+    return read_dataset(filepath, columns).iloc[positions]
+
+
+def read_dataset(filepath, columns=None):
+    columns = list(columns) if columns else None
+
+    if filepath.endswith(COLUMNAR_SUFFIX):
+        table = feather.read_table(filepath, columns=columns, memory_map=True)
+        # One block per column, so null-free numeric columns are read-only views of
+        # the mapped file rather than copies
+        return table.to_pandas(split_blocks=True)
+    if filepath.lower().endswith('.csv'):
+        return pd.read_csv(filepath, usecols=columns)
+    return pd.read_excel(filepath, usecols=columns)
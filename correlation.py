@@ -0,0 +1,202 @@
+import threading
+from collections import OrderedDict
+import numpy as np
+import pandas as pd
+
+CORRELATION_METHODS = ('pearson', 'spearman')
+# Working-set budget for one block of columns; tall frames get narrower blocks
+CORRELATION_BLOCK_BYTES = 64 * 1024 * 1024
+MAX_BLOCK_COLUMNS = 64
+
+
+class CorrelationCache:
+    """Keeps computed correlation matrices per dataset, method and sample size"""
+
+    def __init__(self, max_entries=16):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key, compute):
+        with self._lock:
+            matrix = self._entries.get(key)
+            if matrix is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return matrix
+            self.misses += 1
+
+        matrix = compute()
+        with self._lock:
+            self._entries[key] = matrix
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return matrix
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        with self._lock:
+            return {'entries': len(self._entries), 'hits': self.hits, 'misses': self.misses}
+
+
+def _block_size(n_rows):
+    return int(max(1, min(MAX_BLOCK_COLUMNS, CORRELATION_BLOCK_BYTES // max(1, n_rows * 8))))
+
+
+def _prepare_block(values):
+    # Centre on each column's own mean so the sums below don't cancel, and zero
+    # out missing entries so they drop out of every product
+    valid = ~np.isnan(values)
+    counts = valid.sum(axis=0)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        means = np.where(counts > 0, np.nansum(values, axis=0) / counts, 0.0)
+    centred = np.where(valid, values - means, 0.0)
+    return centred, valid.astype(np.float64), bool(valid.all())
+
+
+def pairwise_pearson(frame, min_periods=2):
+    """Pearson matrix over a numeric frame, each pair using the rows both columns have
+
+    Columns are processed in blocks sized to a fixed memory budget, and every
+    block pair costs a handful of matrix products instead of a Python loop per
+    column pair. Blocks without missing values take a single product.
+    """
+    n_rows, n_cols = frame.shape
+    result = np.full((n_cols, n_cols), np.nan)
+    block = _block_size(n_rows)
+    starts = list(range(0, n_cols, block))
+    prepared = {}
+
+    def get_block(start):
+        if start not in prepared:
+            values = frame.iloc[:, start:start + block].to_numpy(dtype=np.float64, na_value=np.nan)
+            prepared[start] = _prepare_block(values)
+        return prepared[start]
+
+    for i, start_a in enumerate(starts):
+        xa, ma, complete_a = get_block(start_a)
+        for start_b in starts[i:]:
+            xb, mb, complete_b = get_block(start_b)
+            with np.errstate(invalid='ignore', divide='ignore'):
+                if complete_a and complete_b:
+                    sum_xy = xa.T @ xb
+                    var_x = (xa * xa).sum(axis=0)[:, None]
+                    var_y = (xb * xb).sum(axis=0)[None, :]
+                    count = np.full(sum_xy.shape, float(n_rows))
+                    r = sum_xy / np.sqrt(var_x * var_y)
+                else:
+                    count = ma.T @ mb
+                    sum_x = xa.T @ mb
+                    sum_y = ma.T @ xb
+                    sum_xx = (xa * xa).T @ mb
+                    sum_yy = ma.T @ (xb * xb)
+                    sum_xy = xa.T @ xb
+                    cov = sum_xy - sum_x * sum_y / count
+                    var_x = sum_xx - sum_x ** 2 / count
+                    var_y = sum_yy - sum_y ** 2 / count
+                    r = cov / np.sqrt(var_x * var_y)
+            r = np.clip(r, -1.0, 1.0)
+            r[count < min_periods] = np.nan
+            rows = slice(start_a, start_a + xa.shape[1])
+            cols = slice(start_b, start_b + xb.shape[1])
+            result[rows, cols] = r
+            result[cols, rows] = r.T
+        # Blocks before this one are never needed again
+        prepared.pop(start_a, None)
+
+    diagonal = np.diagonal(result).copy()
+    np.fill_diagonal(result, np.where(np.isnan(diagonal), np.nan, 1.0))
+    return result
+
+
+def _ranks_within(values, order, rows):
+    # Average ranks of values[rows], ties sharing their mean rank as in rank(method='average');
+    # the column's full sort order restricted to rows is still sorted, so nothing is sorted again
+    kept = order[rows[order]]
+    ordered = values[kept]
+    starts = np.flatnonzero(np.concatenate([[True], ordered[1:] != ordered[:-1]]))
+    lengths = np.diff(np.append(starts, len(kept)))
+    ranks = np.empty(len(values))
+    ranks[kept] = np.repeat(starts + (lengths + 1) / 2, lengths)
+    return ranks[rows]
+
+
+def pairwise_spearman(frame, min_periods=2):
+    """Spearman matrix over a numeric frame, each pair ranked over the rows both columns have
+
+    Every column is sorted once; a pair's ranks come from filtering those
+    orders to its common rows, as pandas ranks each pair. Columns with the
+    same missing values are ranked and correlated together, so a frame
+    without gaps takes a single blocked Pearson pass over its ranks.
+    """
+    n_cols = frame.shape[1]
+    result = np.full((n_cols, n_cols), np.nan)
+    columns_values = [frame.iloc[:, position].to_numpy(dtype=np.float64, na_value=np.nan)
+                      for position in range(n_cols)]
+    orders = [np.argsort(values, kind='stable') for values in columns_values]
+    present = [~np.isnan(values) for values in columns_values]
+    groups = {}
+    for position in range(n_cols):
+        groups.setdefault(present[position].tobytes(), []).append(position)
+    groups = list(groups.values())
+
+    for i, columns_a in enumerate(groups):
+        for columns_b in groups[i:]:
+            same = columns_b is columns_a
+            columns = columns_a if same else columns_a + columns_b
+            rows = present[columns_a[0]] & present[columns_b[0]]
+            ranks = np.column_stack([_ranks_within(columns_values[c], orders[c], rows) for c in columns])
+            r = pairwise_pearson(pd.DataFrame(ranks), min_periods)
+            if same:
+                result[np.ix_(columns_a, columns_a)] = r
+            else:
+                cross = r[:len(columns_a), len(columns_a):]
+                result[np.ix_(columns_a, columns_b)] = cross
+                result[np.ix_(columns_b, columns_a)] = cross.T
+    return result
+
+
+def correlation_matrix(df, method='pearson', columns=None, sample_rows=None, random_state=42):
+    """Correlation between every pair of numeric columns, as a DataFrame
+
+    Missing values are handled pairwise for both methods, so the result
+    matches DataFrame.corr. sample_rows caps the rows used on very tall frames.
+    """
+    if method not in CORRELATION_METHODS:
+        raise ValueError(f"Unknown correlation method: {method}")
+    if columns is None:
+        columns = df.select_dtypes(include=[np.number]).columns.tolist()
+    frame = df[columns]
+    if sample_rows and len(frame) > sample_rows:
+        frame = frame.sample(n=sample_rows, random_state=random_state)
+    matrix = pairwise_spearman(frame) if method == 'spearman' else pairwise_pearson(frame)
+    result = pd.DataFrame(matrix, index=columns, columns=columns)
+    result.attrs['rows_used'] = len(frame)
+    return result
+
+
+def top_pairs(matrix, n=10):
+    """The n column pairs with the largest absolute correlation"""
+    values = matrix.to_numpy()
+    rows, cols = np.triu_indices(len(values), k=1)
+    pair_values = values[rows, cols]
+    keep = ~np.isnan(pair_values)
+    rows, cols, pair_values = rows[keep], cols[keep], pair_values[keep]
+    order = np.argsort(-np.abs(pair_values), kind='stable')[:n]
+    return [{'x': str(matrix.columns[rows[i]]), 'y': str(matrix.columns[cols[i]]), 'correlation': float(pair_values[i])}
+            for i in order]
+
+
+def heatmap_columns(matrix, x_column=None, y_column=None, max_columns=20):
+    # The selected columns first, then the ones most strongly tied to anything else
+    values = np.nan_to_num(np.abs(matrix.to_numpy()), nan=-1.0)
+    np.fill_diagonal(values, -1.0)
+    strength = values.max(axis=1) if len(values) else values
+    ranked = [matrix.columns[i] for i in np.argsort(-strength, kind='stable')]
+    chosen = [col for col in (x_column, y_column) if col in matrix.columns]
+    return list(dict.fromkeys(chosen + ranked))[:max_columns]
@@ -0,0 +1,124 @@
+import os
+import hashlib
+import threading
+from collections import OrderedDict
+
+
+def file_signature(filepath):
+    """Identify a file version by its size and modification time"""
+    stat = os.stat(filepath)
+    return (stat.st_size, stat.st_mtime_ns)
+
+
+def file_content_hash(filepath, block_size=1024 * 1024):
+    digest = hashlib.sha256()
+    with open(filepath, 'rb') as f:
+        for block in iter(lambda: f.read(block_size), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def frame_nbytes(df):
+    return int(df.memory_usage(deep=True, index=True).sum())
+
+
+class DatasetCache:
+    """LRU cache of parsed DataFrames keyed by upload ID, bounded by memory"""
+
+    def __init__(self, max_bytes=512 * 1024 * 1024, on_remove=None):
+        self.max_bytes = max_bytes
+        self.on_remove = on_remove  # called with the key of every frame that leaves the cache
+        self._entries = OrderedDict()  # key -> (signature, df, nbytes)
+        self._lock = threading.Lock()
+        self.current_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def get(self, key, filepath, loader):
+        signature = file_signature(filepath)
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                if entry[0] == signature:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return entry[1]
+                # File was replaced or modified since it was parsed
+                self._remove(key)
+                self.invalidations += 1
+            self.misses += 1
+
+        df = loader(filepath)
+        self.put(key, signature, df)
+        return df
+
+    def peek(self, key, filepath):
+        # Return a cached frame only if it is still current, without loading
+        signature = file_signature(filepath)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] != signature:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def put(self, key, signature, df):
+        nbytes = frame_nbytes(df)
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            if nbytes > self.max_bytes:
+                # Larger than the whole budget, serve it uncached
+                if self.on_remove:
+                    self.on_remove(key)
+                return
+            self._entries[key] = (signature, df, nbytes)
+            self.current_bytes += nbytes
+            while self.current_bytes > self.max_bytes:
+                oldest = next(iter(self._entries))
+                self._remove(oldest)
+                self.evictions += 1
+
+    def invalidate(self, key):
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+                self.invalidations += 1
+
+    def invalidate_dataset(self, dataset_id):
+        """Drop a dataset's frame and every column projection of it, keyed (dataset_id, columns)"""
+        with self._lock:
+            for key in [key for key in self._entries
+                        if key == dataset_id or (isinstance(key, tuple) and key[0] == dataset_id)]:
+                self._remove(key)
+                self.invalidations += 1
+
+    def clear(self):
+        with self._lock:
+            for key in list(self._entries):
+                self._remove(key)
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'entries': len(self._entries),
+                'current_bytes': self.current_bytes,
+                'max_bytes': self.max_bytes,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'invalidations': self.invalidations,
+                'hit_rate': self.hits / lookups if lookups else 0.0
+            }
+
+    def _remove(self, key):
+        _, _, nbytes = self._entries.pop(key)
+        self.current_bytes -= nbytes
+        if self.on_remove:
+            self.on_remove(key)
@@ -0,0 +1,94 @@
+import os
+import json
+import numpy as np
+import pandas as pd
+from chart_logic import get_column_type, CATEGORICAL_DTYPES
+from streaming_stats import ColumnAccumulator, DESCRIBE_INDEX
+
+PROFILE_SUFFIX = '.profile.json'
+# Columns are profiled in slices of this many rows, so the top-value sketch only
+# ever counts one slice's distinct values at a time
+PROFILE_SLICE_ROWS = 100_000
+
+
+def profile_path(filepath):
+    return filepath + PROFILE_SUFFIX
+
+
+def _to_json_value(value):
+    if value is None or (np.isscalar(value) and pd.isna(value)):
+        return None
+    if isinstance(value, (np.integer, int)):
+        return int(value)
+    if isinstance(value, (np.floating, float)):
+        return float(value)
+    return str(value)
+
+
+def build_profile(df):
+    """Summarise a dataset once so routes don't need to rescan it
+
+    Each column is read once, slice by slice, for its nulls, moments,
+    approximate distinct count and (for categoricals) most frequent values;
+    only the numeric quartiles need a second, exact pass.
+    """
+    numeric_df = df.select_dtypes(include=[np.number])
+
+    columns = []
+    accumulators = {}
+    for position, column in enumerate(df.columns):
+        series = df.iloc[:, position]
+        col_type = get_column_type(df, column)
+        accumulator = ColumnAccumulator(quantile_sketch=False)
+        for start in range(0, max(len(series), 1), PROFILE_SLICE_ROWS):
+            accumulator.update(series.iloc[start:start + PROFILE_SLICE_ROWS])
+        accumulators[column] = accumulator
+
+        info = accumulator.column_profile(column, str(series.dtype), col_type)
+        if col_type in ('numeric', 'datetime') and info['null_count'] < len(series):
+            # Keep the column's own type (ints stay ints, dates stay dates)
+            info['min'] = _to_json_value(series.min())
+            info['max'] = _to_json_value(series.max())
+        columns.append(info)
+
+    describe = {}
+    if not numeric_df.empty:
+        quartiles = numeric_df.quantile([0.25, 0.5, 0.75])
+        values = []
+        for column in numeric_df.columns:
+            stats = accumulators[column].stats
+            q1, median, q3 = quartiles[column].tolist()
+            values.append([stats.count, stats.mean, stats.std(), stats.min, q1, median, q3, stats.max])
+        describe = {
+            'index': DESCRIBE_INDEX,
+            'columns': numeric_df.columns.tolist(),
+            'values': [[_to_json_value(v) for v in row] for row in zip(*values)]
+        }
+
+    return {
+        'shape': list(df.shape),
+        'columns': columns,
+        'numeric_columns': numeric_df.columns.tolist(),
+        'categorical_columns': df.select_dtypes(include=CATEGORICAL_DTYPES).columns.tolist(),
+        'describe': describe
+    }
+
+
+def save_profile(profile, filepath):
+    path = profile_path(filepath)
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'w') as f:
+        json.dump(profile, f)
+    os.replace(tmp_path, path)
+
+
+def load_profile(filepath):
+    path = profile_path(filepath)
+    if not os.path.exists(path):
+        return None
+    with open(path) as f:
+        return json.load(f)
+
+
+def get_profile_column_types(profile):
+    return {col['name']: col['type'] for col in profile['columns']}
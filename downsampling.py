@@ -0,0 +1,95 @@
+import numpy as np
+
+DOWNSAMPLE_MODES = ('lttb', 'minmax')
+
+
+def _bucket_edges(n, n_buckets, start=0):
+    return np.linspace(start, n, n_buckets + 1).astype(int)
+
+
+def lttb_indices(x, y, n_out):
+    """Largest-Triangle-Three-Buckets: pick the points that keep the line's shape
+
+    x and y must be float arrays sorted by x. Returns positions into them.
+    """
+    n = len(x)
+    if n_out >= n or n_out < 3:
+        return np.arange(n)
+
+    # First and last points are always kept; the rest are split into buckets
+    edges = _bucket_edges(n - 1, n_out - 2, start=1)
+    selected = np.empty(n_out, dtype=np.int64)
+    selected[0] = 0
+    selected[-1] = n - 1
+
+    previous = 0
+    for i in range(n_out - 2):
+        start, end = edges[i], edges[i + 1]
+        if i + 2 < len(edges):
+            next_start, next_end = edges[i + 1], edges[i + 2]
+        else:
+            next_start, next_end = n - 1, n
+        avg_x = x[next_start:next_end].mean()
+        avg_y = y[next_start:next_end].mean()
+
+        bucket_x = x[start:end]
+        bucket_y = y[start:end]
+        areas = np.abs((x[previous] - avg_x) * (bucket_y - y[previous])
+                       - (x[previous] - bucket_x) * (avg_y - y[previous]))
+        previous = start + int(np.argmax(areas))
+        selected[i + 1] = previous
+
+    return selected
+
+
+def minmax_indices(x, y, n_out):
+    """Keep the lowest and highest point of each bucket, in x order"""
+    n = len(x)
+    if n_out >= n or n_out < 2:
+        return np.arange(n)
+
+    n_buckets = max(1, n_out // 2)
+    edges = _bucket_edges(n, n_buckets)
+    selected = []
+    for start, end in zip(edges[:-1], edges[1:]):
+        if end <= start:
+            continue
+        bucket = y[start:end]
+        low = start + int(np.argmin(bucket))
+        high = start + int(np.argmax(bucket))
+        selected.extend(sorted({low, high}))
+    return np.asarray(selected, dtype=np.int64)
+
+
+def downsample_series(x_series, y_series, n_out, mode='lttb'):
+    """Sort a series pair by x (when needed) and reduce it to about n_out points
+
+    Returns positions into the original series, in x order.
+    """
+    valid = (x_series.notna() & y_series.notna()).to_numpy()
+    positions = np.flatnonzero(valid)
+    x_valid = x_series.iloc[positions]
+
+    # Skip the sort entirely for the common case of already-ordered time series
+    if not x_valid.is_monotonic_increasing:
+        order = np.argsort(x_valid.to_numpy(), kind='stable')
+        positions = positions[order]
+        x_valid = x_series.iloc[positions]
+
+    if len(positions) <= n_out:
+        return positions
+
+    if x_valid.dtype.kind == 'M':
+        x_values = x_valid.astype('int64').to_numpy(dtype=np.float64)
+    elif x_valid.dtype.kind in 'iuf':
+        x_values = x_valid.to_numpy(dtype=np.float64)
+    else:
+        # Text or other ordinal labels are spaced evenly
+        x_values = np.arange(len(positions), dtype=np.float64)
+    y_values = y_series.iloc[positions].to_numpy(dtype=np.float64, na_value=np.nan)
+
+    if mode == 'minmax':
+        selected = minmax_indices(x_values, y_values, n_out)
+    else:
+        selected = lttb_indices(x_values, y_values, n_out)
+    return positions[selected]
@@ -0,0 +1,107 @@
+import pandas as pd
+
+try:
+    import pyarrow as pa
+    HAS_PYARROW = True
+except ImportError:
+    HAS_PYARROW = False
+
+
+def _downcast_integer(series):
+    if series.min() >= 0:
+        return pd.to_numeric(series, downcast='unsigned')
+    return pd.to_numeric(series, downcast='integer')
+
+
+def _is_text(series):
+    return series.dtype == object or pd.api.types.is_string_dtype(series.dtype)
+
+
+def optimize_dtypes(df, category_max_ratio=0.5, category_max_unique=10000, arrow_strings=False):
+    """Shrink a frame's dtypes without changing any value
+
+    Integers are downcast to the smallest type that holds their range, and text
+    columns with few distinct values become category. Remaining text can
+    optionally move to Arrow-backed strings. Floats stay float64: even values
+    float32 holds exactly would have their sums and means accumulated in
+    float32, so charts would differ from those of the uncompacted frame.
+    Returns the new frame and a per-column memory report.
+    """
+    if df.columns.has_duplicates:
+        return df, memory_report(df)
+
+    optimized = {}
+    for column in df.columns:
+        series = df[column]
+        if pd.api.types.is_bool_dtype(series) or isinstance(series.dtype, pd.CategoricalDtype):
+            optimized[column] = series
+        elif pd.api.types.is_integer_dtype(series) and series.dtype.kind in 'iu' and len(series):
+            optimized[column] = _downcast_integer(series)
+        elif _is_text(series):
+            n_unique = series.nunique(dropna=True)
+            if len(series) and n_unique <= category_max_unique and n_unique / len(series) <= category_max_ratio:
+                optimized[column] = series.astype('category')
+            elif arrow_strings and HAS_PYARROW and series.dtype == object:
+                try:
+                    optimized[column] = series.astype(pd.ArrowDtype(pa.string()))
+                except (TypeError, ValueError, pa.ArrowException):
+                    # Mixed-type object columns stay as they are
+                    optimized[column] = series
+            else:
+                optimized[column] = series
+        else:
+            optimized[column] = series
+
+    result = pd.DataFrame(optimized, index=df.index)
+    return result, memory_report(df, result)
+
+
+def memory_report(before, after=None):
+    after = before if after is None else after
+    before_bytes = before.memory_usage(deep=True, index=False)
+    after_bytes = after.memory_usage(deep=True, index=False)
+    return _build_report(before.columns,
+                         {column: str(before[column].dtype) for column in before.columns}, before_bytes,
+                         {column: str(after[column].dtype) for column in after.columns}, after_bytes)
+
+
+class MemoryUsage:
+    """Deep memory use per column summed over pieces of a frame, for frames never held whole
+
+    Pieces are row chunks (as streamed at ingest) or single columns; the
+    report has the same format as memory_report's, with nothing compacted.
+    """
+
+    def __init__(self):
+        self.dtypes = {}
+        self.bytes = {}
+
+    def update(self, df):
+        usage = df.memory_usage(deep=True, index=False)
+        for column in df.columns:
+            self.dtypes[column] = str(df[column].dtype)
+            self.bytes[column] = self.bytes.get(column, 0) + int(usage[column])
+
+    def report(self):
+        return _build_report(list(self.bytes), self.dtypes, self.bytes, self.dtypes, self.bytes)
+
+
+def _build_report(columns, before_dtypes, before_bytes, after_dtypes, after_bytes):
+    report_columns = []
+    for column in columns:
+        report_columns.append({
+            'column': column,
+            'before_dtype': before_dtypes[column],
+            'after_dtype': after_dtypes[column],
+            'before_bytes': int(before_bytes[column]),
+            'after_bytes': int(after_bytes[column])
+        })
+
+    total_before = sum(column['before_bytes'] for column in report_columns)
+    total_after = sum(column['after_bytes'] for column in report_columns)
+    return {
+        'columns': report_columns,
+        'total_before_bytes': total_before,
+        'total_after_bytes': total_after,
+        'reduction': 1 - total_after / total_before if total_before else 0.0
+    }
@@ -3,13 +3,24 @@ matplotlib.use("Agg")
 
 import pandas as pd
 import numpy as np
-import openai
 import os
 from dotenv import load_dotenv
-import json
+from downsampling import downsample_series, DOWNSAMPLE_MODES
+from grouped_quantiles import grouped_box_stats
+from correlation import correlation_matrix, heatmap_columns, CORRELATION_METHODS
+from histogram_pyramid import HistogramPyramid, MAX_BINS
+from aggregation_cube import ROWS
+from chart_logic import is_numeric_column
 
 load_dotenv()
-openai.api_key = os.getenv('OPENAI_API_KEY')
+
+# Maximum points sent for point-per-row charts
+SCATTER_POINT_BUDGET = int(os.getenv('SCATTER_POINT_BUDGET', 10000))
+BUBBLE_POINT_BUDGET = int(os.getenv('BUBBLE_POINT_BUDGET', 5000))
+MAX_TARGET_POINTS = int(os.getenv('MAX_TARGET_POINTS', 10000))
+MAX_BOX_GROUPS = int(os.getenv('MAX_BOX_GROUPS', 300))
+MAX_HEATMAP_COLUMNS = int(os.getenv('MAX_HEATMAP_COLUMNS', 20))
+PAYLOAD_FORMATS = ('records', 'columnar')
 
 def get_data_preview(df, table_option):
     if table_option == "full":
@@ -24,6 +35,17 @@ def get_data_preview(df, table_option):
     
     return data.to_html(classes="table table-striped table-hover", border=0, escape=False)
 
+def get_preview_positions(n_rows, table_option):
+    # Row positions get_data_preview would show, for datasets too large to load whole
+    if table_option == "full":
+        return list(range(min(100, n_rows)))
+    elif table_option == "tail":
+        return list(range(max(0, n_rows - 10), n_rows))
+    elif table_option == "sample":
+        rng = np.random.default_rng(42)
+        return sorted(rng.choice(n_rows, size=min(10, n_rows), replace=False).tolist())
+    return list(range(min(10, n_rows)))
+
 def get_statistics(df):
     numeric_df = df.select_dtypes(include=[np.number])
     if numeric_df.empty:
@@ -35,9 +57,138 @@ def get_statistics(df):
     
     return stats.to_html(classes="table table-striped table-hover", border=0)
 
-def create_chart_with_api(df, chart_type, x_column, y_column=None, size_column=None, stack_column=None):
+def get_statistics_from_profile(profile):
+    describe = profile['describe']
+    columns_info = {col['name']: col for col in profile['columns']}
+    categorical = [col for col in profile['columns'] if col['type'] == 'categorical']
+    if not describe and not categorical:
+        return "<p class='text-muted'>No numeric columns found for statistical analysis.</p>"
+    
+    tables = []
+    if describe:
+        # Rebuild the same table get_statistics renders, without touching the data
+        stats = pd.DataFrame(describe['values'], index=describe['index'], columns=describe['columns'])
+        stats.loc['missing'] = [columns_info[col]['null_count'] for col in stats.columns]
+        stats.loc['distinct (approx.)'] = [columns_info[col].get('cardinality') for col in stats.columns]
+        stats.loc['dtype'] = [columns_info[col]['dtype'] for col in stats.columns]
+        tables.append(stats.to_html(classes="table table-striped table-hover", border=0))
+    
+    if categorical:
+        # Counts come from bounded sketches, so they stay cheap on wide, high-cardinality data
+        rows = {}
+        for col in categorical:
+            top_values = col.get('top_values') or []
+            top = top_values[0] if top_values else None
+            rows[col['name']] = {
+                'count': profile['shape'][0] - col['null_count'],
+                'missing': col['null_count'],
+                'distinct (approx.)': col.get('cardinality'),
+                'top': top['value'] if top else None,
+                'freq': top['count'] if top else None,
+                'dtype': col['dtype']
+            }
+        stats = pd.DataFrame(rows)
+        tables.append(stats.to_html(classes="table table-striped table-hover", border=0))
+    
+    return ''.join(tables)
+
+def extract_points(df, columns, max_points, random_state=42):
+    # Pull columns as float arrays, drop rows with any NaN in bulk, then sample
+    arrays = [df[col].to_numpy(dtype=float, na_value=np.nan) for col in columns]
+    valid = np.ones(len(df), dtype=bool)
+    for values in arrays:
+        valid &= ~np.isnan(values)
+    
+    positions = np.flatnonzero(valid)
+    if len(positions) > max_points:
+        rng = np.random.default_rng(random_state)
+        positions = np.sort(rng.choice(positions, size=max_points, replace=False))
+    return [values[positions] for values in arrays]
+
+def points_to_records(**arrays):
+    keys = list(arrays)
+    return [dict(zip(keys, values)) for values in zip(*(arrays[key].tolist() for key in keys))]
+
+def get_payload_format(options):
+    payload_format = options.get('payload_format') or 'records'
+    return payload_format if payload_format in PAYLOAD_FORMATS else 'records'
+
+def point_data(options, **arrays):
+    # Columnar payloads ship parallel arrays that the client zips into {x, y, ...} points
+    if get_payload_format(options) == 'columnar':
+        return {'data': [], 'pointColumns': arrays}
+    return {'data': points_to_records(**arrays)}
+
+def get_target_points(options, default):
+    # Clients may ask for a point count (e.g. the canvas width); keep it within the budget
+    try:
+        target = int(options.get('target_points') or default)
+    except (TypeError, ValueError):
+        target = default
+    return max(3, min(target, MAX_TARGET_POINTS))
+
+def get_downsample_mode(options):
+    mode = options.get('downsample') or 'lttb'
+    return mode if mode in DOWNSAMPLE_MODES else 'lttb'
+
+def get_correlation_method(options):
+    method = options.get('correlation_method') or 'pearson'
+    return method if method in CORRELATION_METHODS else 'pearson'
+
+def get_bin_count(options, default):
+    try:
+        bins = int(options.get('bins') or default)
+    except (TypeError, ValueError):
+        bins = default
+    return max(1, min(bins, MAX_BINS))
+
+def get_bin_range(options):
+    # Zoomed histograms and binned bars ask for [low, high] of the x axis
+    try:
+        lo, hi = (float(value) for value in options.get('bin_range'))
+    except (TypeError, ValueError):
+        return None, None
+    if not (np.isfinite(lo) and np.isfinite(hi) and lo < hi):
+        return None, None
+    return lo, hi
+
+def get_binned_values(df, x_column, y_column, options, default_bins, pyramid=None, exact=False):
+    """Counts (and y sums) per x bin, plus the bin edges
+
+    Re-aggregates the dataset's precomputed pyramid; the column is only
+    scanned when there is none, the zoom is finer than it resolves, or
+    exact counts are wanted over a range the pyramid can only estimate.
+    """
+    bins = get_bin_count(options, default_bins)
+    lo, hi = get_bin_range(options)
+    if (pyramid is None or not pyramid.resolves(bins, lo, hi)
+            or (exact and not pyramid.is_exact(lo, hi))):
+        pyramid = HistogramPyramid.from_series(df[x_column], df[y_column] if y_column else None,
+                                               None if lo is None else (lo, hi))
+    return pyramid.aggregate(bins, lo, hi)
+
+def get_group_aggregate(df, x_column, y_column, stat, aggregates=None):
+    # Use aggregates shared across a batch of charts when they cover this grouping
+    if aggregates and x_column in aggregates and (y_column, stat) in aggregates[x_column].columns:
+        return aggregates[x_column][(y_column, stat)]
+    return df.groupby(x_column, observed=True)[y_column].agg(stat)
+
+def get_pair_aggregate(df, x_column, z_column, y_column, stat, aggregates=None):
+    # x by z table of a y aggregate (or of row counts when y_column is None), from shared aggregates when given
+    column = (y_column, stat) if y_column else ROWS
+    if aggregates and (x_column, z_column) in aggregates and column in aggregates[(x_column, z_column)].columns:
+        return aggregates[(x_column, z_column)][column].unstack(fill_value=0)
+    if y_column is None:
+        return df.groupby([x_column, z_column], observed=True).size().unstack(fill_value=0)
+    return df.pivot_table(values=y_column, index=x_column, columns=z_column, aggfunc=stat, fill_value=0,
+                          observed=True)
+
+def create_chart_with_api(df, chart_type, x_column, y_column=None, size_column=None, stack_column=None, options=None,
+                          aggregates=None, correlations=None, histograms=None):
+    options = options or {}
     try:
         chart_data = {'labels': [], 'datasets': []}
+        axis_labels = None
         
         # Professional color palette
         colors = [
@@ -49,15 +200,16 @@ def create_chart_with_api(df, chart_type, x_column, y_column=None, size_column=N
         
         if chart_type == 'bar':
             # 1 categorical + 1 numerical
-            if pd.api.types.is_numeric_dtype(df[x_column]):
-                # Convert numeric to categories using binning
-                df_copy = df.copy()
-                df_copy[f'{x_column}_binned'] = pd.cut(df_copy[x_column], bins=10, duplicates='drop')
-                grouped = df_copy.groupby(f'{x_column}_binned')[y_column].mean().dropna()
+            if is_numeric_column(df[x_column]):
+                # Mean of y per x bin, from per-bin counts and sums
+                counts, sums, edges = get_binned_values(df, x_column, y_column, options, 10, histograms)
+                filled = np.flatnonzero(counts > 0)
+                grouped = pd.Series(sums[filled] / counts[filled],
+                                    index=[f'({edges[i]:.3g}, {edges[i + 1]:.3g}]' for i in filled])
                 chart_data['labels'] = [str(label) for label in grouped.index]
             else:
                 # Categorical x-axis
-                grouped = df.groupby(x_column)[y_column].mean().sort_values(ascending=False).head(15)
+                grouped = get_group_aggregate(df, x_column, y_column, 'mean', aggregates).sort_values(ascending=False).head(15)
                 chart_data['labels'] = grouped.index.tolist()
             
             chart_data['datasets'] = [{
@@ -72,8 +224,7 @@ def create_chart_with_api(df, chart_type, x_column, y_column=None, size_column=N
             
         elif chart_type == 'histogram':
             # 1 numerical
-            data_values = df[x_column].dropna()
-            hist, bin_edges = np.histogram(data_values, bins=20)
+            hist, _, bin_edges = get_binned_values(df, x_column, None, options, 20, histograms, exact=True)
             chart_data['labels'] = [f'{bin_edges[i]:.2f}' for i in range(len(hist))]
             chart_data['datasets'] = [{
                 'label': f'Distribution of {x_column}',
@@ -86,7 +237,7 @@ def create_chart_with_api(df, chart_type, x_column, y_column=None, size_column=N
             
         elif chart_type in ['pie', 'doughnut']:
             # 1 categorical + 1 numerical
-            grouped = df.groupby(x_column)[y_column].sum().sort_values(ascending=False).head(8)
+            grouped = get_group_aggregate(df, x_column, y_column, 'sum', aggregates).sort_values(ascending=False).head(8)
             chart_data['labels'] = grouped.index.tolist()
             chart_data['datasets'] = [{
                 'label': f'{x_column}',
@@ -98,14 +249,13 @@ def create_chart_with_api(df, chart_type, x_column, y_column=None, size_column=N
             
         elif chart_type == 'line':
             # 1 time + 1 numerical (or more)
-            df_sorted = df.sort_values(x_column).dropna(subset=[x_column, y_column])
-            if len(df_sorted) > 500:
-                df_sorted = df_sorted.iloc[::len(df_sorted)//500]  # Sample evenly
+            positions = downsample_series(df[x_column], df[y_column], get_target_points(options, 500),
+                                          get_downsample_mode(options))
             
-            chart_data['labels'] = df_sorted[x_column].astype(str).tolist()
+            chart_data['labels'] = df[x_column].iloc[positions].astype(str).tolist()
             chart_data['datasets'] = [{
                 'label': y_column,
-                'data': df_sorted[y_column].tolist(),
+                'data': df[y_column].iloc[positions].tolist(),
                 'borderColor': colors[0].replace('0.8', '1'),
                 'backgroundColor': colors[0].replace('0.8', '0.1'),
                 'fill': False,
@@ -117,20 +267,11 @@ def create_chart_with_api(df, chart_type, x_column, y_column=None, size_column=N
             
         elif chart_type == 'scatter':
             # 2 numerical (+ optional categorical)
-            sample_size = min(1000, len(df))
-            df_sample = df.sample(n=sample_size, random_state=42) if len(df) > sample_size else df
-            
-            scatter_data = []
-            for _, row in df_sample.iterrows():
-                if pd.notna(row[x_column]) and pd.notna(row[y_column]):
-                    scatter_data.append({
-                        'x': float(row[x_column]),
-                        'y': float(row[y_column])
-                    })
+            x_values, y_values = extract_points(df, [x_column, y_column], SCATTER_POINT_BUDGET)
             
             chart_data['datasets'] = [{
                 'label': f'{x_column} vs {y_column}',
-                'data': scatter_data,
+                **point_data(options, x=x_values, y=y_values),
                 'backgroundColor': colors[0],
                 'borderColor': colors[0].replace('0.8', '1'),
                 'pointRadius': 4,
@@ -138,37 +279,55 @@ def create_chart_with_api(df, chart_type, x_column, y_column=None, size_column=N
             }]
             
         elif chart_type == 'box':
-            # 1 numerical (+ optional categorical) - Simplified as histogram
-            if pd.api.types.is_numeric_dtype(df[x_column]):
-                # Single box plot - show as histogram
-                data_values = df[x_column].dropna()
-                q1, median, q3 = np.percentile(data_values, [25, 50, 75])
-                
-                chart_data['labels'] = ['Q1', 'Median', 'Q3', 'Min', 'Max']
-                chart_data['datasets'] = [{
-                    'label': f'{x_column} Statistics',
-                    'data': [q1, median, q3, data_values.min(), data_values.max()],
-                    'backgroundColor': colors[:5],
-                    'borderWidth': 1
-                }]
-                chart_type = 'bar'
+            # 1 numerical (+ optional categorical)
+            if is_numeric_column(df[x_column]):
+                # Single box over the numeric column
+                box_stats = grouped_box_stats(df[x_column])
+                box_label = x_column
             else:
-                # Box plot by category - show means
-                grouped = df.groupby(x_column)[y_column].agg(['mean', 'std']).fillna(0)
-                chart_data['labels'] = grouped.index.tolist()
-                chart_data['datasets'] = [{
-                    'label': f'Average {y_column}',
-                    'data': grouped['mean'].tolist(),
-                    'backgroundColor': colors[0],
-                    'borderWidth': 1
-                }]
-                chart_type = 'bar'
+                # One box per category
+                box_stats = grouped_box_stats(df[y_column], df[x_column])
+                if len(box_stats) > MAX_BOX_GROUPS:
+                    box_stats = sorted(box_stats, key=lambda s: s['count'], reverse=True)[:MAX_BOX_GROUPS]
+                box_label = y_column
+            
+            # Chart.js has no box type: overlay floating bars for whiskers and IQR
+            # plus a dash at the median
+            chart_data['labels'] = [stats['group'] for stats in box_stats]
+            chart_data['datasets'] = [{
+                'label': f'{box_label} Whiskers',
+                'data': [[stats['whisker_low'], stats['whisker_high']] for stats in box_stats],
+                'backgroundColor': colors[7],
+                'barPercentage': 0.05,
+                'grouped': False,
+                'order': 3
+            }, {
+                'label': f'{box_label} IQR',
+                'data': [[stats['q1'], stats['q3']] for stats in box_stats],
+                'backgroundColor': colors[0],
+                'borderColor': colors[0].replace('0.8', '1'),
+                'borderWidth': 1,
+                'barPercentage': 0.5,
+                'grouped': False,
+                'order': 2
+            }, {
+                'type': 'line',
+                'label': f'{box_label} Median',
+                'data': [stats['median'] for stats in box_stats],
+                'showLine': False,
+                'pointStyle': 'line',
+                'pointRadius': 12,
+                'pointBorderWidth': 3,
+                'borderColor': colors[1].replace('0.8', '1'),
+                'order': 1
+            }]
+            chart_data['box_stats'] = box_stats
+            chart_type = 'bar'
                 
         elif chart_type == 'stacked_bar':
             # 2 categorical + 1 numerical
             if stack_column:
-                pivot_df = df.pivot_table(values=y_column, index=x_column, columns=stack_column, 
-                                        aggfunc='sum', fill_value=0)
+                pivot_df = get_pair_aggregate(df, x_column, stack_column, y_column, 'sum', aggregates)
                 chart_data['labels'] = pivot_df.index.tolist()
                 
                 datasets = []
@@ -182,7 +341,7 @@ def create_chart_with_api(df, chart_type, x_column, y_column=None, size_column=N
                 chart_data['datasets'] = datasets
             else:
                 # Fallback to regular bar
-                grouped = df.groupby(x_column)[y_column].sum().head(10)
+                grouped = get_group_aggregate(df, x_column, y_column, 'sum', aggregates).head(10)
                 chart_data['labels'] = grouped.index.tolist()
                 chart_data['datasets'] = [{
                     'label': y_column,
@@ -193,32 +352,38 @@ def create_chart_with_api(df, chart_type, x_column, y_column=None, size_column=N
             
         elif chart_type == 'heatmap':
             # 2 categorical + 1 numerical OR correlation matrix
-            if pd.api.types.is_numeric_dtype(df[x_column]) and pd.api.types.is_numeric_dtype(df[y_column]):
-                # Correlation matrix visualization
-                numeric_cols = df.select_dtypes(include=[np.number]).columns[:5]  # Limit to 5
-                corr_matrix = df[numeric_cols].corr()
+            if is_numeric_column(df[x_column]) and is_numeric_column(df[y_column]):
+                # Correlation matrix over the columns most related to anything else;
+                # a precomputed matrix for the whole dataset is used when given
+                if correlations is None:
+                    correlations = correlation_matrix(df, get_correlation_method(options))
+                axis_labels = [str(col) for col in heatmap_columns(correlations, x_column, y_column, MAX_HEATMAP_COLUMNS)]
+                corr_matrix = correlations.loc[axis_labels, axis_labels]
                 
                 # Convert to format suitable for Chart.js scatter plot
                 scatter_data = []
-                for i, col1 in enumerate(corr_matrix.columns):
-                    for j, col2 in enumerate(corr_matrix.index):
+                point_colors = []
+                for col1 in corr_matrix.columns:
+                    for col2 in corr_matrix.index:
+                        value = corr_matrix.loc[col2, col1]
+                        value = None if pd.isna(value) else float(value)
                         scatter_data.append({
-                            'x': i,
-                            'y': j,
-                            'v': corr_matrix.loc[col2, col1]  # correlation value
+                            'x': str(col1),
+                            'y': str(col2),
+                            'v': value  # correlation value
                         })
+                        point_colors.append(get_heatmap_color(value))
                 
                 chart_data['datasets'] = [{
                     'label': 'Correlation',
                     'data': scatter_data,
-                    'backgroundColor': lambda ctx: get_heatmap_color(ctx.parsed.v),
-                    'pointRadius': 15
+                    'backgroundColor': point_colors,
+                    'pointRadius': max(4, min(15, 300 // max(1, len(axis_labels))))
                 }]
                 chart_type = 'scatter'
             else:
                 # Categorical heatmap as grouped bar
-                grouped = df.groupby([x_column, y_column]).size().reset_index(name='count')
-                pivot_df = grouped.pivot(index=x_column, columns=y_column, values='count').fillna(0)
+                pivot_df = get_pair_aggregate(df, x_column, y_column, None, 'size', aggregates)
                 
                 chart_data['labels'] = pivot_df.index.tolist()
                 datasets = []
@@ -233,14 +398,13 @@ def create_chart_with_api(df, chart_type, x_column, y_column=None, size_column=N
                 
         elif chart_type == 'area':
             # 1 time + 1+ numerical
-            df_sorted = df.sort_values(x_column).dropna(subset=[x_column, y_column])
-            if len(df_sorted) > 300:
-                df_sorted = df_sorted.iloc[::len(df_sorted)//300]
+            positions = downsample_series(df[x_column], df[y_column], get_target_points(options, 300),
+                                          get_downsample_mode(options))
             
-            chart_data['labels'] = df_sorted[x_column].astype(str).tolist()
+            chart_data['labels'] = df[x_column].iloc[positions].astype(str).tolist()
             chart_data['datasets'] = [{
                 'label': y_column,
-                'data': df_sorted[y_column].tolist(),
+                'data': df[y_column].iloc[positions].tolist(),
                 'borderColor': colors[0].replace('0.8', '1'),
                 'backgroundColor': colors[0].replace('0.8', '0.3'),
                 'fill': True,
@@ -251,33 +415,34 @@ def create_chart_with_api(df, chart_type, x_column, y_column=None, size_column=N
             
         elif chart_type == 'bubble':
             # 3 numerical (+ optional categorical)
-            sample_size = min(500, len(df))
-            df_sample = df.sample(n=sample_size, random_state=42) if len(df) > sample_size else df
-            
             if not size_column:
                 size_column = df.select_dtypes(include=[np.number]).columns[0]
             
-            bubble_data = []
-            for _, row in df_sample.iterrows():
-                if pd.notna(row[x_column]) and pd.notna(row[y_column]) and pd.notna(row[size_column]):
-                    bubble_data.append({
-                        'x': float(row[x_column]),
-                        'y': float(row[y_column]),
-                        'r': max(3, min(20, abs(float(row[size_column])) / df[size_column].std() * 5))
-                    })
+            x_values, y_values, size_values = extract_points(df, [x_column, y_column, size_column], BUBBLE_POINT_BUDGET)
+            size_std = df[size_column].std()
+            with np.errstate(divide='ignore', invalid='ignore'):
+                radius = np.abs(size_values) / size_std * 5
+            # Zero or undefined spread maps every bubble to the largest radius
+            radius = np.clip(np.nan_to_num(radius, nan=20, posinf=20), 3, 20)
             
             chart_data['datasets'] = [{
                 'label': f'{x_column} vs {y_column} (Size: {size_column})',
-                'data': bubble_data,
+                **point_data(options, x=x_values, y=y_values, r=radius),
                 'backgroundColor': colors[0],
                 'borderColor': colors[0].replace('0.8', '1'),
                 'borderWidth': 1
             }]
         
+        chart_options = get_chart_options(chart_type, x_column, y_column, size_column)
+        if axis_labels:
+            # Correlation cells sit on a column-name grid rather than numeric axes
+            for axis in ('x', 'y'):
+                chart_options['scales'][axis].update({'type': 'category', 'labels': axis_labels, 'offset': True})
+        
         return {
             'type': chart_type,
             'data': chart_data,
-            'options': get_chart_options(chart_type, x_column, y_column, size_column)
+            'options': chart_options
         }
         
     except Exception as e:
@@ -285,7 +450,9 @@ def create_chart_with_api(df, chart_type, x_column, y_column=None, size_column=N
 
 def get_heatmap_color(value):
     """Generate color based on correlation value"""
-    if value > 0.7:
+    if value is None:
+        return 'rgba(200, 200, 200, 0.5)'  # Grey when undefined (constant or empty column)
+    elif value > 0.7:
         return 'rgba(255, 0, 0, 0.8)'    # Red for strong positive
     elif value > 0.3:
         return 'rgba(255, 165, 0, 0.8)'  # Orange for moderate positive
@@ -362,55 +529,3 @@ def get_chart_options(chart_type, x_column, y_column=None, size_column=None):
         base_options['scales']['y']['stacked'] = True
     
     return base_options
-
-def get_ai_recommendations(df, x_column=None, y_column=None, chart_type=None, size_column=None, stack_column=None):
-    try:
-        data_info = {
-            'shape': df.shape,
-            'numeric_columns': df.select_dtypes(include=[np.number]).columns.tolist()[:5],
-            'categorical_columns': df.select_dtypes(include=['object', 'category']).columns.tolist()[:5]
-        }
-        
-        context = f"Chart: {chart_type}, X: {x_column}, Y: {y_column}"
-        if size_column:
-            context += f", Size: {size_column}"
-        if stack_column:
-            context += f", Stack: {stack_column}"
-            
-        prompt = f"""
-        Data context: {json.dumps(data_info)}
-        Selected: {context}
-        
-        Provide 3-4 brief insights about this visualization choice.
-        Format as JSON array of strings. Each insight should be 1 sentence.
-        """
-        
-        response = openai.ChatCompletion.create(
-            model="gpt-3.5-turbo",
-            messages=[{"role": "user", "content": prompt}],
-            max_tokens=200,
-            temperature=0.7
-        )
-        
-        recommendations_text = response.choices[0].message.content.strip()
-        
-        try:
-            recommendations = json.loads(recommendations_text)
-        except:
-            recommendations = [
-                f"✅ {chart_type.title()} is perfect for your data combination",
-                f"📊 Shows clear relationship between {x_column} and {y_column or 'distribution'}",
-                f"🎯 Great choice for exploring patterns in your dataset",
-                f"💡 Consider filtering data if you have too many categories"
-            ]
-        
-        return recommendations[:4]
-        
-    except Exception as e:
-        return [
-            f"📊 {chart_type.title()} visualization selected",
-            f"✅ Good choice for {x_column}" + (f" and {y_column}" if y_column else ""),
-            f"🎯 This chart type effectively shows your data patterns",
-            f"💡 Make sure your data is clean for best results"
-        ]
-
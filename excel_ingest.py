@@ -0,0 +1,72 @@
+import pandas as pd
+
+try:
+    # Rust-based reader, several times faster than openpyxl on large sheets
+    import python_calamine
+    HAS_CALAMINE = True
+except ImportError:
+    HAS_CALAMINE = False
+
+EXCEL_EXTENSIONS = ('.xlsx', '.xls')
+
+
+def is_excel(filename):
+    return filename.lower().endswith(EXCEL_EXTENSIONS)
+
+
+def get_excel_engine(filepath):
+    if HAS_CALAMINE:
+        return 'calamine'
+    # pandas opens .xlsx with openpyxl in read-only, values-only mode
+    return 'openpyxl' if filepath.lower().endswith('.xlsx') else None
+
+
+def _openpyxl_sheets(filepath):
+    import openpyxl
+    workbook = openpyxl.load_workbook(filepath, read_only=True, data_only=True)
+    try:
+        sheets = []
+        for worksheet in workbook.worksheets:
+            rows, columns = worksheet.max_row, worksheet.max_column
+            if rows is None:
+                # No dimension record in the file; count by streaming the rows
+                worksheet.reset_dimensions()
+                rows, columns = 0, 0
+                for row in worksheet.iter_rows(values_only=True):
+                    rows += 1
+                    columns = max(columns, len(row))
+            sheets.append({'name': worksheet.title, 'rows': max(rows - 1, 0), 'columns': columns})
+        return sheets
+    finally:
+        workbook.close()
+
+
+def _calamine_sheets(filepath):
+    from python_calamine import CalamineWorkbook
+    workbook = CalamineWorkbook.from_path(filepath)
+    sheets = []
+    for name in workbook.sheet_names:
+        sheet = workbook.get_sheet_by_name(name)
+        sheets.append({'name': name, 'rows': max(sheet.height - 1, 0), 'columns': sheet.width})
+    return sheets
+
+
+def list_excel_sheets(filepath):
+    """Sheet names with their data row (excluding the header) and column counts
+
+    Counts come from sheet metadata where the workbook has it, so listing a
+    large workbook does not parse its cells.
+    """
+    engine = get_excel_engine(filepath)
+    if engine == 'calamine':
+        return _calamine_sheets(filepath)
+    if engine == 'openpyxl':
+        return _openpyxl_sheets(filepath)
+    with pd.ExcelFile(filepath) as workbook:
+        return [{'name': name, 'rows': None, 'columns': None} for name in workbook.sheet_names]
+
+
+def read_excel_sheet(filepath, sheet=None):
+    # Parse one sheet (the first by default) with the fastest engine available
+    engine = get_excel_engine(filepath)
+    return pd.read_excel(filepath, sheet_name=0 if sheet is None else sheet, engine=engine)
@@ -0,0 +1,116 @@
+import os
+import numpy as np
+import pandas as pd
+from sketches import KLLSketch
+
+# Above this many values, quartiles come from per-group sketches built chunk by chunk
+EXACT_QUANTILE_THRESHOLD = int(os.getenv('EXACT_QUANTILE_THRESHOLD', 2_000_000))
+SKETCH_CHUNK_SIZE = 1_000_000
+QUARTILES = (0.25, 0.5, 0.75)
+
+
+def _group_order(codes, n_groups):
+    # Stable sort on small unsigned codes uses numpy's radix sort
+    if n_groups < 2 ** 16:
+        codes = codes.astype(np.uint16)
+    elif n_groups < 2 ** 32:
+        codes = codes.astype(np.uint32)
+    return np.argsort(codes, kind='stable')
+
+
+def _exact_quartiles(values, codes, counts):
+    # Bucket values by group, then sort each group's contiguous run on its own
+    sorted_values = values[_group_order(codes, len(counts))]
+    starts = np.concatenate([[0], np.cumsum(counts)[:-1]])
+    for start, count in zip(starts, counts):
+        if count > 1:
+            sorted_values[start:start + count].sort()
+    last = max(len(sorted_values) - 1, 0)
+
+    results = []
+    for q in QUARTILES:
+        # Linear interpolation between closest ranks, as numpy/pandas do
+        position = q * np.maximum(counts - 1, 0)
+        low = np.floor(position).astype(np.int64)
+        fraction = position - low
+        high = np.minimum(low + 1, np.maximum(counts - 1, 0))
+        low_values = sorted_values[np.minimum(starts + low, last)] if len(sorted_values) else np.zeros(len(counts))
+        high_values = sorted_values[np.minimum(starts + high, last)] if len(sorted_values) else np.zeros(len(counts))
+        quartile = low_values + fraction * (high_values - low_values)
+        results.append(np.where(counts > 0, quartile, np.nan))
+    return results
+
+
+def _sketch_quartiles(values, codes, n_groups, chunk_size=SKETCH_CHUNK_SIZE):
+    sketches = [KLLSketch(seed=group) for group in range(n_groups)]
+    for start in range(0, len(values), chunk_size):
+        chunk_values = values[start:start + chunk_size]
+        chunk_codes = codes[start:start + chunk_size]
+        order = _group_order(chunk_codes, n_groups)
+        chunk_values = chunk_values[order]
+        chunk_codes = chunk_codes[order]
+        boundaries = np.flatnonzero(np.diff(chunk_codes)) + 1
+        for segment_start, segment_end in zip(np.concatenate([[0], boundaries]),
+                                              np.concatenate([boundaries, [len(chunk_codes)]])):
+            sketches[chunk_codes[segment_start]].update(chunk_values[segment_start:segment_end])
+
+    quartiles = np.array([sketch.quantiles(QUARTILES) for sketch in sketches]).reshape(n_groups, len(QUARTILES))
+    return [quartiles[:, i] for i in range(len(QUARTILES))]
+
+
+def grouped_box_stats(values, groups=None, exact_threshold=None):
+    """Box plot statistics (quartiles, Tukey whiskers, outlier counts) per group"""
+    if exact_threshold is None:
+        exact_threshold = EXACT_QUANTILE_THRESHOLD
+    values = pd.Series(values).to_numpy(dtype=float, na_value=np.nan)
+
+    if groups is None:
+        codes = np.zeros(len(values), dtype=np.int64)
+        labels = ['All']
+    else:
+        codes, labels = pd.factorize(pd.Series(groups), sort=True)
+        labels = labels.tolist()
+
+    valid = ~np.isnan(values) & (codes >= 0)
+    values = values[valid]
+    codes = codes[valid]
+    n_groups = len(labels)
+    counts = np.bincount(codes, minlength=n_groups)
+
+    if len(values) <= exact_threshold:
+        q1, median, q3 = _exact_quartiles(values, codes, counts)
+    else:
+        q1, median, q3 = _sketch_quartiles(values, codes, n_groups)
+
+    iqr = q3 - q1
+    lower_fence = q1 - 1.5 * iqr
+    upper_fence = q3 + 1.5 * iqr
+    within = (values >= lower_fence[codes]) & (values <= upper_fence[codes])
+
+    minimum = np.full(n_groups, np.inf)
+    maximum = np.full(n_groups, -np.inf)
+    np.minimum.at(minimum, codes, values)
+    np.maximum.at(maximum, codes, values)
+    whisker_low = np.full(n_groups, np.inf)
+    whisker_high = np.full(n_groups, -np.inf)
+    np.minimum.at(whisker_low, codes[within], values[within])
+    np.maximum.at(whisker_high, codes[within], values[within])
+    outliers = np.bincount(codes[~within], minlength=n_groups)
+
+    stats = []
+    for group in np.flatnonzero(counts):
+        stats.append({
+            'group': labels[group],
+            'count': int(counts[group]),
+            'min': float(minimum[group]),
+            'q1': float(q1[group]),
+            'median': float(median[group]),
+            'q3': float(q3[group]),
+            'max': float(maximum[group]),
+            'iqr': float(iqr[group]),
+            # An approximate fence can exclude every value; fall back to the extremes
+            'whisker_low': float(whisker_low[group]) if np.isfinite(whisker_low[group]) else float(minimum[group]),
+            'whisker_high': float(whisker_high[group]) if np.isfinite(whisker_high[group]) else float(maximum[group]),
+            'outliers': int(outliers[group])
+        })
+    return stats
@@ -0,0 +1,240 @@
+import os
+import threading
+from collections import OrderedDict
+import numpy as np
+
+HISTOGRAM_SUFFIX = '.histograms.npz'
+FINEST_BINS = 1024  # 2**10
+COARSEST_BINS = 8
+# Each requested bin should span at least this many pyramid bins, or edges get too coarse
+MIN_SUBBINS = 4
+MAX_BINS = 200
+
+
+def histogram_path(filepath):
+    return filepath + HISTOGRAM_SUFFIX
+
+
+def _finite(x, weights=None):
+    x = np.asarray(x, dtype=float)
+    valid = np.isfinite(x)
+    if weights is not None:
+        weights = np.asarray(weights, dtype=float)
+        valid &= np.isfinite(weights)
+        return x[valid], weights[valid]
+    return x[valid], None
+
+
+class HistogramPyramid:
+    """Equal-width bin counts of one column at every power-of-two resolution
+
+    The finest level is built in one pass; each coarser level sums adjacent
+    pairs of the one below. Optional per-bin sums of a second column make
+    binned means possible too. Any bin count over any range is answered by
+    re-aggregating the coarsest level that still resolves it.
+
+    Integer columns spanning fewer values than the finest level get one bin
+    per value instead, which makes their histograms exact. Other columns
+    are exact over ranges that start and end on finest-level bin edges,
+    such as the default full range.
+    """
+
+    def __init__(self, lo, hi, counts, sums=None, value_min=None, value_max=None, discrete=False):
+        self.lo = float(lo)
+        self.hi = float(hi)
+        # The data's own extent, which default ranges follow as np.histogram's do
+        self.value_min = self.lo if value_min is None else float(value_min)
+        self.value_max = self.hi if value_max is None else float(value_max)
+        self.discrete = bool(discrete)
+        counts = np.asarray(counts, dtype=np.int64)
+        sums = None if sums is None else np.asarray(sums, dtype=float)
+        self.levels = [(counts, sums)]
+        # Coarser levels would smear the per-value bins, so discrete pyramids keep just the one
+        while len(counts) > COARSEST_BINS and not self.discrete:
+            counts = counts.reshape(-1, 2).sum(axis=1)
+            sums = None if sums is None else sums.reshape(-1, 2).sum(axis=1)
+            self.levels.append((counts, sums))
+
+    @classmethod
+    def from_values(cls, x, weights=None, value_range=None, bins=FINEST_BINS):
+        """Bin x (and sum weights per bin), skipping missing and infinite values"""
+        x, weights = _finite(x, weights)
+        if value_range is not None:
+            inside = (x >= value_range[0]) & (x <= value_range[1])
+            x = x[inside]
+            weights = None if weights is None else weights[inside]
+        value_min, value_max = (x.min(), x.max()) if len(x) else (0.0, 1.0)
+
+        if value_max - value_min < bins and np.array_equal(x, np.floor(x)):
+            # One unit-wide bin centred on each integer, so every value sits at a bin centre
+            lo, hi, discrete = value_min - 0.5, value_min - 0.5 + bins, True
+        else:
+            lo, hi, discrete = (value_range if value_range is not None else (value_min, value_max)) + (False,)
+            if lo == hi:
+                lo, hi = lo - 0.5, hi + 0.5
+
+        positions = np.minimum(((x - lo) / (hi - lo) * bins).astype(np.int64), bins - 1)
+        counts = np.bincount(positions, minlength=bins)
+        sums = None if weights is None else np.bincount(positions, weights=weights, minlength=bins)
+        return cls(lo, hi, counts, sums, value_min, value_max, discrete)
+
+    @classmethod
+    def from_series(cls, series, weights=None, value_range=None):
+        x = series.to_numpy(dtype=float, na_value=np.nan)
+        if weights is not None:
+            weights = weights.to_numpy(dtype=float, na_value=np.nan)
+        return cls.from_values(x, weights, value_range)
+
+    @property
+    def finest_width(self):
+        return (self.hi - self.lo) / len(self.levels[0][0])
+
+    def resolves(self, bins, lo=None, hi=None):
+        # A zoom into a handful of pyramid bins needs a rescan to draw bins finer than those
+        lo, hi = self.default_range(lo, hi)
+        return self.discrete or (hi - lo) / bins >= MIN_SUBBINS * self.finest_width
+
+    def _edge_index(self, value):
+        # Position of value on the finest level's edges, or None if it falls between two
+        position = (value - self.lo) / self.finest_width
+        index = int(round(position))
+        if abs(position - index) > 1e-6 or not 0 <= index <= len(self.levels[0][0]):
+            return None
+        return index
+
+    def is_exact(self, lo=None, hi=None):
+        """Whether aggregate's counts over [lo, hi] are exact rather than estimated"""
+        lo, hi = self.default_range(lo, hi)
+        return self.discrete or (self._edge_index(lo) is not None and self._edge_index(hi) is not None)
+
+    def default_range(self, lo=None, hi=None):
+        if lo is None and hi is None and self.value_min == self.value_max:
+            # Same widening np.histogram applies to a constant column
+            return self.value_min - 0.5, self.value_max + 0.5
+        return (self.value_min if lo is None else float(lo)), (self.value_max if hi is None else float(hi))
+
+    def aggregate(self, bins, lo=None, hi=None):
+        """Counts (and sums) in `bins` bins over [lo, hi], plus the bin edges
+
+        When lo and hi fall on finest-level edges (see is_exact), every bin
+        edge is moved to the nearest finest-level edge, so bins differ in
+        width by at most one finest bin and their counts and sums are exact.
+        Otherwise bins are equal-width and a pyramid bin that straddles a
+        target edge is split between the two target bins in proportion to
+        its overlap, as if its values were spread evenly across it; those
+        counts are fractional estimates, left unrounded so that sums divided
+        by counts stay unbiased means. Discrete pyramids hold each value at
+        its bin centre, so their bins move whole and the result is exact.
+        """
+        lo, hi = self.default_range(lo, hi)
+        first_edge, last_edge = self._edge_index(lo), self._edge_index(hi)
+        if not self.discrete and first_edge is not None and last_edge is not None and last_edge - first_edge >= bins:
+            counts, sums = self.levels[0]
+            edges = np.rint(np.linspace(first_edge, last_edge, bins + 1)).astype(np.int64)
+            starts = edges[:-1] - first_edge
+            binned_counts = np.add.reduceat(counts[first_edge:last_edge], starts)
+            binned_sums = None if sums is None else np.add.reduceat(sums[first_edge:last_edge], starts)
+            return binned_counts, binned_sums, self.lo + edges * self.finest_width
+
+        target_width = (hi - lo) / bins
+        level = 0
+        for index, (counts, _) in enumerate(self.levels):
+            if (self.hi - self.lo) / len(counts) * MIN_SUBBINS <= target_width:
+                level = index
+        counts, sums = self.levels[level]
+        width = (self.hi - self.lo) / len(counts)
+
+        if self.discrete:
+            centres = self.lo + (np.arange(len(counts)) + 0.5) * width
+            inside = (centres >= lo) & (centres <= hi)
+            # Bins are half-open except the last, as in np.histogram
+            first = np.minimum(((centres[inside] - lo) / target_width).astype(np.int64), bins - 1)
+            binned_counts = np.bincount(first, weights=counts[inside], minlength=bins).astype(np.int64)
+            binned_sums = None if sums is None else np.bincount(first, weights=sums[inside], minlength=bins)
+            return binned_counts, binned_sums, np.linspace(lo, hi, bins + 1)
+
+        # Pyramid bin edges in units of target bins, clipped to the requested range
+        edges = (self.lo + np.arange(len(counts) + 1) * width - lo) / target_width
+        starts, ends = np.clip(edges[:-1], 0, bins), np.clip(edges[1:], 0, bins)
+        spans = edges[1:] - edges[:-1]
+        first = np.minimum(np.floor(starts).astype(np.int64), bins - 1)
+        second = np.minimum(first + 1, bins - 1)
+        # Share of each pyramid bin that falls in its first target bin, and in the next one
+        head = (np.minimum(ends, first + 1) - starts) / spans
+        tail = np.maximum(ends - (first + 1), 0) / spans
+
+        def split(values):
+            return (np.bincount(first, weights=values * head, minlength=bins)
+                    + np.bincount(second, weights=values * tail, minlength=bins))
+
+        binned_counts = split(counts)
+        binned_sums = None if sums is None else split(sums)
+        return binned_counts, binned_sums, np.linspace(lo, hi, bins + 1)
+
+
+def build_pyramids(df, columns):
+    return {col: HistogramPyramid.from_series(df[col]) for col in columns}
+
+
+def save_pyramids(pyramids, filepath):
+    # Kept out of the profile JSON, which every request reads
+    path = histogram_path(filepath)
+    tmp_path = path + '.tmp'
+    columns = list(pyramids)
+    with open(tmp_path, 'wb') as f:
+        np.savez(f, columns=np.array(columns, dtype=str),
+                 bounds=np.array([[pyramids[col].lo, pyramids[col].hi, pyramids[col].value_min, pyramids[col].value_max]
+                                  for col in columns], dtype=float).reshape(-1, 4),
+                 discrete=np.array([pyramids[col].discrete for col in columns], dtype=bool),
+                 counts=np.array([pyramids[col].levels[0][0] for col in columns], dtype=np.int64).reshape(
+                     len(columns), FINEST_BINS))
+    os.replace(tmp_path, path)
+
+
+def load_pyramid(filepath, column):
+    """The pyramid saved for column at ingest, or None"""
+    path = histogram_path(filepath)
+    if not os.path.exists(path):
+        return None
+    with np.load(path) as stored:
+        matches = np.flatnonzero(stored['columns'] == column)
+        if not len(matches):
+            return None
+        lo, hi, value_min, value_max = stored['bounds'][matches[0]]
+        return HistogramPyramid(lo, hi, stored['counts'][matches[0]], value_min=value_min, value_max=value_max,
+                                discrete=stored['discrete'][matches[0]])
+
+
+class PyramidCache:
+    """Keeps histogram pyramids per dataset, column and (for binned means) value column"""
+
+    def __init__(self, max_entries=256):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key, compute):
+        with self._lock:
+            pyramid = self._entries.get(key)
+            if pyramid is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return pyramid
+            self.misses += 1
+
+        pyramid = compute()
+        with self._lock:
+            self._entries[key] = pyramid
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return pyramid
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        with self._lock:
+            return {'entries': len(self._entries), 'hits': self.hits, 'misses': self.misses}
@@ -0,0 +1,110 @@
+import time
+import logging
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+logger = logging.getLogger(__name__)
+
+
+class IngestJob:
+    def __init__(self, job_id, total_bytes=0, key=None):
+        self.job_id = job_id
+        self.key = key  # what is being ingested; one running job per key
+        self.status = 'queued'  # queued -> running -> done | failed
+        self.phase = 'queued'
+        self.total_bytes = total_bytes
+        self.bytes_parsed = 0
+        self.rows = 0
+        self.metrics = {}  # phase timings and source details, e.g. parse_seconds
+        self.error = None
+        self.result = None
+        self.created_at = time.time()
+        self.finished_at = None
+        self._done = threading.Event()
+
+    def update(self, phase=None, bytes_parsed=None, rows=None):
+        if phase is not None:
+            self.phase = phase
+        if bytes_parsed is not None:
+            self.bytes_parsed = bytes_parsed
+        if rows is not None:
+            self.rows = rows
+
+    def wait(self, timeout=None):
+        return self._done.wait(timeout)
+
+    @property
+    def finished(self):
+        return self._done.is_set()
+
+    def to_dict(self):
+        progress = self.bytes_parsed / self.total_bytes if self.total_bytes else 0.0
+        return {
+            'job_id': self.job_id,
+            'status': self.status,
+            'phase': self.phase,
+            'bytes_parsed': self.bytes_parsed,
+            'total_bytes': self.total_bytes,
+            'progress': 1.0 if self.status == 'done' else min(progress, 1.0),
+            'rows': self.rows,
+            'metrics': self.metrics,
+            'error': self.error,
+            'result': self.result
+        }
+
+    def _finish(self, status, result=None, error=None):
+        self.status = status
+        self.phase = status
+        self.result = result
+        self.error = error
+        self.finished_at = time.time()
+        self._done.set()
+
+
+class IngestJobManager:
+    """Runs upload ingest on a bounded thread pool and tracks its progress"""
+
+    def __init__(self, max_workers=2, max_pending=16, max_finished=500):
+        self.max_pending = max_pending
+        self.max_finished = max_finished
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='ingest')
+        self._jobs = OrderedDict()
+        self._lock = threading.Lock()
+
+    def submit(self, job_id, task, total_bytes=0, key=None):
+        """Queue task(job); returns None when the queue is already full
+
+        If a job with the same key is still running, that job is returned
+        instead of queueing the same work twice.
+        """
+        with self._lock:
+            if key is not None:
+                for job in self._jobs.values():
+                    if job.key == key and not job.finished:
+                        return job
+            pending = sum(1 for job in self._jobs.values() if not job.finished)
+            if pending >= self.max_pending:
+                return None
+            job = IngestJob(job_id, total_bytes, key)
+            self._jobs[job_id] = job
+            self._prune()
+        self._executor.submit(self._run, job, task)
+        return job
+
+    def get(self, job_id):
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def _run(self, job, task):
+        job.status = 'running'
+        try:
+            job._finish('done', result=task(job))
+        except Exception as e:
+            logger.exception(f"Ingest job {job.job_id} failed")
+            job._finish('failed', error=str(e))
+
+    def _prune(self):
+        finished = [job_id for job_id, job in self._jobs.items() if job.finished]
+        for job_id in finished[:max(0, len(finished) - self.max_finished)]:
+            del self._jobs[job_id]
@@ -0,0 +1,119 @@
+import time
+import bisect
+import threading
+from contextlib import contextmanager
+from flask import g, has_request_context
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+@contextmanager
+def stage(name):
+    """Time a piece of request work; repeated stages in one request add up"""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        record_stage(name, time.perf_counter() - started)
+
+
+def record_stage(name, seconds):
+    # Work done outside a request (e.g. on the ingest pool) has nowhere to report
+    if not has_request_context():
+        return
+    timings = g.setdefault('stage_timings', {})
+    timings[name] = timings.get(name, 0.0) + seconds
+
+
+def server_timing_header(timings, total):
+    # Durations in milliseconds, as the Server-Timing spec expects
+    parts = [f'{name};dur={seconds * 1000:.2f}' for name, seconds in timings.items()]
+    parts.append(f'total;dur={total * 1000:.2f}')
+    return ', '.join(parts)
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_labels(labels):
+    if not labels:
+        return ''
+    return '{' + ','.join(f'{key}="{_escape(value)}"' for key, value in labels) + '}'
+
+
+class Histogram:
+    """Cumulative-bucket latency histogram keyed by label values"""
+
+    def __init__(self, name, help_text, label_names, buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.help_text = help_text
+        self.label_names = tuple(label_names)
+        self.buckets = tuple(buckets)
+        self._series = {}  # label values -> [bucket counts..., +Inf count, sum]
+        self._lock = threading.Lock()
+
+    def observe(self, value, **labels):
+        key = tuple(str(labels.get(name, '')) for name in self.label_names)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = [0] * (len(self.buckets) + 1) + [0.0]
+            series[index] += 1
+            series[-1] += value
+
+    def render(self):
+        lines = [f'# HELP {self.name} {self.help_text}', f'# TYPE {self.name} histogram']
+        with self._lock:
+            snapshot = {key: list(series) for key, series in self._series.items()}
+        for key, series in sorted(snapshot.items()):
+            labels = list(zip(self.label_names, key))
+            cumulative = 0
+            for bound, count in zip(self.buckets + ('+Inf',), series[:-1]):
+                cumulative += count
+                lines.append(f'{self.name}_bucket{_format_labels(labels + [("le", bound)])} {cumulative}')
+            lines.append(f'{self.name}_sum{_format_labels(labels)} {series[-1]}')
+            lines.append(f'{self.name}_count{_format_labels(labels)} {cumulative}')
+        return lines
+
+
+def render_samples(name, metric_type, help_text, samples):
+    """Counter or gauge lines for [(labels, value)]"""
+    lines = [f'# HELP {name} {help_text}', f'# TYPE {name} {metric_type}']
+    for labels, value in samples:
+        lines.append(f'{name}{_format_labels(list(labels.items()))} {value}')
+    return lines
+
+
+class RequestMetrics:
+    """Request and stage latency histograms, exported in Prometheus text format
+
+    Each worker process keeps its own numbers, so scrape every worker (or
+    aggregate at the collector) when running several.
+    """
+
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.requests = Histogram('datalens_request_duration_seconds', 'Request latency by route and chart type',
+                                  ('method', 'route', 'chart_type', 'status'), buckets)
+        self.stages = Histogram('datalens_stage_duration_seconds', 'Time spent in each stage of a request',
+                                ('route', 'chart_type', 'stage'), buckets)
+
+    def observe_request(self, method, route, chart_type, status, total, timings):
+        self.requests.observe(total, method=method, route=route, chart_type=chart_type, status=status)
+        for name, seconds in timings.items():
+            self.stages.observe(seconds, route=route, chart_type=chart_type, stage=name)
+
+    def render(self, cache_stats=None):
+        lines = self.requests.render() + self.stages.render()
+        if cache_stats:
+            hits = [({'cache': name}, stats['hits']) for name, stats in cache_stats.items() if 'hits' in stats]
+            misses = [({'cache': name}, stats['misses']) for name, stats in cache_stats.items() if 'misses' in stats]
+            entries = [({'cache': name}, stats['entries']) for name, stats in cache_stats.items() if 'entries' in stats]
+            sizes = [({'cache': name}, stats['current_bytes']) for name, stats in cache_stats.items()
+                     if 'current_bytes' in stats]
+            lines += render_samples('datalens_cache_hits_total', 'counter', 'Cache lookups that found an entry', hits)
+            lines += render_samples('datalens_cache_misses_total', 'counter', 'Cache lookups that missed', misses)
+            lines += render_samples('datalens_cache_entries', 'gauge', 'Entries currently cached', entries)
+            lines += render_samples('datalens_cache_bytes', 'gauge', 'Bytes currently cached', sizes)
+        return '\n'.join(lines) + '\n'
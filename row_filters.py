@@ -0,0 +1,277 @@
+import threading
+from collections import OrderedDict
+import numpy as np
+import pandas as pd
+
+FILTER_OPS = ('range', 'in', 'not_in', 'is_null', 'not_null')
+# Columns with more distinct values than this are matched by scanning rather than indexed
+VALUE_INDEX_MAX_VALUES = 100_000
+
+
+class FilterError(ValueError):
+    pass
+
+
+def _canonical_value(value):
+    if isinstance(value, (list, dict)):
+        raise FilterError(f'Filter values must be scalars, got {value!r}')
+    return value
+
+
+def _sort_key(value):
+    # Mixed-type value lists still need one stable order for cache keys
+    return type(value).__name__, str(value)
+
+
+def parse_filter(expr):
+    """Validate a filter expression and return its canonical, hashable form
+
+    Leaves test one column:
+        {'column': c, 'op': 'range', 'min': lo, 'max': hi}   bounds inclusive, either optional
+        {'column': c, 'op': 'in' | 'not_in', 'values': [...]}
+        {'column': c, 'op': 'is_null' | 'not_null'}
+    and combine with {'all': [...]}, {'any': [...]} and {'not': expr}; a bare
+    list means 'all'. Returns None for an empty expression (no filtering).
+    Equivalent expressions share one canonical form, so it serves as a cache key.
+    """
+    if expr is None or expr == [] or expr == {}:
+        return None
+    if isinstance(expr, list):
+        expr = {'all': expr}
+    if not isinstance(expr, dict):
+        raise FilterError(f'Invalid filter: {expr!r}')
+
+    for combinator in ('all', 'any'):
+        if combinator in expr:
+            if not isinstance(expr[combinator], list):
+                raise FilterError(f"'{combinator}' takes a list of filters")
+            children = [child for child in (parse_filter(item) for item in expr[combinator]) if child is not None]
+            if not children:
+                return None
+            if len(children) == 1:
+                return children[0]
+            return (combinator, tuple(sorted(set(children), key=repr)))
+    if 'not' in expr:
+        child = parse_filter(expr['not'])
+        return None if child is None else ('not', child)
+
+    column, op = expr.get('column'), expr.get('op')
+    if not isinstance(column, str) or not column:
+        raise FilterError(f'Filter is missing a column: {expr!r}')
+    if op not in FILTER_OPS:
+        raise FilterError(f"Unknown filter op {op!r}; expected one of {', '.join(FILTER_OPS)}")
+    if op == 'range':
+        low, high = _canonical_value(expr.get('min')), _canonical_value(expr.get('max'))
+        if low is None and high is None:
+            raise FilterError(f"Range filter on {column} needs 'min' or 'max'")
+        return ('leaf', column, op, (low, high))
+    if op in ('in', 'not_in'):
+        values = expr.get('values')
+        if not isinstance(values, list):
+            raise FilterError(f"'{op}' filter on {column} needs a list of values")
+        return ('leaf', column, op, tuple(sorted({_canonical_value(v) for v in values}, key=_sort_key)))
+    return ('leaf', column, op, ())
+
+
+def filter_leaves(expr):
+    """The single-column predicates of a parsed filter, each once"""
+    if expr is None:
+        return []
+    if expr[0] == 'leaf':
+        return [expr]
+    if expr[0] == 'not':
+        return filter_leaves(expr[1])
+    return list(dict.fromkeys(leaf for child in expr[1] for leaf in filter_leaves(child)))
+
+
+def filter_columns(expr):
+    """Every column a parsed filter reads"""
+    return {leaf[1] for leaf in filter_leaves(expr)}
+
+
+def evaluate_filter(expr, leaf_mask):
+    """Combine leaf masks into the expression's row mask with vectorised boolean ops
+
+    leaf_mask(leaf) returns the boolean array for one leaf, typically from a
+    cache; the arrays it returns are never modified.
+    """
+    kind = expr[0]
+    if kind == 'leaf':
+        return leaf_mask(expr)
+    if kind == 'not':
+        return np.logical_not(evaluate_filter(expr[1], leaf_mask))
+    masks = [evaluate_filter(child, leaf_mask) for child in expr[1]]
+    combine = np.logical_and if kind == 'all' else np.logical_or
+    result = combine(masks[0], masks[1])
+    for mask in masks[2:]:
+        combine(result, mask, out=result)
+    return result
+
+
+class ValueIndex:
+    """Row positions of each distinct value of a column, grouped by value
+
+    Membership filters scatter the positions of the requested values into a
+    mask instead of comparing every row, so their cost follows the number of
+    matching rows rather than the size of the column.
+    """
+
+    def __init__(self, series):
+        codes, uniques = pd.factorize(series, use_na_sentinel=True)
+        self.n_rows = len(series)
+        self.is_datetime = pd.api.types.is_datetime64_any_dtype(series)
+        self._codes = {value: code for code, value in enumerate(uniques.tolist())}
+        # Values as the client sends them back, e.g. "3" for an integer column
+        self._codes_by_text = {str(value): code for value, code in self._codes.items()}
+        # Missing values sort first (code -1); every other value's rows are contiguous
+        position_dtype = np.int32 if self.n_rows < 2 ** 31 else np.int64
+        self.positions = np.argsort(codes, kind='stable').astype(position_dtype)
+        self.offsets = np.concatenate([[0], np.cumsum(np.bincount(codes + 1, minlength=len(uniques) + 1))])
+
+    @property
+    def nbytes(self):
+        # Rough: the dicts cost about as much per value as the two arrays per row
+        return self.positions.nbytes + self.offsets.nbytes + 200 * len(self._codes)
+
+    def _code(self, value):
+        if value in self._codes:
+            return self._codes[value]
+        if isinstance(value, str):
+            if value in self._codes_by_text:
+                return self._codes_by_text[value]
+            if self.is_datetime:
+                try:
+                    return self._codes.get(pd.Timestamp(value))
+                except ValueError:
+                    return None
+        return None
+
+    def rows(self, value):
+        code = self._code(value)
+        if code is None:
+            return self.positions[:0]
+        return self.positions[self.offsets[code + 1]:self.offsets[code + 2]]
+
+    def mask(self, values):
+        mask = np.zeros(self.n_rows, dtype=bool)
+        for value in values:
+            mask[self.rows(value)] = True
+        return mask
+
+    def not_null_mask(self):
+        mask = np.ones(self.n_rows, dtype=bool)
+        mask[self.positions[:self.offsets[1]]] = False
+        return mask
+
+
+def _range_bound(series, value):
+    if value is None:
+        return None
+    if pd.api.types.is_datetime64_any_dtype(series):
+        try:
+            bound = pd.Timestamp(value)
+        except (TypeError, ValueError):
+            raise FilterError(f'Range bound {value!r} is not a date')
+        tz = getattr(series.dtype, 'tz', None)
+        if tz is not None and bound.tzinfo is None:
+            bound = bound.tz_localize(tz)
+        return bound
+    if pd.api.types.is_numeric_dtype(series) and not isinstance(value, (int, float)):
+        try:
+            return float(value)
+        except (TypeError, ValueError):
+            raise FilterError(f'Range bound {value!r} is not a number')
+    return value
+
+
+def predicate_mask(series, leaf, index=None):
+    """Boolean mask of the rows of series matching one leaf; missing values never match a value test"""
+    _, column, op, args = leaf
+    if op == 'is_null':
+        return series.isna().to_numpy()
+    if op == 'not_null':
+        return series.notna().to_numpy()
+
+    if op == 'range':
+        low, high = (_range_bound(series, value) for value in args)
+        if isinstance(series.dtype, pd.CategoricalDtype) and not series.cat.ordered:
+            series = series.astype(series.cat.categories.dtype)
+        if pd.api.types.is_numeric_dtype(series) and not pd.api.types.is_bool_dtype(series):
+            values = series.to_numpy(dtype=float, na_value=np.nan)
+        else:
+            values = series
+        try:
+            mask = np.ones(len(series), dtype=bool) if low is None else np.asarray(values >= low)
+            if high is not None:
+                mask = mask & np.asarray(values <= high)
+        except TypeError:
+            raise FilterError(f'Range bounds {args!r} cannot be compared with {column}')
+        return mask & series.notna().to_numpy()
+
+    if index is not None:
+        mask = index.mask(args)
+        return mask if op == 'in' else ~mask & index.not_null_mask()
+    values = list(args)
+    if pd.api.types.is_datetime64_any_dtype(series):
+        values = [_range_bound(series, value) for value in values]
+    mask = series.isin(values).to_numpy()
+    return mask if op == 'in' else ~mask & series.notna().to_numpy()
+
+
+class FilterCache:
+    """LRU cache of per-column filter masks and value indexes, bounded by total bytes
+
+    Entries are read-only arrays (or indexes) keyed by dataset and predicate,
+    so a drill-down that adds one condition reuses every mask computed for
+    the conditions before it.
+    """
+
+    def __init__(self, max_bytes=128 * 1024 * 1024):
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()  # key -> (value, nbytes)
+        self._lock = threading.Lock()
+        self.current_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key, compute):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[0]
+            self.misses += 1
+
+        value = compute()
+        if isinstance(value, np.ndarray):
+            value.flags.writeable = False
+        nbytes = value.nbytes
+        with self._lock:
+            if key in self._entries:
+                self.current_bytes -= self._entries.pop(key)[1]
+            if nbytes <= self.max_bytes:
+                self._entries[key] = (value, nbytes)
+                self.current_bytes += nbytes
+                while self.current_bytes > self.max_bytes:
+                    _, (_, evicted) = self._entries.popitem(last=False)
+                    self.current_bytes -= evicted
+                    self.evictions += 1
+        return value
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.current_bytes = 0
+
+    def stats(self):
+        with self._lock:
+            return {
+                'entries': len(self._entries),
+                'current_bytes': self.current_bytes,
+                'max_bytes': self.max_bytes,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions
+            }
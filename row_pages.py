@@ -0,0 +1,95 @@
+import threading
+from collections import OrderedDict
+import numpy as np
+import pandas as pd
+
+MAX_PAGE_ROWS = 1000
+
+
+class SortIndexCache:
+    """Remembers row orderings so paging a sorted view never re-sorts
+
+    Each ordering costs 8 bytes per row, so entries are evicted least
+    recently used first to keep the total within max_bytes.
+    """
+
+    def __init__(self, max_bytes=256 * 1024 * 1024):
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()  # key -> sort index
+        self._lock = threading.Lock()
+        self.current_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key, series, ascending=True):
+        with self._lock:
+            order = self._entries.get(key)
+            if order is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return order
+            self.misses += 1
+
+        order = compute_sort_index(series, ascending)
+        with self._lock:
+            if key in self._entries:
+                self.current_bytes -= self._entries.pop(key).nbytes
+            if order.nbytes <= self.max_bytes:
+                # Larger than the whole budget, serve it uncached
+                self._entries[key] = order
+                self.current_bytes += order.nbytes
+                while self.current_bytes > self.max_bytes:
+                    _, evicted = self._entries.popitem(last=False)
+                    self.current_bytes -= evicted.nbytes
+                    self.evictions += 1
+        return order
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.current_bytes = 0
+
+    def stats(self):
+        with self._lock:
+            return {
+                'entries': len(self._entries),
+                'current_bytes': self.current_bytes,
+                'max_bytes': self.max_bytes,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions
+            }
+
+
+def compute_sort_index(series, ascending=True):
+    # Stable positional ordering with missing values last, like sort_values
+    order = series.reset_index(drop=True).sort_values(ascending=ascending, na_position='last', kind='stable').index
+    return order.to_numpy(dtype=np.int64)
+
+
+def page_positions(total_rows, offset, limit, sort_index=None):
+    offset = max(0, min(offset, total_rows))
+    limit = max(0, min(limit, MAX_PAGE_ROWS, total_rows - offset))
+    if sort_index is not None:
+        return sort_index[offset:offset + limit]
+    return np.arange(offset, offset + limit)
+
+
+def _column_values(series):
+    missing = series.isna().to_numpy()
+    if pd.api.types.is_datetime64_any_dtype(series):
+        values = series.astype(str).tolist()
+    else:
+        values = series.tolist()
+    # JSON has no NaN/NaT; send null instead
+    return [None if is_missing else value for value, is_missing in zip(values, missing)]
+
+
+def frame_to_columns(df):
+    """Column-oriented page: one array per column plus the row positions"""
+    return {
+        'columns': [str(column) for column in df.columns],
+        'index': [int(i) for i in df.index],
+        'values': [_column_values(df[column]) for column in df.columns]
+    }
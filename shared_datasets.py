@@ -0,0 +1,148 @@
+import os
+import shutil
+import logging
+import threading
+from columnar_store import COLUMNAR_SUFFIX, read_dataset
+
+LEASE_SUFFIX = '.lease'
+
+logger = logging.getLogger(__name__)
+
+
+def _pid_alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+class SharedDatasetRegistry:
+    """Arrow datasets mapped by every worker process on the host
+
+    A dataset is published once as an uncompressed Arrow file, either in
+    place next to the upload or copied into publish_dir (e.g. a tmpfs such as
+    /dev/shm/datalens). Workers attach by memory-mapping that file; null-free
+    numeric columns come back as views of the mapping, so the data sits in
+    the page cache once however many workers use it, and a worker that has
+    never seen the dataset maps it instead of parsing it.
+
+    Attachments are reference counted: each process holds one lease file per
+    dataset it has mapped, dropped when its last cached frame of that dataset
+    is released. refcount() counts the leases of live processes.
+    """
+
+    def __init__(self, lease_dir, publish_dir=None):
+        self.lease_dir = lease_dir
+        self.publish_dir = publish_dir
+        self._attached = {}  # name -> frames this process holds
+        self._lock = threading.Lock()
+        self.attaches = 0
+        self.publishes = 0
+        os.makedirs(lease_dir, exist_ok=True)
+        if publish_dir:
+            os.makedirs(publish_dir, exist_ok=True)
+
+    def published_path(self, name):
+        return os.path.join(self.publish_dir, name + COLUMNAR_SUFFIX) if self.publish_dir else None
+
+    def publish(self, name, store):
+        """Make the Arrow file at store available to every worker; returns the path to map"""
+        target = self.published_path(name)
+        if target is None or not store.endswith(COLUMNAR_SUFFIX):
+            return store
+        tmp_path = f'{target}.{os.getpid()}.tmp'
+        try:
+            shutil.copyfile(store, tmp_path)
+            os.replace(tmp_path, target)
+        except OSError as e:
+            # A full tmpfs just means workers map the upload folder's copy instead
+            logger.warning(f"Could not publish {name} to {self.publish_dir}: {e}")
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            return store
+        self.publishes += 1
+        return target
+
+    def resolve(self, name, store):
+        # The published copy when there is one, otherwise the dataset's own file
+        target = self.published_path(name)
+        if target and os.path.exists(target):
+            return target
+        return store
+
+    def attach(self, name, path, columns=None):
+        """Load a dataset frame, mapped without copying where it is an Arrow file"""
+        df = read_dataset(path, columns)
+        if not path.endswith(COLUMNAR_SUFFIX):
+            return df
+        with self._lock:
+            count = self._attached.get(name, 0)
+            self._attached[name] = count + 1
+            self.attaches += 1
+        if count == 0:
+            self._write_lease(name)
+        return df
+
+    def release(self, name):
+        with self._lock:
+            count = self._attached.get(name, 0)
+            if count == 0:
+                return
+            if count > 1:
+                self._attached[name] = count - 1
+                return
+            del self._attached[name]
+        self._remove_file(self._lease_path(name, os.getpid()))
+
+    def refcount(self, name):
+        """Processes that currently have the dataset mapped"""
+        prefix = name + '.'
+        count = 0
+        for filename in os.listdir(self.lease_dir):
+            if not (filename.startswith(prefix) and filename.endswith(LEASE_SUFFIX)):
+                continue
+            pid = filename[len(prefix):-len(LEASE_SUFFIX)]
+            if pid.isdigit() and _pid_alive(int(pid)):
+                count += 1
+            else:
+                # Left behind by a worker that exited without releasing
+                self._remove_file(os.path.join(self.lease_dir, filename))
+        return count
+
+    def unpublish(self, name):
+        # Processes that still have it mapped keep their view; new attaches fall back or fail cleanly
+        target = self.published_path(name)
+        if target:
+            self._remove_file(target)
+
+    def stats(self):
+        with self._lock:
+            attached = dict(self._attached)
+        return {
+            'attached': len(attached),
+            'attached_frames': sum(attached.values()),
+            'attaches': self.attaches,
+            'publishes': self.publishes,
+            'publish_dir': self.publish_dir,
+            'workers_attached': {name: self.refcount(name) for name in attached}
+        }
+
+    def _lease_path(self, name, pid):
+        return os.path.join(self.lease_dir, f'{name}.{pid}{LEASE_SUFFIX}')
+
+    def _write_lease(self, name):
+        try:
+            with open(self._lease_path(name, os.getpid()), 'w'):
+                pass
+        except OSError as e:
+            logger.warning(f"Could not record lease for {name}: {e}")
+
+    @staticmethod
+    def _remove_file(path):
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
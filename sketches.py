@@ -0,0 +1,180 @@
+import numpy as np
+import pandas as pd
+
+
+class KLLSketch:
+    """Mergeable quantile sketch (Karnin-Lang-Liberty compactors)
+
+    Memory stays around 3 * k values no matter how many are added, and two
+    sketches built over separate chunks can be merged into one.
+    """
+
+    def __init__(self, k=200, seed=None):
+        self.k = k
+        self.count = 0
+        self.levels = [np.empty(0)]
+        self._rng = np.random.default_rng(seed)
+
+    def update(self, values):
+        values = np.asarray(values, dtype=float)
+        values = values[~np.isnan(values)]
+        if not values.size:
+            return
+        self.count += values.size
+        self.levels[0] = np.concatenate([self.levels[0], values])
+        self._compress()
+
+    def merge(self, other):
+        while len(self.levels) < len(other.levels):
+            self.levels.append(np.empty(0))
+        for level, items in enumerate(other.levels):
+            self.levels[level] = np.concatenate([self.levels[level], items])
+        self.count += other.count
+        self._compress()
+        return self
+
+    def quantiles(self, qs):
+        qs = np.asarray(qs, dtype=float)
+        if not self.count:
+            return np.full(qs.shape, np.nan)
+        if len(self.levels) == 1:
+            # Nothing has been compacted yet, so the answer is exact
+            return np.quantile(self.levels[0], qs)
+
+        values = np.concatenate(self.levels)
+        weights = np.concatenate([np.full(len(items), 2 ** level) for level, items in enumerate(self.levels)])
+        order = np.argsort(values, kind='stable')
+        values = values[order]
+        cumulative = np.cumsum(weights[order])
+        ranks = qs * (cumulative[-1] - 1)
+        positions = np.searchsorted(cumulative, ranks, side='right')
+        return values[np.minimum(positions, len(values) - 1)]
+
+    def _capacity(self, level):
+        depth = len(self.levels) - level - 1
+        return max(2, int(np.ceil(self.k * (2 / 3) ** depth)))
+
+    def _compress(self):
+        while True:
+            over = [level for level, items in enumerate(self.levels) if len(items) > self._capacity(level)]
+            if not over:
+                return
+            level = over[0]
+            if level + 1 == len(self.levels):
+                self.levels.append(np.empty(0))
+
+            items = np.sort(self.levels[level])
+            if len(items) % 2:
+                self.levels[level] = items[-1:]
+                items = items[:-1]
+            else:
+                self.levels[level] = np.empty(0)
+            # Promote every other item; each survivor now stands for twice the weight
+            offset = self._rng.integers(2)
+            self.levels[level + 1] = np.concatenate([self.levels[level + 1], items[offset::2]])
+
+
+def hash_values(series):
+    """64-bit hashes that agree across chunks whatever dtype each chunk was read as"""
+    series = series.dropna()
+    if pd.api.types.is_numeric_dtype(series) and not pd.api.types.is_bool_dtype(series):
+        series = series.astype(np.float64)
+    return pd.util.hash_pandas_object(series, index=False).to_numpy(dtype=np.uint64)
+
+
+def _bit_length(values):
+    # Exact bit length of uint64s; split in halves so float conversion never rounds
+    high = (values >> np.uint64(32)).astype(np.float64)
+    low = (values & np.uint64(0xFFFFFFFF)).astype(np.float64)
+    return np.where(high > 0, np.frexp(high)[1] + 32, np.frexp(low)[1])
+
+
+class HyperLogLog:
+    """Approximate distinct count in 2 ** p one-byte registers
+
+    The relative error is about 1.04 / sqrt(2 ** p), 0.8% at the default p=14,
+    and small counts fall back to linear counting, which is close to exact.
+    """
+
+    def __init__(self, p=14):
+        self.p = p
+        self.registers = np.zeros(2 ** p, dtype=np.uint8)
+
+    def update_hashes(self, hashes):
+        if not len(hashes):
+            return
+        shift = np.uint64(64 - self.p)
+        buckets = (hashes >> shift).astype(np.intp)
+        rest = hashes & np.uint64((1 << (64 - self.p)) - 1)
+        # Position of the leftmost 1-bit in what is left of the hash
+        ranks = (64 - self.p) - _bit_length(rest) + 1
+        np.maximum.at(self.registers, buckets, ranks.astype(np.uint8))
+
+    def update(self, series):
+        self.update_hashes(hash_values(series))
+
+    def merge(self, other):
+        np.maximum(self.registers, other.registers, out=self.registers)
+        return self
+
+    def count(self):
+        m = len(self.registers)
+        alpha = 0.7213 / (1 + 1.079 / m)
+        estimate = alpha * m * m / np.sum(np.exp2(-self.registers.astype(np.float64)))
+        zeros = int(np.count_nonzero(self.registers == 0))
+        if estimate <= 2.5 * m and zeros:
+            estimate = m * np.log(m / zeros)
+        return int(round(estimate))
+
+
+class SpaceSavingSketch:
+    """Heavy hitters with bounded memory (Metwally et al. Space-Saving)
+
+    Keeps at most `capacity` counters. Every reported count is an upper bound
+    that overshoots by at most its `error`, and any value not kept occurred at
+    most `floor` times. Chunks are summarised with value_counts and merged as
+    mergeable summaries, so updates stay vectorised; memory follows the
+    distinct values of one chunk, so large columns should come in slices.
+    """
+
+    def __init__(self, capacity=64):
+        self.capacity = capacity
+        self.counts = {}
+        self.errors = {}
+        self.floor = 0
+
+    def update(self, series, key=None):
+        """Count a chunk of values; key, if given, maps each value kept to the key it is counted under"""
+        counts = series.value_counts(dropna=True, sort=True)
+        if not len(counts):
+            return
+        floor = int(counts.iloc[self.capacity]) if len(counts) > self.capacity else 0
+        counts = counts.iloc[:self.capacity]
+        keys = counts.index.tolist()
+        if key is not None:
+            keys = [key(value) for value in keys]
+        values = [int(count) for count in counts.to_numpy()]
+        self._merge(dict(zip(keys, values)), dict.fromkeys(keys, 0), floor)
+
+    def merge(self, other):
+        self._merge(other.counts, other.errors, other.floor)
+        return self
+
+    def top(self, n=10):
+        """[(value, count, error)] for the n largest counts"""
+        ranked = sorted(self.counts.items(), key=lambda item: item[1], reverse=True)[:n]
+        return [(value, count, self.errors[value]) for value, count in ranked]
+
+    def _merge(self, counts, errors, floor):
+        # A value missing from one side may still have occurred up to that side's floor
+        merged = {}
+        for key in self.counts.keys() | counts.keys():
+            merged[key] = (self.counts.get(key, self.floor) + counts.get(key, floor),
+                           self.errors.get(key, self.floor) + errors.get(key, floor))
+
+        ranked = sorted(merged.items(), key=lambda item: item[1][0], reverse=True)
+        dropped = ranked[self.capacity][1][0] if len(ranked) > self.capacity else 0
+        kept = ranked[:self.capacity]
+        self.counts = {key: count for key, (count, _) in kept}
+        self.errors = {key: error for key, (_, error) in kept}
+        self.floor = max(self.floor + floor, dropped)
@@ -1,5 +1,11 @@
 let myChart = null;
 let uploadedData = null;
+const chartResponseCache = new Map(); // request body -> { etag, body }
+let virtualTable = null;
+
+const VIRTUAL_PAGE_SIZE = 200;
+const VIRTUAL_MAX_PAGES = 50;
+const VIRTUAL_OVERSCAN = 10;
 
 document.addEventListener('DOMContentLoaded', function() {
     initTheme();
@@ -92,6 +98,7 @@ function initControls() {
     valueColumn?.addEventListener('change', updateAIRecommendations);
     sizeColumn?.addEventListener('change', updateAIRecommendations);
     stackColumn?.addEventListener('change', updateAIRecommendations); // Add stack column listener
+    document.getElementById('sheetSelect')?.addEventListener('change', selectSheet);
 }
 
 async function handleFile(file) {
@@ -111,10 +118,16 @@ async function handleFile(file) {
             body: formData
         });
 
-        const data = await response.json();
+        let data = await response.json();
+
+        if (data.success && data.job_id) {
+            // Ingest runs in the background; poll until the dataset is ready
+            data = await waitForIngest(data.job_id);
+        }
 
         if (data.success) {
             uploadedData = data;
+            chartResponseCache.clear();
             displayFileInfo(data);
             showSections();
             await updatePreview();
@@ -128,6 +141,25 @@ async function handleFile(file) {
     }
 }
 
+async function waitForIngest(jobId) {
+    while (true) {
+        const response = await fetch(`/upload-status/${jobId}`);
+        const status = await response.json();
+
+        if (status.status === 'done') {
+            return status.result;
+        }
+        if (status.status === 'failed' || status.error) {
+            return { success: false, error: status.error || 'Error processing file' };
+        }
+
+        const percent = Math.round((status.progress || 0) * 100);
+        const rows = status.rows ? ` · ${status.rows.toLocaleString()} rows` : '';
+        setLoadingText(`Processing your data (${status.phase}) ${percent}%${rows}`);
+        await new Promise(resolve => setTimeout(resolve, 500));
+    }
+}
+
 function displayFileInfo(data) {
     document.getElementById('fileName').textContent = data.filename;
     document.getElementById('fileShape').textContent = `${data.shape[0]} rows × ${data.shape[1]} columns`;
@@ -144,9 +176,59 @@ function displayFileInfo(data) {
     ).length;
     document.getElementById('datetimeCount').textContent = `${datetimeCount} datetime`;
     
+    // Workbooks with several sheets can switch between them
+    const sheetGroup = document.getElementById('sheetGroup');
+    const sheetSelect = document.getElementById('sheetSelect');
+    if (data.sheets && data.sheets.length > 1) {
+        sheetSelect.innerHTML = data.sheets.map(sheet => {
+            const rows = sheet.rows === null ? '' : ` (${sheet.rows.toLocaleString()} rows)`;
+            return `<option value="${escapeHtml(sheet.name)}">${escapeHtml(sheet.name)}${rows}</option>`;
+        }).join('');
+        sheetSelect.value = data.sheet;
+        sheetGroup.style.display = 'block';
+    } else {
+        sheetGroup.style.display = 'none';
+    }
+    
     document.getElementById('fileInfo').style.display = 'block';
 }
 
+async function selectSheet() {
+    const sheet = document.getElementById('sheetSelect').value;
+    showLoading(true);
+
+    try {
+        const response = await fetch('/select-sheet', {
+            method: 'POST',
+            headers: {
+                'Content-Type': 'application/json'
+            },
+            body: JSON.stringify({ sheet: sheet })
+        });
+
+        let data = await response.json();
+
+        if (data.success && data.job_id) {
+            data = await waitForIngest(data.job_id);
+        }
+
+        if (data.success) {
+            uploadedData = data;
+            chartResponseCache.clear();
+            displayFileInfo(data);
+            // Column choices belong to the previous sheet
+            await onChartTypeChange();
+            await updatePreview();
+        } else {
+            showError(data.error);
+        }
+    } catch (error) {
+        showError('Switching sheet failed: ' + error.message);
+    } finally {
+        showLoading(false);
+    }
+}
+
 function showSections() {
     document.getElementById('previewSection').style.display = 'block';
     document.getElementById('visualizationSection').style.display = 'block';
@@ -158,6 +240,7 @@ async function updatePreview() {
     
     try {
         const tableOption = document.getElementById('tableOption').value;
+        const scrollable = tableOption === 'full';
         
         const response = await fetch('/preview', {
             method: 'POST',
@@ -165,13 +248,21 @@ async function updatePreview() {
                 'Content-Type': 'application/json'
             },
             body: JSON.stringify({
-                tableOption: tableOption
+                tableOption: tableOption,
+                includePreview: !scrollable
             })
         });
 
         const data = await response.json();
 
-        if (data.preview) {
+        if (scrollable) {
+            // All rows: page them in from /rows as the user scrolls
+            virtualTable = createVirtualTable(document.getElementById('previewTable'),
+                uploadedData.columns, uploadedData.shape[0]);
+            document.getElementById('previewCard').style.display = 'block';
+            document.getElementById('previewCard').classList.add('fade-in');
+        } else if (data.preview) {
+            virtualTable = null;
             document.getElementById('previewTable').innerHTML = data.preview;
             document.getElementById('previewCard').style.display = 'block';
             document.getElementById('previewCard').classList.add('fade-in');
@@ -189,6 +280,147 @@ async function updatePreview() {
     }
 }
 
+function escapeHtml(value) {
+    return String(value)
+        .replace(/&/g, '&amp;')
+        .replace(/</g, '&lt;')
+        .replace(/>/g, '&gt;')
+        .replace(/"/g, '&quot;');
+}
+
+function createVirtualTable(container, columns, totalRows) {
+    const table = {
+        columns: columns,
+        totalRows: totalRows,
+        sortColumn: null,
+        sortAscending: true,
+        rowHeight: 37,
+        pages: new Map(), // page number -> { index, values }
+        loading: new Set(),
+        generation: 0
+    };
+
+    container.innerHTML = `
+        <div class="virtual-table-viewport">
+            <div class="virtual-table-spacer">
+                <table class="table virtual-table">
+                    <thead><tr><th></th>${columns.map((col, i) =>
+                        `<th data-column="${i}" class="sortable">${escapeHtml(col)}</th>`).join('')}</tr></thead>
+                    <tbody></tbody>
+                </table>
+            </div>
+        </div>`;
+
+    table.viewport = container.querySelector('.virtual-table-viewport');
+    table.spacer = container.querySelector('.virtual-table-spacer');
+    table.element = container.querySelector('.virtual-table');
+    table.body = container.querySelector('tbody');
+
+    let frameRequested = false;
+    table.viewport.addEventListener('scroll', () => {
+        if (frameRequested) return;
+        frameRequested = true;
+        requestAnimationFrame(() => {
+            frameRequested = false;
+            renderVirtualRows(table);
+        });
+    });
+
+    container.querySelectorAll('th.sortable').forEach(th => {
+        th.addEventListener('click', () => {
+            const column = table.columns[Number(th.dataset.column)];
+            if (table.sortColumn === column) {
+                table.sortAscending = !table.sortAscending;
+            } else {
+                table.sortColumn = column;
+                table.sortAscending = true;
+            }
+            container.querySelectorAll('th.sortable').forEach(other => other.classList.remove('sort-asc', 'sort-desc'));
+            th.classList.add(table.sortAscending ? 'sort-asc' : 'sort-desc');
+            // A new order invalidates every page we hold
+            table.pages.clear();
+            table.loading.clear();
+            table.generation += 1;
+            table.viewport.scrollTop = 0;
+            renderVirtualRows(table);
+        });
+    });
+
+    renderVirtualRows(table);
+    return table;
+}
+
+function renderVirtualRows(table) {
+    table.spacer.style.height = `${table.totalRows * table.rowHeight}px`;
+
+    const visibleRows = Math.ceil(table.viewport.clientHeight / table.rowHeight) || 20;
+    const first = Math.max(0, Math.floor(table.viewport.scrollTop / table.rowHeight) - VIRTUAL_OVERSCAN);
+    const last = Math.min(table.totalRows, first + visibleRows + 2 * VIRTUAL_OVERSCAN);
+
+    for (let page = Math.floor(first / VIRTUAL_PAGE_SIZE); page <= Math.floor((last - 1) / VIRTUAL_PAGE_SIZE); page++) {
+        if (page >= 0 && !table.pages.has(page)) loadVirtualPage(table, page);
+    }
+
+    const rows = [];
+    for (let row = first; row < last; row++) {
+        const page = table.pages.get(Math.floor(row / VIRTUAL_PAGE_SIZE));
+        const offset = row % VIRTUAL_PAGE_SIZE;
+        if (page && offset < page.index.length) {
+            const cells = page.values.map(values => `<td>${values[offset] === null ? '' : escapeHtml(values[offset])}</td>`);
+            rows.push(`<tr><th>${page.index[offset]}</th>${cells.join('')}</tr>`);
+        } else {
+            rows.push(`<tr><th>${row}</th>${table.columns.map(() => '<td>…</td>').join('')}</tr>`);
+        }
+    }
+    table.body.innerHTML = rows.join('');
+    table.element.style.transform = `translateY(${first * table.rowHeight}px)`;
+
+    // Measure the real row height once rows exist, so the scroll range is exact
+    const firstRow = table.body.rows[0];
+    if (firstRow && firstRow.offsetHeight && Math.abs(firstRow.offsetHeight - table.rowHeight) > 0.5) {
+        table.rowHeight = firstRow.offsetHeight;
+        renderVirtualRows(table);
+    }
+}
+
+async function loadVirtualPage(table, page) {
+    if (table.loading.has(page)) return;
+    table.loading.add(page);
+    const generation = table.generation;
+
+    try {
+        const response = await fetch('/rows', {
+            method: 'POST',
+            headers: {
+                'Content-Type': 'application/json'
+            },
+            body: JSON.stringify({
+                offset: page * VIRTUAL_PAGE_SIZE,
+                limit: VIRTUAL_PAGE_SIZE,
+                sortColumn: table.sortColumn,
+                sortAscending: table.sortAscending
+            })
+        });
+        const data = await response.json();
+        if (generation !== table.generation || virtualTable !== table) return;
+        if (data.error) {
+            showError(data.error);
+            return;
+        }
+
+        table.pages.set(page, { index: data.index, values: data.values });
+        // Keep only the most recently loaded pages
+        while (table.pages.size > VIRTUAL_MAX_PAGES) {
+            table.pages.delete(table.pages.keys().next().value);
+        }
+        renderVirtualRows(table);
+    } catch (error) {
+        showError('Loading rows failed: ' + error.message);
+    } finally {
+        table.loading.delete(page);
+    }
+}
+
 async function onChartTypeChange() {
     const chartType = document.getElementById('chartType').value;
     const chartRequirements = document.getElementById('chartRequirements');
@@ -492,22 +724,44 @@ async function createVisualization() {
         const requestBody = {
             chartType: chartType,
             xColumn: finalXColumn,
-            yColumn: finalYColumn
+            yColumn: finalYColumn,
+            // Point charts come back as parallel arrays; renderChart expands them
+            payloadFormat: 'columnar'
         };
 
         // Add optional columns if they exist
         if (finalSizeColumn) requestBody.sizeColumn = finalSizeColumn;
         if (finalStackColumn) requestBody.stackColumn = finalStackColumn;
 
+        // Ask for roughly one point per horizontal pixel on time series
+        if (['line', 'area'].includes(chartType)) {
+            const chartWidth = document.getElementById('chartCard').clientWidth;
+            if (chartWidth > 0) requestBody.targetPoints = chartWidth;
+        }
+
+        const requestKey = JSON.stringify(requestBody);
+        const cached = chartResponseCache.get(requestKey);
+        const headers = {
+            'Content-Type': 'application/json'
+        };
+        if (cached) headers['If-None-Match'] = cached.etag;
+
         const response = await fetch('/visualize', {
             method: 'POST',
-            headers: {
-                'Content-Type': 'application/json'
-            },
-            body: JSON.stringify(requestBody)
+            headers: headers,
+            body: requestKey
         });
 
-        const data = await response.json();
+        let data;
+        if (response.status === 304 && cached) {
+            // Server confirmed our copy is current; reuse it without re-downloading
+            data = JSON.parse(cached.body);
+        } else {
+            const body = await response.text();
+            data = JSON.parse(body);
+            const etag = response.headers.get('ETag');
+            if (etag && data.success) chartResponseCache.set(requestKey, { etag: etag, body: body });
+        }
 
         if (data.success && data.chart_config) {
             renderChart(data.chart_config);
@@ -531,6 +785,24 @@ async function createVisualization() {
     }
 }
 
+function expandPointColumns(config) {
+    // Zip {x: [...], y: [...], r: [...]} columns into the point objects Chart.js expects
+    config.data.datasets.forEach(dataset => {
+        const columns = dataset.pointColumns;
+        if (!columns) return;
+        const keys = Object.keys(columns);
+        const length = keys.length ? columns[keys[0]].length : 0;
+        const points = new Array(length);
+        for (let i = 0; i < length; i++) {
+            const point = {};
+            for (const key of keys) point[key] = columns[key][i];
+            points[i] = point;
+        }
+        dataset.data = points;
+        delete dataset.pointColumns;
+    });
+}
+
 function renderChart(config) {
     const ctx = document.getElementById('myChart').getContext('2d');
     
@@ -538,6 +810,7 @@ function renderChart(config) {
         myChart.destroy();
     }
 
+    expandPointColumns(config);
     applyThemeToChart(config);
     myChart = new Chart(ctx, config);
 }
@@ -590,6 +863,14 @@ function showLoading(show) {
     if (overlay) {
         overlay.style.display = show ? 'flex' : 'none';
     }
+    if (!show) setLoadingText('Processing your data...');
+}
+
+function setLoadingText(text) {
+    const loadingText = document.getElementById('loadingText');
+    if (loadingText) {
+        loadingText.textContent = text;
+    }
 }
 
 function showError(message) {
@@ -0,0 +1,255 @@
+import numpy as np
+import pandas as pd
+from chart_logic import get_column_type, CATEGORICAL_DTYPES
+from sketches import KLLSketch, HyperLogLog, SpaceSavingSketch
+from columnar_store import write_columnar_chunks, arrow_schema, HAS_PYARROW
+from dtype_optimizer import MemoryUsage
+from type_inference import infer_types, apply_inferred_types, annotate_profile, parsed_count, MIN_PARSED_SHARE
+
+DESCRIBE_INDEX = ['count', 'mean', 'std', 'min', '25%', '50%', '75%', 'max']
+TOP_VALUES = 10
+
+
+class RunningStats:
+    """One-pass count/mean/variance/min/max that can be merged across chunks"""
+
+    def __init__(self):
+        self.count = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.min = np.nan
+        self.max = np.nan
+
+    def update(self, values):
+        values = np.asarray(values, dtype=float)
+        values = values[~np.isnan(values)]
+        if not values.size:
+            return
+        chunk = RunningStats()
+        chunk.count = values.size
+        chunk.mean = float(values.mean())
+        chunk.m2 = float(((values - chunk.mean) ** 2).sum())
+        chunk.min = float(values.min())
+        chunk.max = float(values.max())
+        self.merge(chunk)
+
+    def merge(self, other):
+        # Chan et al. pairwise combination of Welford accumulators
+        if not other.count:
+            return self
+        if not self.count:
+            self.count, self.mean, self.m2 = other.count, other.mean, other.m2
+            self.min, self.max = other.min, other.max
+            return self
+        total = self.count + other.count
+        delta = other.mean - self.mean
+        self.mean += delta * other.count / total
+        self.m2 += other.m2 + delta ** 2 * self.count * other.count / total
+        self.count = total
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+        return self
+
+    def variance(self, ddof=1):
+        if self.count <= ddof:
+            return np.nan
+        return self.m2 / (self.count - ddof)
+
+    def std(self, ddof=1):
+        return float(np.sqrt(self.variance(ddof)))
+
+
+def _value_text(value):
+    # A value parsed from CSV text, written back the way the file had it (1 rather than 1.0)
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return str(value)
+
+
+class ColumnAccumulator:
+    """Everything the profile needs from one column, gathered in a single pass
+
+    Nulls and an approximate distinct count for every column, moments (and a
+    quantile sketch) for numeric ones, and the most frequent values for text.
+    Numeric chunks only feed the top values when count_numbers is set, for
+    streamed columns that a later text chunk can still turn into text.
+    """
+
+    def __init__(self, sketch_k=200, quantile_sketch=True, top_k_capacity=64, count_numbers=False):
+        self.count_numbers = count_numbers
+        self.nulls = 0
+        self.kinds = set()
+        self.datetime_dtype = None
+        self.stats = RunningStats()
+        self.sketch = KLLSketch(k=sketch_k, seed=0) if quantile_sketch else None
+        self.distinct = HyperLogLog()
+        self.top_values = SpaceSavingSketch(capacity=top_k_capacity)
+
+    def update(self, series):
+        self.nulls += int(series.isna().sum())
+        self.kinds.add(series.dtype.kind)
+        if series.dtype.kind == 'M':
+            self.datetime_dtype = str(series.dtype)
+        self.distinct.update(series)
+        numeric = pd.api.types.is_numeric_dtype(series) and not pd.api.types.is_bool_dtype(series)
+        if numeric:
+            values = series.to_numpy(dtype=float, na_value=np.nan)
+            self.stats.update(values)
+            if self.sketch is not None:
+                self.sketch.update(values)
+        if (self.count_numbers or not numeric) and not pd.api.types.is_datetime64_any_dtype(series):
+            # Chunks of a text column can still parse as numbers or booleans, so their
+            # values are counted as text too, under the same keys as in text chunks
+            key = None if series.dtype.kind == 'O' or pd.api.types.is_string_dtype(series) else _value_text
+            self.top_values.update(series, key)
+
+    def merge(self, other):
+        self.nulls += other.nulls
+        self.kinds |= other.kinds
+        self.datetime_dtype = self.datetime_dtype or other.datetime_dtype
+        self.stats.merge(other.stats)
+        if self.sketch is not None and other.sketch is not None:
+            self.sketch.merge(other.sketch)
+        self.distinct.merge(other.distinct)
+        self.top_values.merge(other.top_values)
+        return self
+
+    def column_profile(self, name, dtype, col_type):
+        numeric = col_type == 'numeric' and self.stats.count
+        info = {
+            'name': name,
+            'dtype': dtype,
+            'type': col_type,
+            'null_count': self.nulls,
+            'cardinality': self.distinct.count(),
+            'min': self.stats.min if numeric else None,
+            'max': self.stats.max if numeric else None
+        }
+        if col_type == 'categorical':
+            info['top_values'] = [{'value': str(value), 'count': int(count), 'error': int(error)}
+                                  for value, count, error in self.top_values.top(TOP_VALUES)]
+        return info
+
+    def final_dtype(self):
+        # Chunks can disagree (ints in one, floats or text in another), so settle on
+        # the dtype read_csv would have picked for the whole file
+        if self.kinds and self.kinds <= {'i', 'u'}:
+            return 'float64' if self.nulls else 'int64'
+        if self.kinds and self.kinds <= {'i', 'u', 'f'}:
+            return 'float64'
+        if self.kinds == {'b'}:
+            # Only inferred boolean columns reach here with gaps; they use the nullable dtype
+            return 'boolean' if self.nulls else 'bool'
+        if self.kinds == {'M'}:
+            return self.datetime_dtype
+        return 'object'
+
+
+def iter_csv_chunks(source, chunksize, dtype=None):
+    return pd.read_csv(source, chunksize=chunksize, dtype=dtype)
+
+
+def stream_profile_csv(filepath, chunksize=100_000, on_chunk=None, infer=True):
+    """Profile a CSV one chunk at a time, in the same format as build_profile
+
+    Unless infer is off, column types are inferred from the first chunk and
+    every chunk is converted with them before it is profiled. Inferred
+    columns are profiled as text too, and a conversion that leaves more
+    than a small share of the whole column unparsed is dropped in favour of
+    the text profile, as convert_frame does for frames in memory.
+    """
+    accumulators = {}
+    text_accumulators = {}
+    columns = None
+    inferred = {}
+    parsed = {}
+    non_null = {}
+    n_rows = 0
+
+    with open(filepath, 'rb') as f:
+        for chunk in iter_csv_chunks(f, chunksize):
+            if columns is None:
+                columns = chunk.columns.tolist()
+                inferred = infer_types(chunk) if infer else {}
+                converting = [col for col, info in inferred.items() if info['kind'] != 'id']
+                # A column read as numbers so far may still meet text in a later chunk;
+                # converted columns fall back to their text profile instead
+                accumulators = {col: ColumnAccumulator(count_numbers=col not in converting) for col in columns}
+                text_accumulators = {col: ColumnAccumulator(count_numbers=True) for col in converting}
+                parsed = dict.fromkeys(converting, 0)
+                non_null = dict.fromkeys(converting, 0)
+            converted = apply_inferred_types(chunk, inferred)
+            for col in text_accumulators:
+                text_accumulators[col].update(chunk[col])
+                parsed[col] += parsed_count(converted[col], inferred[col])
+                non_null[col] += int(chunk[col].notna().sum())
+            for col in columns:
+                accumulators[col].update(converted[col])
+            n_rows += len(chunk)
+            if on_chunk:
+                on_chunk(n_rows, f.tell())
+
+    columns = columns or []
+    for col in text_accumulators:
+        if non_null[col] and parsed[col] / non_null[col] < MIN_PARSED_SHARE:
+            # The first chunk's type doesn't hold for the rest of the file; keep the column as text
+            del inferred[col]
+            accumulators[col] = text_accumulators[col]
+    dtypes = {col: accumulators[col].final_dtype() for col in columns}
+    # An empty frame with the settled dtypes classifies columns exactly like a full load
+    schema_df = pd.DataFrame({col: pd.Series(dtype=dtypes[col]) for col in columns})
+    numeric_columns = schema_df.select_dtypes(include=[np.number]).columns.tolist()
+
+    column_profiles = [accumulators[col].column_profile(col, dtypes[col], get_column_type(schema_df, col))
+                       for col in columns]
+
+    describe = {}
+    if numeric_columns:
+        values = []
+        for col in numeric_columns:
+            stats = accumulators[col].stats
+            q1, median, q3 = accumulators[col].sketch.quantiles([0.25, 0.5, 0.75])
+            values.append([stats.count, stats.mean, stats.std(), stats.min, q1, median, q3, stats.max])
+        describe = {
+            'index': DESCRIBE_INDEX,
+            'columns': numeric_columns,
+            'values': [[None if pd.isna(v) else float(v) for v in row] for row in zip(*values)]
+        }
+
+    profile = {
+        'shape': [n_rows, len(columns)],
+        'columns': column_profiles,
+        'numeric_columns': numeric_columns,
+        'categorical_columns': schema_df.select_dtypes(include=CATEGORICAL_DTYPES).columns.tolist(),
+        'describe': describe,
+        'ingest': 'streaming'
+    }
+    return annotate_profile(profile, inferred)
+
+
+def get_csv_dtypes(profile):
+    # Inferred columns are read as text and converted after, so no chunk parses them differently
+    inferred = profile.get('inferred_types', {})
+    return {col['name']: 'object' if col['name'] in inferred else col['dtype'] for col in profile['columns']}
+
+
+def ingest_csv_streaming(filepath, chunksize=100_000, on_chunk=None, infer=True):
+    # First pass settles dtypes and statistics; the second writes the columnar
+    # copy with those dtypes so every chunk shares one schema, measuring each
+    # chunk's memory on the way for the profile's memory report
+    profile = stream_profile_csv(filepath, chunksize, on_chunk, infer)
+    inferred = profile['inferred_types']
+    usage = MemoryUsage()
+
+    def chunks():
+        for chunk in iter_csv_chunks(filepath, chunksize, get_csv_dtypes(profile)):
+            chunk = apply_inferred_types(chunk, inferred)
+            usage.update(chunk)
+            yield chunk
+
+    # Every chunk is written with the settled types, so columns empty in the first chunk still fit the rest
+    schema = arrow_schema({col['name']: col['dtype'] for col in profile['columns']}) if HAS_PYARROW else None
+    if write_columnar_chunks(chunks(), filepath, schema) is not None:
+        # Only a complete pass measures the whole file
+        profile['memory_report'] = usage.report()
+    return profile
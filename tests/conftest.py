@@ -0,0 +1,38 @@
+import io
+import os
+import sys
+import time
+
+import pytest
+
+# Modules live at the repository root rather than in a package
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+@pytest.fixture(scope='session')
+def app_module(tmp_path_factory):
+    # The app keeps uploads in ./uploads, so it runs from a scratch directory
+    previous = os.getcwd()
+    os.chdir(tmp_path_factory.mktemp('app'))
+    import app
+    yield app
+    os.chdir(previous)
+
+
+@pytest.fixture
+def client(app_module):
+    return app_module.app.test_client()
+
+
+def upload_frame(client, df, filename='data.csv'):
+    """Upload df as a CSV and wait for its ingest to finish"""
+    data = {'file': (io.BytesIO(df.to_csv(index=False).encode()), filename)}
+    body = client.post('/upload', data=data, content_type='multipart/form-data').get_json()
+    if 'job_id' in body:
+        while True:
+            status = client.get(f"/upload-status/{body['job_id']}").get_json()
+            if status['status'] in ('done', 'failed'):
+                break
+            time.sleep(0.02)
+        assert status['status'] == 'done', status
+    return body
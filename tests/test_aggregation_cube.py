@@ -0,0 +1,85 @@
+import numpy as np
+import pandas as pd
+
+from aggregation_cube import ROWS, AggregationCube, build_cell, cube_grouping
+from conftest import upload_frame
+from dataset_cache import frame_nbytes
+from eda_functions import create_chart_with_api
+
+
+def make_frame(rows=2000):
+    rng = np.random.default_rng(0)
+    df = pd.DataFrame({
+        'region': rng.choice(['north', 'south', 'east', 'west'], rows),
+        'segment': rng.choice(['retail', 'online'], rows),
+        'sales': rng.normal(100, 20, rows),
+        'units': rng.integers(1, 10, rows)
+    })
+    df.loc[::11, 'sales'] = np.nan
+    return df
+
+
+def test_cell_matches_groupby():
+    df = make_frame()
+
+    cell = build_cell(df, ('region', 'segment'), ['sales', 'units'])
+
+    grouped = df.groupby(['region', 'segment'])
+    assert cell.index.equals(grouped.size().index)
+    for column in ('sales', 'units'):
+        for stat in ('count', 'sum', 'mean', 'min', 'max'):
+            assert np.allclose(cell[(column, stat)], grouped[column].agg(stat))
+        assert np.allclose(cell[(column, 'sumsq')], (df[column] ** 2).groupby([df['region'], df['segment']]).sum())
+    assert cell[ROWS].tolist() == grouped.size().tolist()
+
+
+def test_grouping_needs_categorical_keys_within_the_group_limit():
+    info = {
+        'region': {'type': 'categorical', 'cardinality': 4},
+        'segment': {'type': 'categorical', 'cardinality': 2},
+        'sales': {'type': 'numeric', 'cardinality': 1800}
+    }
+
+    assert cube_grouping('bar', 'region', 'sales', None, info, 100) == ('region',)
+    assert cube_grouping('stacked_bar', 'region', 'sales', 'segment', info, 100) == ('region', 'segment')
+    assert cube_grouping('heatmap', 'region', 'segment', None, info, 100) == ('region', 'segment')
+    assert cube_grouping('stacked_bar', 'region', 'sales', 'segment', info, 5) is None
+    assert cube_grouping('bar', 'sales', 'region', None, info, 100) is None
+    assert cube_grouping('scatter', 'region', 'sales', None, info, 100) is None
+
+
+def test_cells_are_built_once_and_evicted_by_bytes():
+    df = make_frame()
+    builds = []
+
+    def build(keys):
+        builds.append(keys)
+        return build_cell(df, keys, ['sales'])
+
+    cube = AggregationCube(max_bytes=int(frame_nbytes(build_cell(df, ('region',), ['sales'])) * 1.5))
+    cube.get(('data', ('region',)), lambda: build(('region',)))
+    cube.get(('data', ('region',)), lambda: build(('region',)))
+    cube.get(('data', ('segment',)), lambda: build(('segment',)))
+
+    assert builds == [('region',), ('segment',)]
+    stats = cube.stats()
+    assert (stats['hits'], stats['misses'], stats['evictions'], stats['entries']) == (1, 2, 1, 1)
+
+
+def test_charts_from_the_cube_match_direct_aggregation(client, app_module):
+    df = make_frame()
+    upload_frame(client, df)
+    app_module.aggregation_cube.clear()
+    before = app_module.aggregation_cube.stats()
+
+    for y_column in ('sales', 'units'):
+        chart = client.post('/visualize', json={'chartType': 'bar', 'xColumn': 'region',
+                                                'yColumn': y_column}).get_json()['chart_config']
+        expected = create_chart_with_api(df, 'bar', 'region', y_column)
+        assert chart['data']['labels'] == expected['data']['labels']
+        assert np.allclose(chart['data']['datasets'][0]['data'], expected['data']['datasets'][0]['data'])
+
+    after = app_module.aggregation_cube.stats()
+    # Both value columns come from the one region cell
+    assert after['misses'] == before['misses'] + 1
+    assert after['hits'] == before['hits'] + 1
@@ -0,0 +1,72 @@
+import pandas as pd
+
+from chart_cache import ChartResultCache, chart_cache_key
+from conftest import upload_frame
+
+BAR = {'chartType': 'bar', 'xColumn': 'region', 'yColumn': 'sales'}
+
+
+def make_frame(scale=1):
+    return pd.DataFrame({
+        'region': ['north', 'south', 'east', 'west'] * 25,
+        'sales': [scale * value for value in range(100)]
+    })
+
+
+def test_repeat_request_is_answered_with_304(client, app_module):
+    upload_frame(client, make_frame())
+    stats = app_module.chart_cache.stats()
+
+    first = client.post('/visualize', json=BAR)
+    assert first.status_code == 200
+    etag = first.headers['ETag']
+
+    again = client.post('/visualize', json=BAR, headers={'If-None-Match': etag})
+    assert again.status_code == 304
+    assert again.headers['ETag'] == etag
+    assert again.data == b''
+
+    cached = client.post('/visualize', json=BAR)
+    assert cached.data == first.data
+
+    after = app_module.chart_cache.stats()
+    assert after['not_modified'] == stats['not_modified'] + 1
+    assert after['hits'] == stats['hits'] + 1
+
+
+def test_etag_changes_with_request_and_data(client):
+    upload_frame(client, make_frame())
+    etag = client.post('/visualize', json=BAR).headers['ETag']
+
+    line = client.post('/visualize', json={**BAR, 'chartType': 'line'}, headers={'If-None-Match': etag})
+    assert line.status_code == 200
+    assert line.headers['ETag'] != etag
+
+    upload_frame(client, make_frame(scale=2))
+    changed = client.post('/visualize', json=BAR, headers={'If-None-Match': etag})
+    assert changed.status_code == 200
+    assert changed.headers['ETag'] != etag
+
+
+def test_key_depends_on_every_input():
+    key = chart_cache_key('abc', 'bar', ['x', 'y'], {'bins': 10})
+
+    assert key == chart_cache_key('abc', 'bar', ['x', 'y'], {'bins': 10})
+    assert key != chart_cache_key('abd', 'bar', ['x', 'y'], {'bins': 10})
+    assert key != chart_cache_key('abc', 'line', ['x', 'y'], {'bins': 10})
+    assert key != chart_cache_key('abc', 'bar', ['y', 'x'], {'bins': 10})
+    assert key != chart_cache_key('abc', 'bar', ['x', 'y'], {'bins': 20})
+
+
+def test_cache_evicts_oldest_bodies_beyond_budget():
+    cache = ChartResultCache(max_bytes=250)
+
+    for key in ('a', 'b', 'c'):
+        cache.put(key, b'x' * 100)
+    cache.put('huge', b'x' * 300)
+
+    assert cache.get('a') is None
+    assert cache.get('c') == b'x' * 100
+    assert cache.get('huge') is None
+    stats = cache.stats()
+    assert (stats['entries'], stats['current_bytes'], stats['evictions']) == (2, 200, 1)
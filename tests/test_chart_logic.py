@@ -0,0 +1,28 @@
+import pandas as pd
+
+from chart_logic import get_column_type, get_compatible_columns
+from dataset_profile import build_profile
+from eda_functions import create_chart_with_api
+from type_inference import convert_frame
+
+
+def test_inferred_flags_are_categorical():
+    df, _ = convert_frame(pd.DataFrame({
+        'active': ['yes', 'no', 'yes', 'yes'] * 50,
+        'amount': [1.5, 2.0, 3.5, 4.0] * 50,
+    }))
+    assert df['active'].dtype == bool
+
+    assert get_column_type(df, 'active') == 'categorical'
+    assert get_compatible_columns(df, 'bar')['x_columns'] == ['active']
+    assert 'active' not in get_compatible_columns(df, 'histogram')['x_columns']
+
+    profile = build_profile(df)
+    assert profile['categorical_columns'] == ['active']
+    assert profile['numeric_columns'] == ['amount']
+    assert profile['columns'][0]['type'] == 'categorical'
+    assert profile['columns'][0]['top_values'][0] == {'value': 'True', 'count': 150, 'error': 0}
+
+    chart = create_chart_with_api(df, 'bar', 'active', 'amount')
+    assert chart['data']['labels'] == [True, False]
+    assert chart['data']['datasets'][0]['data'] == [3.0, 2.0]
@@ -0,0 +1,78 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+import correlation
+from conftest import upload_frame
+from correlation import correlation_matrix, top_pairs
+
+
+@pytest.fixture
+def frame():
+    rng = np.random.default_rng(0)
+    n = 2000
+    base = rng.normal(size=n)
+    df = pd.DataFrame({
+        'a': base + rng.normal(scale=0.5, size=n),
+        'b': -base + rng.normal(scale=0.8, size=n),
+        'c': rng.normal(size=n),
+        'd': rng.integers(0, 5, n).astype(float),
+        'e': np.exp(base),
+        'f': rng.normal(size=n),
+    })
+    for column in ('a', 'c', 'd', 'e'):
+        df.loc[rng.random(n) < 0.2, column] = np.nan
+    # Two columns with the same gaps are ranked together
+    df.loc[df['a'].isna(), 'f'] = np.nan
+    return df
+
+
+@pytest.mark.parametrize('method', ['pearson', 'spearman'])
+def test_matches_pandas_with_missing_values(frame, method, monkeypatch):
+    # Small blocks so several block pairs are combined
+    monkeypatch.setattr(correlation, 'MAX_BLOCK_COLUMNS', 2)
+
+    result = correlation_matrix(frame, method)
+
+    expected = frame.corr(method)
+    assert np.allclose(result.to_numpy(), expected.to_numpy(), atol=1e-10, equal_nan=True)
+
+
+def test_constant_and_empty_columns_have_no_correlation():
+    df = pd.DataFrame({'x': [1.0, 2.0, 3.0, 4.0], 'constant': 1.0, 'empty': np.nan})
+
+    for method in ('pearson', 'spearman'):
+        result = correlation_matrix(df, method)
+        assert result.loc['x', 'x'] == 1.0
+        assert np.isnan(result.loc['x', 'constant'])
+        assert np.isnan(result.loc['x', 'empty'])
+
+
+def test_top_pairs_ranks_by_absolute_correlation(frame):
+    expected = frame.corr().where(np.triu(np.ones((6, 6), dtype=bool), k=1)).stack()
+    expected = expected.reindex(expected.abs().sort_values(ascending=False).index)[:3]
+
+    pairs = top_pairs(correlation_matrix(frame), n=3)
+
+    assert [(pair['x'], pair['y']) for pair in pairs] == expected.index.tolist()
+    assert np.allclose([pair['correlation'] for pair in pairs], expected.to_numpy())
+
+
+def test_route_serves_wide_frames_from_the_cache(client, app_module, monkeypatch):
+    monkeypatch.setattr(correlation, 'MAX_BLOCK_COLUMNS', 4)
+    rng = np.random.default_rng(1)
+    df = pd.DataFrame(rng.normal(size=(500, 12)), columns=[f'c{i}' for i in range(12)])
+    df['c1'] += df['c0']
+    df.loc[rng.random(500) < 0.1, 'c3'] = np.nan
+    upload_frame(client, df)
+    stats = app_module.correlation_cache.stats()
+
+    for _ in range(2):
+        body = client.post('/correlations', json={'method': 'spearman', 'topN': 1}).get_json()
+        matrix = np.array(body['matrix'], dtype=float)
+        assert np.allclose(matrix, df.corr('spearman').to_numpy(), atol=1e-10)
+        assert (body['top_pairs'][0]['x'], body['top_pairs'][0]['y']) == ('c0', 'c1')
+
+    after = app_module.correlation_cache.stats()
+    assert (after['hits'], after['misses']) == (stats['hits'] + 1, stats['misses'] + 1)
+    assert client.post('/correlations', json={'method': 'kendall'}).status_code == 400
@@ -0,0 +1,47 @@
+import pandas as pd
+
+from dataset_cache import DatasetCache, frame_nbytes
+
+
+def write_csv(path, rows):
+    pd.DataFrame({'value': range(rows)}).to_csv(path, index=False)
+    return str(path)
+
+
+def test_peek_counts_hits_and_misses(tmp_path):
+    path = write_csv(tmp_path / 'data.csv', 10)
+    cache = DatasetCache()
+
+    assert cache.peek('data', path) is None
+    cache.get('data', path, pd.read_csv)
+    assert cache.peek('data', path) is not None
+
+    stats = cache.stats()
+    assert (stats['hits'], stats['misses']) == (1, 2)
+    assert stats['hit_rate'] == 1 / 3
+
+
+def test_modified_file_is_reloaded(tmp_path):
+    path = write_csv(tmp_path / 'data.csv', 10)
+    cache = DatasetCache()
+    cache.get('data', path, pd.read_csv)
+
+    write_csv(tmp_path / 'data.csv', 20)
+
+    assert cache.peek('data', path) is None
+    assert len(cache.get('data', path, pd.read_csv)) == 20
+    assert cache.stats()['invalidations'] == 1
+
+
+def test_evicts_least_recently_used_within_budget(tmp_path):
+    paths = [write_csv(tmp_path / f'{name}.csv', 1000) for name in 'abc']
+    removed = []
+    cache = DatasetCache(max_bytes=2 * frame_nbytes(pd.read_csv(paths[0])), on_remove=removed.append)
+
+    cache.get('a', paths[0], pd.read_csv)
+    cache.get('b', paths[1], pd.read_csv)
+    cache.get('a', paths[0], pd.read_csv)
+    cache.get('c', paths[2], pd.read_csv)
+
+    assert removed == ['b']
+    assert cache.stats()['entries'] == 2
@@ -0,0 +1,22 @@
+import pandas as pd
+
+import dataset_profile
+from dataset_profile import build_profile
+
+
+def test_top_values_from_slices_match_exact_counts(monkeypatch):
+    monkeypatch.setattr(dataset_profile, 'PROFILE_SLICE_ROWS', 1000)
+    values = ['a'] * 4000 + ['b'] * 3000 + [f'rare {i}' for i in range(2500)] + ['c'] * 500
+    df = pd.DataFrame({'label': values, 'amount': range(len(values))})
+
+    profile = build_profile(df)
+
+    label, amount = profile['columns']
+    top = label['top_values'][:3]
+    assert [value['value'] for value in top] == ['a', 'b', 'c']
+    # Counts are upper bounds, off by at most their reported error
+    for value, exact in zip(top, (4000, 3000, 500)):
+        assert value['count'] - value['error'] <= exact <= value['count']
+    assert label['null_count'] == 0
+    assert (amount['min'], amount['max']) == (0, len(values) - 1)
+    assert profile['describe']['values'][0][0] == len(values)
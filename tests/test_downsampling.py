@@ -0,0 +1,58 @@
+import numpy as np
+import pandas as pd
+
+from downsampling import downsample_series, lttb_indices, minmax_indices
+
+
+def test_lttb_keeps_endpoints_and_one_point_per_bucket():
+    x = np.arange(1000, dtype=float)
+    y = np.sin(x / 50)
+
+    selected = lttb_indices(x, y, 100)
+
+    assert len(selected) == 100
+    assert selected[0] == 0 and selected[-1] == 999
+    assert np.all(np.diff(selected) > 0)
+
+
+def test_lttb_keeps_a_spike():
+    x = np.arange(1000, dtype=float)
+    y = np.zeros(1000)
+    y[437] = 100
+
+    assert 437 in lttb_indices(x, y, 50)
+
+
+def test_minmax_keeps_every_bucket_extreme():
+    rng = np.random.default_rng(0)
+    x = np.arange(1000, dtype=float)
+    y = rng.normal(size=1000)
+
+    selected = minmax_indices(x, y, 100)
+
+    assert len(selected) <= 100
+    assert np.all(np.diff(selected) > 0)
+    assert y.argmin() in selected and y.argmax() in selected
+    for bucket in np.array_split(np.arange(1000), 50):
+        assert y[bucket].argmin() + bucket[0] in selected
+
+
+def test_downsample_series_sorts_by_x_and_drops_missing():
+    rng = np.random.default_rng(1)
+    x = pd.Series(rng.permutation(500).astype(float))
+    y = pd.Series(rng.normal(size=500))
+    x[3] = np.nan
+    y[10] = np.nan
+
+    for mode in ('lttb', 'minmax'):
+        positions = downsample_series(x, y, 60, mode)
+        assert 0 < len(positions) <= 60
+        assert x.iloc[positions].is_monotonic_increasing
+        assert not x.iloc[positions].isna().any() and not y.iloc[positions].isna().any()
+
+
+def test_short_series_is_returned_whole():
+    x = pd.Series([3.0, 1.0, 2.0])
+    y = pd.Series([1.0, 2.0, 3.0])
+
+    assert downsample_series(x, y, 10).tolist() == [1, 2, 0]
@@ -0,0 +1,44 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from batch_charts import compute_group_aggregates
+from dtype_optimizer import optimize_dtypes
+from eda_functions import create_chart_with_api
+
+
+@pytest.fixture
+def frame():
+    rng = np.random.default_rng(0)
+    n = 200_000
+    return pd.DataFrame({
+        'region': rng.choice(['north', 'south', 'east', 'west'], n),
+        'segment': rng.choice(['retail', 'online'], n),
+        # Quarters are exact in float32, so a float32 copy would pass any round-trip check
+        'price': rng.integers(0, 40_000, n) / 4,
+        'qty': rng.integers(0, 100, n),
+    })
+
+
+@pytest.mark.parametrize('chart_type, x_column, y_column, stack_column', [
+    ('bar', 'region', 'price', None),
+    ('pie', 'region', 'price', None),
+    ('stacked_bar', 'region', 'price', 'segment'),
+    ('bar', 'qty', 'price', None),
+    ('histogram', 'price', None, None),
+])
+def test_compacted_frame_draws_the_same_charts(frame, chart_type, x_column, y_column, stack_column):
+    compacted, _ = optimize_dtypes(frame)
+    assert compacted.memory_usage(deep=True).sum() < frame.memory_usage(deep=True).sum()
+
+    expected = create_chart_with_api(frame, chart_type, x_column, y_column, stack_column=stack_column)
+    assert create_chart_with_api(compacted, chart_type, x_column, y_column, stack_column=stack_column) == expected
+
+
+def test_compacted_frame_gives_the_same_group_aggregates(frame):
+    compacted, _ = optimize_dtypes(frame)
+    plan = {'region': ['price', 'qty']}
+
+    expected = compute_group_aggregates(frame, plan)['region']
+    actual = compute_group_aggregates(compacted, plan)['region']
+    assert actual.to_dict() == expected.to_dict()
@@ -0,0 +1,58 @@
+import numpy as np
+import pandas as pd
+
+from grouped_quantiles import grouped_box_stats
+
+
+def make_frame(rows=20_000):
+    rng = np.random.default_rng(0)
+    df = pd.DataFrame({
+        'value': rng.lognormal(0, 1, rows),
+        'group': rng.choice(['a', 'b', 'c', 'd'], rows)
+    })
+    df.loc[::97, 'value'] = np.nan
+    return df
+
+
+def test_exact_quartiles_match_pandas():
+    df = make_frame()
+
+    stats = grouped_box_stats(df['value'], df['group'])
+
+    expected = df.groupby('group')['value'].quantile([0.25, 0.5, 0.75]).unstack()
+    assert [s['group'] for s in stats] == ['a', 'b', 'c', 'd']
+    for s in stats:
+        group = df.loc[df['group'] == s['group'], 'value'].dropna()
+        assert s['count'] == len(group)
+        assert np.allclose([s['q1'], s['median'], s['q3']], expected.loc[s['group']])
+        upper = s['q3'] + 1.5 * s['iqr']
+        lower = s['q1'] - 1.5 * s['iqr']
+        assert s['whisker_high'] == group[group <= upper].max()
+        assert s['whisker_low'] == group[group >= lower].min()
+        assert s['outliers'] == ((group > upper) | (group < lower)).sum()
+
+
+def test_sketched_quartiles_are_close_to_pandas():
+    df = make_frame()
+
+    stats = grouped_box_stats(df['value'], df['group'], exact_threshold=1000)
+
+    expected = df.groupby('group')['value'].quantile([0.25, 0.5, 0.75]).unstack()
+    for s in stats:
+        group = df.loc[df['group'] == s['group'], 'value'].dropna()
+        # Compare by rank, which is what the sketch bounds
+        for q, value in zip((0.25, 0.5, 0.75), (s['q1'], s['median'], s['q3'])):
+            assert abs((group <= value).mean() - q) < 0.02
+        assert s['min'] == group.min() and s['max'] == group.max()
+
+
+def test_ungrouped_stats_cover_every_value():
+    values = pd.Series([1.0, 2.0, 3.0, 4.0, 100.0, None])
+
+    [stats] = grouped_box_stats(values)
+
+    assert stats['group'] == 'All'
+    assert stats['count'] == 5
+    assert stats['median'] == 3.0
+    assert stats['outliers'] == 1
+    assert stats['whisker_high'] == 4.0
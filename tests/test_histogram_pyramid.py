@@ -0,0 +1,30 @@
+import numpy as np
+
+from histogram_pyramid import HistogramPyramid
+
+
+def test_default_range_counts_and_means_are_exact():
+    rng = np.random.default_rng(0)
+    x = rng.lognormal(3, 1, 100_000)
+    y = x * 0.5 + rng.normal(0, 1, len(x))
+    pyramid = HistogramPyramid.from_values(x, y)
+
+    counts, sums, edges = pyramid.aggregate(20)
+
+    expected, _ = np.histogram(x, edges)
+    assert counts.sum() == len(x)
+    assert np.array_equal(counts, expected)
+    bins = np.minimum(np.searchsorted(edges, x, side='right') - 1, 19)
+    filled = counts > 0
+    means = np.bincount(bins, weights=y, minlength=20)[filled] / counts[filled]
+    assert np.allclose(sums[filled] / counts[filled], means)
+
+
+def test_estimated_counts_are_left_unrounded():
+    x = np.arange(1000) + 0.5
+    pyramid = HistogramPyramid.from_values(x)
+
+    assert not pyramid.is_exact(100.3, 500.3)
+    counts, _, _ = pyramid.aggregate(10, 100.3, 500.3)
+    assert counts.dtype == float
+    assert abs(counts.sum() - 400) < 1
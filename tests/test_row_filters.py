@@ -0,0 +1,118 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from conftest import upload_frame
+from row_filters import (FilterCache, FilterError, ValueIndex, evaluate_filter, filter_columns, parse_filter,
+                         predicate_mask)
+
+
+def make_frame(rows=1000):
+    rng = np.random.default_rng(0)
+    df = pd.DataFrame({
+        'amount': rng.normal(100, 30, rows),
+        'region': rng.choice(['north', 'south', 'east', 'west'], rows),
+        'code': rng.integers(0, 20, rows)
+    })
+    df.loc[::13, 'amount'] = np.nan
+    df.loc[::17, 'region'] = None
+    return df
+
+
+def apply(df, expr):
+    parsed = parse_filter(expr)
+    return evaluate_filter(parsed, lambda leaf: predicate_mask(df[leaf[1]], leaf))
+
+
+def test_equivalent_expressions_share_a_canonical_form():
+    high = {'column': 'amount', 'op': 'range', 'min': 100}
+    north = {'column': 'region', 'op': 'in', 'values': ['south', 'north', 'north']}
+
+    assert parse_filter([high, north]) == parse_filter({'all': [north, high, high]})
+    assert parse_filter({'any': [high]}) == parse_filter(high)
+    assert parse_filter(north) == parse_filter({'column': 'region', 'op': 'in', 'values': ['north', 'south']})
+    assert parse_filter(None) is None and parse_filter([]) is None and parse_filter({'all': []}) is None
+    assert filter_columns(parse_filter({'not': [high, north]})) == {'amount', 'region'}
+
+
+@pytest.mark.parametrize('expr', [
+    'amount > 3',
+    {'op': 'range', 'min': 1},
+    {'column': 'amount', 'op': 'between', 'min': 1},
+    {'column': 'amount', 'op': 'range'},
+    {'column': 'region', 'op': 'in', 'values': 'north'},
+    {'column': 'region', 'op': 'in', 'values': [['north']]},
+    {'all': {'column': 'amount', 'op': 'not_null'}},
+])
+def test_invalid_expressions_are_rejected(expr):
+    with pytest.raises(FilterError):
+        parse_filter(expr)
+
+
+def test_masks_match_pandas():
+    df = make_frame()
+    amount, region = df['amount'], df['region']
+
+    assert np.array_equal(apply(df, {'column': 'amount', 'op': 'range', 'min': 90, 'max': 110}),
+                          amount.between(90, 110))
+    assert np.array_equal(apply(df, {'column': 'region', 'op': 'not_in', 'values': ['north']}),
+                          region.notna() & (region != 'north'))
+    assert np.array_equal(apply(df, {'column': 'region', 'op': 'is_null'}), region.isna())
+    assert np.array_equal(
+        apply(df, {'any': [{'column': 'amount', 'op': 'range', 'max': 50},
+                           {'not': {'column': 'region', 'op': 'in', 'values': ['east', 'west']}}]}),
+        (amount <= 50) | ~region.isin(['east', 'west']))
+
+
+def test_value_index_matches_a_scan():
+    df = make_frame()
+    # Values come back from the client as text, so "7" matches the integer 7
+    for column, values, expected in (('region', ['north', 'west', 'missing'], ['north', 'west']),
+                                     ('code', [3, '7', 40], [3, 7])):
+        index = ValueIndex(df[column])
+        matches = df[column].isin(expected).to_numpy()
+        leaf = parse_filter({'column': column, 'op': 'in', 'values': values})
+        assert np.array_equal(predicate_mask(df[column], leaf, index), matches)
+        leaf = parse_filter({'column': column, 'op': 'not_in', 'values': values})
+        assert np.array_equal(predicate_mask(df[column], leaf, index), ~matches & df[column].notna().to_numpy())
+
+
+def test_cache_reuses_masks_and_evicts_by_bytes():
+    cache = FilterCache(max_bytes=2500)
+    calls = []
+
+    def compute(key):
+        calls.append(key)
+        return np.ones(1000, dtype=bool)
+
+    for key in ('a', 'b', 'a', 'c'):
+        mask = cache.get(key, lambda: compute(key))
+    assert not mask.flags.writeable
+
+    assert calls == ['a', 'b', 'c']
+    stats = cache.stats()
+    assert (stats['hits'], stats['misses'], stats['evictions']) == (1, 3, 1)
+    assert stats['current_bytes'] == 2000
+    cache.get('b', lambda: compute('b'))
+    assert calls[-1] == 'b'
+
+
+def test_refined_filter_reuses_cached_masks(client, app_module):
+    df = make_frame()
+    upload_frame(client, df)
+    high = {'column': 'amount', 'op': 'range', 'min': 100}
+    north = {'column': 'region', 'op': 'in', 'values': ['north']}
+
+    first = client.post('/rows', json={'filters': [high], 'limit': 5}).get_json()
+    assert first['total_rows'] == (df['amount'] >= 100).sum()
+
+    stats = app_module.filter_cache.stats()
+    refined = client.post('/rows', json={'filters': [high, north], 'limit': 5}).get_json()
+    assert refined['total_rows'] == ((df['amount'] >= 100) & (df['region'] == 'north')).sum()
+    after = app_module.filter_cache.stats()
+    # The range mask is reused; only the new condition (and its value index) is computed
+    assert after['hits'] == stats['hits'] + 1
+    assert after['misses'] == stats['misses'] + 2
+
+    bad = client.post('/rows', json={'filters': {'column': 'nope', 'op': 'is_null'}})
+    assert bad.status_code == 400
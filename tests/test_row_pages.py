@@ -0,0 +1,43 @@
+import numpy as np
+import pandas as pd
+
+from conftest import upload_frame
+from row_pages import SortIndexCache, compute_sort_index, page_positions
+
+
+def test_sort_index_puts_missing_values_last():
+    series = pd.Series([3.0, np.nan, 1.0, 2.0, 1.0])
+
+    assert compute_sort_index(series).tolist() == [2, 4, 3, 0, 1]
+    assert compute_sort_index(series, ascending=False).tolist() == [0, 3, 2, 4, 1]
+    assert page_positions(5, 1, 2, compute_sort_index(series)).tolist() == [4, 3]
+
+
+def test_sort_index_cache_stays_within_its_byte_budget():
+    series = pd.Series(np.arange(1000.0))
+    # Room for two 8000-byte orderings
+    cache = SortIndexCache(max_bytes=20_000)
+
+    for key in ('a', 'b', 'c'):
+        cache.get(key, series)
+    cache.get('c', series)
+
+    stats = cache.stats()
+    assert stats['entries'] == 2
+    assert stats['current_bytes'] == 16_000
+    assert stats['evictions'] == 1
+    assert (stats['hits'], stats['misses']) == (1, 3)
+
+    small = SortIndexCache(max_bytes=100)
+    assert len(small.get('big', series)) == 1000
+    assert small.stats()['entries'] == 0
+
+
+def test_rows_rejects_non_numeric_paging(client):
+    upload_frame(client, pd.DataFrame({'value': [3, 1, 2]}))
+
+    response = client.post('/rows', json={'offset': 'ten', 'limit': 10})
+    assert response.status_code == 400
+
+    page = client.post('/rows', json={'offset': 0, 'limit': 2, 'sortColumn': 'value'}).get_json()
+    assert page['total_rows'] == 3
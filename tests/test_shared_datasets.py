@@ -0,0 +1,76 @@
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from shared_datasets import LEASE_SUFFIX, SharedDatasetRegistry
+
+pytest.importorskip('pyarrow')
+from columnar_store import write_columnar
+
+
+@pytest.fixture
+def store(tmp_path):
+    df = pd.DataFrame({'a': np.arange(1000, dtype=float), 'b': ['x', 'y'] * 500})
+    return write_columnar(df, str(tmp_path / 'data.csv'))
+
+
+def test_leases_follow_attached_frames(tmp_path, store):
+    registry = SharedDatasetRegistry(str(tmp_path / 'leases'))
+
+    first = registry.attach('data', store)
+    registry.attach('data', store, ['a'])
+    assert first['a'].sum() == 499500
+    assert registry.refcount('data') == 1
+    assert registry.stats()['attached_frames'] == 2
+
+    registry.release('data')
+    assert registry.refcount('data') == 1
+    registry.release('data')
+    registry.release('data')
+    assert registry.refcount('data') == 0
+    assert registry.stats()['attached'] == 0
+    assert not os.listdir(tmp_path / 'leases')
+
+
+def test_refcount_counts_live_workers_and_drops_dead_ones(tmp_path, store):
+    lease_dir = tmp_path / 'leases'
+    registry = SharedDatasetRegistry(str(lease_dir))
+    registry.attach('data', store)
+    # Another live worker, and one that exited without releasing
+    (lease_dir / f'data.{os.getppid()}{LEASE_SUFFIX}').touch()
+    (lease_dir / f'data.{2 ** 22 + 12345}{LEASE_SUFFIX}').touch()
+
+    assert registry.refcount('data') == 2
+    assert len(os.listdir(lease_dir)) == 2
+
+
+def test_only_arrow_files_are_leased(tmp_path):
+    path = tmp_path / 'data.csv'
+    pd.DataFrame({'a': [1, 2]}).to_csv(path, index=False)
+    registry = SharedDatasetRegistry(str(tmp_path / 'leases'))
+
+    assert registry.attach('data', str(path))['a'].tolist() == [1, 2]
+    assert registry.refcount('data') == 0
+
+
+def test_published_copy_is_resolved_until_unpublished(tmp_path, store):
+    registry = SharedDatasetRegistry(str(tmp_path / 'leases'), str(tmp_path / 'shm'))
+
+    published = registry.publish('data', store)
+    assert published == registry.published_path('data')
+    assert open(published, 'rb').read() == open(store, 'rb').read()
+    assert registry.resolve('data', store) == published
+    assert registry.attach('data', published)['b'].tolist()[:2] == ['x', 'y']
+
+    registry.unpublish('data')
+    assert registry.resolve('data', store) == store
+    assert registry.stats()['publishes'] == 1
+
+
+def test_without_publish_dir_the_store_is_mapped_in_place(tmp_path, store):
+    registry = SharedDatasetRegistry(str(tmp_path / 'leases'))
+
+    assert registry.publish('data', store) == store
+    assert registry.resolve('data', store) == store
@@ -0,0 +1,88 @@
+import os
+import pandas as pd
+import pytest
+
+from dtype_optimizer import memory_report
+from streaming_stats import ColumnAccumulator, ingest_csv_streaming, stream_profile_csv
+
+pa = pytest.importorskip('pyarrow')
+from columnar_store import columnar_path, read_dataset
+
+
+def test_columnar_copy_of_column_empty_in_first_chunk(tmp_path):
+    filepath = tmp_path / 'late.csv'
+    pd.DataFrame({
+        'value': range(300),
+        'note': [None] * 200 + [f'note {i}' for i in range(100)],
+    }).to_csv(filepath, index=False)
+
+    profile = ingest_csv_streaming(str(filepath), chunksize=100)
+
+    assert profile['shape'] == [300, 2]
+    store = columnar_path(str(filepath))
+    assert os.path.exists(store)
+    df = read_dataset(store)
+    assert len(df) == 300
+    assert df['note'].isna().sum() == 200
+    assert df['note'].iloc[-1] == 'note 99'
+    assert df['value'].sum() == sum(range(300))
+
+
+def test_top_values_count_chunks_read_as_numbers(tmp_path):
+    filepath = tmp_path / 'codes.csv'
+    pd.DataFrame({'code': ['1'] * 3000 + ['x'] * 2000}).to_csv(filepath, index=False)
+
+    profile = stream_profile_csv(str(filepath), chunksize=1000, infer=False)
+
+    column = profile['columns'][0]
+    assert column['type'] == 'categorical'
+    assert [(top['value'], top['count']) for top in column['top_values']] == [('1', 3000), ('x', 2000)]
+
+
+def test_inferred_type_dropped_when_later_chunks_do_not_parse(tmp_path):
+    filepath = tmp_path / 'pending.csv'
+    pd.DataFrame({
+        'v': ['$1,000'] * 1000 + ['pending'] * 4000,
+        'when': ['2024-01-02'] * 1000 + ['unknown'] * 4000,
+        'amount': ['$2,500'] * 5000,
+    }).to_csv(filepath, index=False)
+
+    profile = ingest_csv_streaming(str(filepath), chunksize=1000)
+
+    columns = {col['name']: col for col in profile['columns']}
+    assert set(profile['inferred_types']) == {'amount'}
+    assert columns['v']['type'] == 'categorical'
+    assert columns['when']['type'] == 'categorical'
+    assert columns['v']['null_count'] == 0
+    assert [(top['value'], top['count']) for top in columns['v']['top_values']] == [('pending', 4000), ('$1,000', 1000)]
+    df = read_dataset(columnar_path(str(filepath)))
+    assert df['v'].iloc[-1] == 'pending' and df['v'].iloc[0] == '$1,000'
+    assert df['when'].notna().all()
+    assert df['amount'].sum() == 2500 * 5000
+
+
+def test_numeric_chunks_skip_top_values_unless_asked():
+    numbers = pd.Series([1.0, 2.0, 2.0, None])
+
+    accumulator = ColumnAccumulator()
+    accumulator.update(numbers)
+    assert accumulator.top_values.counts == {}
+    assert accumulator.stats.count == 3
+
+    streamed = ColumnAccumulator(count_numbers=True)
+    streamed.update(numbers)
+    assert streamed.top_values.top(1) == [('2', 2, 0)]
+
+
+def test_streamed_ingest_records_memory_report(tmp_path):
+    filepath = tmp_path / 'sales.csv'
+    df = pd.DataFrame({'region': ['north', 'south', 'east'] * 100, 'amount': [1.5, 2.5, 3.5] * 100})
+    df.to_csv(filepath, index=False)
+
+    profile = ingest_csv_streaming(str(filepath), chunksize=70)
+
+    report = profile['memory_report']
+    expected = memory_report(pd.read_csv(filepath))
+    assert [col['column'] for col in report['columns']] == ['region', 'amount']
+    assert report['columns'][1]['before_bytes'] == expected['columns'][1]['before_bytes']
+    assert report['total_before_bytes'] == report['total_after_bytes'] > 0
@@ -0,0 +1,23 @@
+import numpy as np
+import pandas as pd
+
+from type_inference import convert_column, convert_frame, infer_column_type
+
+
+def test_numbers_keep_only_thousands_commas():
+    values = pd.Series(['$1,234.50', '1,234,567', '-$5', ' 42 ', '3,5', '1,234,56', ',5', '12 34', None])
+
+    converted = convert_column(values, {'kind': 'numeric'})
+
+    expected = [1234.5, 1234567.0, -5.0, 42.0, np.nan, np.nan, np.nan, np.nan, np.nan]
+    assert np.array_equal(converted.to_numpy(dtype=float), expected, equal_nan=True)
+
+
+def test_decimal_commas_outside_the_sample_become_missing():
+    df = pd.DataFrame({'amount': ['1,234'] * 5000 + ['3,5'] * 20})
+
+    assert infer_column_type(df['amount']) == {'kind': 'numeric'}
+    converted, inferred = convert_frame(df)
+    assert 'amount' in inferred
+    assert converted['amount'].isna().sum() == 20
+    assert converted['amount'].max() == 1234
@@ -0,0 +1,106 @@
+import io
+import os
+import glob
+import time
+
+import pandas as pd
+import pytest
+
+from dataset_cache import DatasetCache
+from upload_storage import UploadStorage
+
+pytest.importorskip('pyarrow')
+from columnar_store import read_dataset, write_columnar
+
+
+def store_csv(storage, df):
+    name, _, _ = storage.store(io.BytesIO(df.to_csv(index=False).encode()), '.csv')
+    return name
+
+
+def test_removed_upload_drops_cached_frame_and_projections(tmp_path):
+    cache = DatasetCache()
+    storage = UploadStorage(str(tmp_path), quota_bytes=0, on_remove=cache.invalidate_dataset)
+    name = store_csv(storage, pd.DataFrame({'a': range(100), 'b': range(100)}))
+    store = write_columnar(pd.read_csv(storage.path(name)), storage.path(name))
+
+    cache.get(name, store, read_dataset)
+    cache.get((name, ('a',)), store, lambda path: read_dataset(path, ['a']))
+    cache.get((name, ('b',)), store, lambda path: read_dataset(path, ['b']))
+    cache.get(('other', ('a',)), store, lambda path: read_dataset(path, ['a']))
+    assert cache.stats()['entries'] == 4
+
+    storage.sweep()
+
+    assert not list(tmp_path.iterdir())
+    assert cache.stats()['entries'] == 1
+
+
+def age(storage, name, seconds):
+    # Last use is the newest mtime among a dataset's files
+    when = time.time() - seconds
+    for path in glob.glob(storage.path(name) + '*'):
+        os.utime(path, (when, when))
+
+
+def test_identical_uploads_are_stored_once(tmp_path):
+    storage = UploadStorage(str(tmp_path))
+    df = pd.DataFrame({'a': range(10)})
+
+    first = storage.store(io.BytesIO(df.to_csv(index=False).encode()), '.CSV')
+    second = storage.store(io.BytesIO(df.to_csv(index=False).encode()), '.csv')
+
+    assert first[0] == second[0] == f'{first[1]}.csv'
+    assert (first[2], second[2]) == (True, False)
+    assert storage.stats()['dedup_hits'] == 1
+    assert sorted(path.name for path in tmp_path.iterdir()) == [first[0], first[0] + '.access']
+
+
+def test_datasets_expire_after_ttl_unless_in_use(tmp_path):
+    removed = []
+    storage = UploadStorage(str(tmp_path), ttl_seconds=3600, on_remove=removed.append)
+    stale = store_csv(storage, pd.DataFrame({'a': range(10)}))
+    busy = store_csv(storage, pd.DataFrame({'a': range(20)}))
+    fresh = store_csv(storage, pd.DataFrame({'a': range(30)}))
+    age(storage, stale, 7200)
+    age(storage, busy, 7200)
+
+    with storage.in_use(busy):
+        storage.sweep()
+
+    assert removed == [stale]
+    assert not os.path.exists(storage.path(stale))
+    assert os.path.exists(storage.path(busy)) and os.path.exists(storage.path(fresh))
+    assert storage.stats()['expired'] == 1
+
+    # A recent use keeps an old upload alive
+    storage.touch(busy, force=True)
+    storage.sweep()
+    assert os.path.exists(storage.path(busy))
+
+
+def test_quota_evicts_least_recently_used_first(tmp_path):
+    storage = UploadStorage(str(tmp_path))
+    names = [store_csv(storage, pd.DataFrame({'a': range(i * 100, i * 100 + 100)})) for i in range(3)]
+    for name, seconds in zip(names, (30, 10, 20)):
+        age(storage, name, seconds)
+    sizes = {entry['name']: entry['bytes'] for entry in storage.scan()}
+    storage.quota_bytes = sum(sizes.values()) - 1
+
+    storage.sweep()
+
+    assert [os.path.exists(storage.path(name)) for name in names] == [False, True, True]
+    stats = storage.stats()
+    assert (stats['entries'], stats['evicted'], stats['expired']) == (2, 1, 0)
+    assert stats['current_bytes'] == sizes[names[1]] + sizes[names[2]]
+
+
+def test_orphaned_sidecars_are_removed(tmp_path):
+    storage = UploadStorage(str(tmp_path))
+    name = store_csv(storage, pd.DataFrame({'a': range(10)}))
+    os.remove(storage.path(name))
+    (tmp_path / 'notes.txt').write_text('kept')
+
+    storage.sweep()
+
+    assert [path.name for path in tmp_path.iterdir()] == ['notes.txt']
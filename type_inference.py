@@ -0,0 +1,242 @@
+import re
+import warnings
+import numpy as np
+import pandas as pd
+from pandas.tseries.api import guess_datetime_format
+
+SAMPLE_SIZE = 1000
+# Share of non-null values that must parse before a text column is converted
+MIN_PARSED_SHARE = 0.98
+# Share of rows that must be distinct, per the profile, for a column to count as an identifier
+MIN_ID_DISTINCT_SHARE = 0.9
+MAX_ID_LENGTH = 64
+TRUE_VALUES = {'true', 'yes', 'y', 't'}
+FALSE_VALUES = {'false', 'no', 'n', 'f'}
+CURRENCY_SYMBOLS = '$€£¥'
+# Leading currency symbols and thousands separators ("$1,234.50") are dropped; a comma
+# only separates thousands after a digit and before three more, so decimal commas are
+# misplaced. Patterns are strings without lookarounds, which pandas matches with pyarrow
+# rather than row by row.
+CURRENCY_MARK = '[' + re.escape(CURRENCY_SYMBOLS) + ']'
+CURRENCY = r'^\s*([+-]?)\s*' + CURRENCY_MARK + r'\s*'
+MISPLACED_COMMA = r'(?:^|\D),|,(?:\d{0,2}(?:\D|$)|\d{4})'
+
+
+def _is_text(series):
+    return series.dtype == object or pd.api.types.is_string_dtype(series.dtype)
+
+
+def sample_values(series, size=SAMPLE_SIZE):
+    """Up to size non-null values taken evenly across the column, as stripped strings"""
+    if not len(series):
+        return pd.Series([], dtype=object)
+    positions = np.unique(np.linspace(0, len(series) - 1, min(len(series), size * 4)).astype(np.int64))
+    sample = series.iloc[positions].dropna()
+    if len(sample) > size:
+        sample = sample.iloc[np.linspace(0, len(sample) - 1, size).astype(np.int64)]
+    return sample.astype(str).str.strip().reset_index(drop=True)
+
+
+def _contains(text, pattern):
+    return text.str.contains(pattern, regex=True).to_numpy(dtype=bool, na_value=False)
+
+
+def _parse_numbers(values):
+    # Samples and whole columns are parsed alike, so a decimal comma ("3,5") that the
+    # sample never showed becomes missing rather than 35
+    text = values.astype(str).str.strip()
+    if _contains(text, CURRENCY_MARK).any():
+        text = text.str.replace(CURRENCY, r'\1', regex=True).str.strip()
+    cleaned = text.str.replace(',', '', regex=False).mask(_contains(text, MISPLACED_COMMA))
+    return pd.to_numeric(cleaned, errors='coerce')
+
+
+def _parse_booleans(values):
+    lowered = values.astype(str).str.strip().str.lower()
+    parsed = pd.Series(pd.NA, index=values.index, dtype='boolean')
+    parsed[lowered.isin(TRUE_VALUES)] = True
+    parsed[lowered.isin(FALSE_VALUES)] = False
+    return parsed
+
+
+def _parse_datetimes(values, fmt):
+    try:
+        return pd.to_datetime(values, format=fmt or 'ISO8601', errors='coerce')
+    except (ValueError, TypeError, OverflowError):
+        # Mixed time zones can't share one column
+        return None
+
+
+def _parsed_share(parsed, values):
+    return parsed.notna().sum() / len(values) if parsed is not None and len(values) else 0.0
+
+
+def _datetime_format(sample):
+    """The format that parses most of the sample, guessed from a few of its values"""
+    candidates = []
+    with warnings.catch_warnings():
+        # pandas warns when a value only fits the other day/month order, which is why both are tried
+        warnings.simplefilter('ignore', UserWarning)
+        for value in sample.drop_duplicates().head(10):
+            for dayfirst in (False, True):
+                fmt = guess_datetime_format(value, dayfirst=dayfirst)
+                if fmt and fmt not in candidates:
+                    candidates.append(fmt)
+    best, best_share = None, 0.0
+    for fmt in candidates + [None]:
+        share = _parsed_share(_parse_datetimes(sample, fmt), sample)
+        if share > best_share:
+            best, best_share = fmt, share
+    return best, best_share
+
+
+def _looks_like_id(sample):
+    # Every sampled value distinct, and short single tokens rather than free text
+    lengths = sample.str.len()
+    return (len(sample) >= 50 and sample.is_unique and lengths.max() <= MAX_ID_LENGTH
+            and not sample.str.contains(r'\s', regex=True).any())
+
+
+def infer_column_type(series, sample_size=SAMPLE_SIZE):
+    """What a text column really holds, judged from a sample of its values
+
+    Returns None for plain text, otherwise a dict with 'kind' (boolean,
+    numeric, datetime or id) and, for dates, the strftime format that parses
+    them, so the whole column can be converted in one vectorised pass.
+    """
+    sample = sample_values(series, sample_size)
+    if not len(sample):
+        return None
+    if sample.str.lower().isin(TRUE_VALUES | FALSE_VALUES).mean() >= MIN_PARSED_SHARE:
+        return {'kind': 'boolean'}
+    if _parsed_share(_parse_numbers(sample), sample) >= MIN_PARSED_SHARE:
+        return {'kind': 'numeric'}
+    fmt, share = _datetime_format(sample)
+    if share >= MIN_PARSED_SHARE:
+        return {'kind': 'datetime', 'format': fmt}
+    if _looks_like_id(sample):
+        return {'kind': 'id'}
+    return None
+
+
+def convert_column(series, info):
+    """series converted to the inferred type; unparseable values become missing"""
+    if info is None or not (_is_text(series) or series.isna().all()):
+        return series
+    kind = info['kind']
+    if kind == 'boolean':
+        parsed = _parse_booleans(series)
+        return parsed if parsed.isna().any() else parsed.astype(bool)
+    if kind == 'numeric':
+        return _parse_numbers(series)
+    if kind == 'datetime':
+        parsed = _parse_datetimes(series, info.get('format'))
+        if parsed is None:
+            return series
+        failed = parsed.isna() & series.notna()
+        if info.get('format') and failed.any():
+            # Text copies written after ingest (converted workbooks) hold ISO dates instead
+            retried = _parse_datetimes(series[failed], None)
+            if retried is not None:
+                parsed[failed] = retried
+        return parsed
+    return series
+
+
+def parsed_count(values, info):
+    """How many of a column's values convert_column turned into the inferred type"""
+    kind = info['kind']
+    if kind == 'numeric':
+        holds_type = pd.api.types.is_numeric_dtype(values) and not pd.api.types.is_bool_dtype(values)
+    elif kind == 'datetime':
+        holds_type = pd.api.types.is_datetime64_any_dtype(values)
+    elif kind == 'boolean':
+        holds_type = pd.api.types.is_bool_dtype(values)
+    else:
+        holds_type = True
+    return int(values.notna().sum()) if holds_type else 0
+
+
+def infer_types(df, sample_size=SAMPLE_SIZE):
+    """Inferred types of a frame's columns, to record alongside its profile
+
+    Text columns are sampled; columns pandas already parsed as dates are
+    included too, so text copies of the dataset can be converted back.
+    """
+    inferred = {}
+    if df.columns.has_duplicates:
+        return inferred
+    for column in df.columns:
+        series = df[column]
+        if pd.api.types.is_datetime64_any_dtype(series):
+            inferred[column] = {'kind': 'datetime', 'format': None}
+        elif _is_text(series):
+            info = infer_column_type(series, sample_size)
+            if info is not None:
+                inferred[column] = info
+    return inferred
+
+
+def apply_inferred_types(df, inferred):
+    """Convert df's columns as recorded by infer_types; frames needing nothing are returned as they are"""
+    if not inferred or df.columns.has_duplicates:
+        return df
+    converted = {}
+    for column, info in inferred.items():
+        if column not in df.columns or info['kind'] == 'id':
+            continue
+        values = convert_column(df[column], info)
+        if values is not df[column]:
+            converted[column] = values
+    return _replace_columns(df, converted) if converted else df
+
+
+def _replace_columns(df, converted):
+    df = df.copy(deep=False)
+    for column, values in converted.items():
+        df[column] = values
+    return df
+
+
+def convert_frame(df, sample_size=SAMPLE_SIZE):
+    """Infer and convert df's text columns in one step, as done at ingest
+
+    A conversion that would leave more than a small share of a column's
+    values unparsed is dropped, so a column is only converted when the
+    whole of it (not just the sample) fits the inferred type.
+    """
+    inferred = infer_types(df, sample_size)
+    converted = {}
+    for column, info in list(inferred.items()):
+        series = df[column]
+        if info['kind'] == 'id' or not _is_text(series):
+            continue
+        values = convert_column(series, info)
+        non_null = int(series.notna().sum())
+        if non_null and parsed_count(values, info) / non_null < MIN_PARSED_SHARE:
+            del inferred[column]
+        else:
+            converted[column] = values
+    if converted:
+        df = _replace_columns(df, converted)
+    return df, inferred
+
+
+def annotate_profile(profile, inferred):
+    """Record inferred types in a profile, marking confirmed identifier columns as type 'id'
+
+    The sample only shows that values don't repeat locally; the profile's
+    distinct count decides whether the column is an identifier overall.
+    """
+    inferred = dict(inferred)
+    for col in profile['columns']:
+        info = inferred.get(col['name'])
+        if info is None or info['kind'] != 'id':
+            continue
+        non_null = profile['shape'][0] - col['null_count']
+        if non_null and col['cardinality'] / non_null >= MIN_ID_DISTINCT_SHARE:
+            col['type'] = 'id'
+        else:
+            del inferred[col['name']]
+    profile['inferred_types'] = inferred
+    return profile
@@ -0,0 +1,259 @@
+import os
+import re
+import time
+import uuid
+import shutil
+import hashlib
+import logging
+import threading
+from contextlib import contextmanager
+from columnar_store import COLUMNAR_SUFFIX, CONVERTED_CSV_SUFFIX
+from dataset_profile import PROFILE_SUFFIX
+from histogram_pyramid import HISTOGRAM_SUFFIX
+
+ACCESS_SUFFIX = '.access'
+INCOMING_PREFIX = '.incoming-'
+UPLOAD_EXTENSIONS = ('.csv', '.xlsx', '.xls')
+# Everything written next to an upload, including the temp files of atomic writes
+SIDECAR_SUFFIXES = (COLUMNAR_SUFFIX, CONVERTED_CSV_SUFFIX, PROFILE_SUFFIX, HISTOGRAM_SUFFIX, ACCESS_SUFFIX, '.tmp')
+STORED_NAME = re.compile(r'^([0-9a-f]{64})\.(csv|xlsx|xls)$')
+
+logger = logging.getLogger(__name__)
+
+
+def upload_base_name(filename):
+    """The upload a file in the folder belongs to, or None for unrelated files"""
+    name = filename
+    stripped = True
+    while stripped:
+        stripped = False
+        for suffix in SIDECAR_SUFFIXES:
+            if name.endswith(suffix) and len(name) > len(suffix):
+                name = name[:-len(suffix)]
+                stripped = True
+    return name if name.lower().endswith(UPLOAD_EXTENSIONS) else None
+
+
+def stored_content_hash(name):
+    # Content-addressed names are the file's SHA-256; older uuid_filename uploads have none
+    match = STORED_NAME.match(name)
+    return match.group(1) if match else None
+
+
+class UploadStorage:
+    """Content-addressed upload folder with per-dataset TTL and a disk quota
+
+    Each distinct file is stored once as <sha256><ext>, so identical uploads
+    share the stored copy and everything derived from it (profile, columnar
+    copy, cached frames and charts). A dataset expires once it has gone
+    ttl_seconds without being used; past the quota, the least recently used
+    datasets are removed first. State lives in the folder itself (last use is
+    the newest mtime among a dataset's files), so every worker process sees
+    the same entries.
+    """
+
+    def __init__(self, folder, ttl_seconds=24 * 3600, quota_bytes=2 * 1024 * 1024 * 1024, touch_interval=60,
+                 on_remove=None):
+        self.folder = folder
+        self.ttl_seconds = ttl_seconds
+        self.quota_bytes = quota_bytes
+        self.touch_interval = touch_interval
+        self.on_remove = on_remove
+        self._active = {}  # name -> ingests currently reading or writing it
+        self._last_touch = {}
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._sweeper = None
+        self.entries = 0
+        self.current_bytes = 0
+        self.stored = 0
+        self.dedup_hits = 0
+        self.expired = 0
+        self.evicted = 0
+
+    def path(self, name):
+        return os.path.join(self.folder, name)
+
+    def store(self, stream, extension, block_size=1024 * 1024):
+        """Save an upload stream under its content hash
+
+        Returns (name, content_hash, is_new); when the content is already
+        stored the new copy is discarded.
+        """
+        tmp_path = self.path(f'{INCOMING_PREFIX}{uuid.uuid4().hex}')
+        digest = hashlib.sha256()
+        try:
+            # Hash while writing so the file is read only once
+            with open(tmp_path, 'wb') as f:
+                for block in iter(lambda: stream.read(block_size), b''):
+                    digest.update(block)
+                    f.write(block)
+            content_hash = digest.hexdigest()
+            name = f'{content_hash}{extension.lower()}'
+            with self._lock:
+                is_new = not os.path.exists(self.path(name))
+                if is_new:
+                    os.replace(tmp_path, self.path(name))
+                    self.stored += 1
+                else:
+                    self.dedup_hits += 1
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+        self.touch(name, force=True)
+        if is_new:
+            self.request_sweep()
+        return name, content_hash, is_new
+
+    def derive(self, name, variant):
+        """A separately stored view of an upload, e.g. one sheet of a workbook
+
+        The copy is a hard link where the filesystem allows, so it costs no
+        extra space, and its name is the upload's hash salted with variant.
+        """
+        stem, extension = os.path.splitext(name)
+        content_hash = stored_content_hash(name) or stem
+        derived = hashlib.sha256(f'{content_hash}:{variant}'.encode('utf-8')).hexdigest() + extension
+        with self._lock:
+            if not os.path.exists(self.path(derived)):
+                try:
+                    os.link(self.path(name), self.path(derived))
+                except OSError:
+                    shutil.copyfile(self.path(name), self.path(derived))
+        self.touch(derived, force=True)
+        return derived
+
+    def touch(self, name, force=False):
+        # Record a use; throttled so busy datasets don't stat the disk on every request
+        now = time.time()
+        with self._lock:
+            if not force and now - self._last_touch.get(name, 0) < self.touch_interval:
+                return
+            self._last_touch[name] = now
+        marker = self.path(name + ACCESS_SUFFIX)
+        try:
+            with open(marker, 'a'):
+                pass
+            os.utime(marker, (now, now))
+        except OSError:
+            pass
+
+    @contextmanager
+    def in_use(self, name):
+        # Datasets being ingested are never swept, however old or large
+        with self._lock:
+            self._active[name] = self._active.get(name, 0) + 1
+        try:
+            yield
+        finally:
+            with self._lock:
+                self._active[name] -= 1
+                if not self._active[name]:
+                    del self._active[name]
+
+    def scan(self):
+        """Every upload in the folder with its total size and last use"""
+        groups = {}
+        now = time.time()
+        for entry in os.scandir(self.folder):
+            if not entry.is_file():
+                continue
+            stat = entry.stat()
+            if entry.name.startswith(INCOMING_PREFIX):
+                # Left behind by an upload that died mid-write
+                if now - stat.st_mtime > 3600:
+                    self._remove_files([entry.path])
+                continue
+            base = upload_base_name(entry.name)
+            if base is None:
+                continue
+            group = groups.setdefault(base, {'name': base, 'files': [], 'bytes': 0, 'last_access': 0.0,
+                                             'orphaned': True})
+            group['files'].append(entry.path)
+            group['bytes'] += stat.st_size
+            group['last_access'] = max(group['last_access'], stat.st_mtime)
+            if entry.name == base:
+                group['orphaned'] = False
+        return list(groups.values())
+
+    def sweep(self):
+        """Remove expired datasets, then the least recently used until under quota"""
+        now = time.time()
+        with self._lock:
+            active = set(self._active)
+        kept, pinned = [], []
+        for entry in self.scan():
+            if entry['name'] in active:
+                pinned.append(entry)
+            elif entry['orphaned'] or now - entry['last_access'] > self.ttl_seconds:
+                self._remove_entry(entry)
+                self.expired += 1
+            else:
+                kept.append(entry)
+
+        total = sum(entry['bytes'] for entry in kept + pinned)
+        kept.sort(key=lambda entry: entry['last_access'])
+        while kept and total > self.quota_bytes:
+            entry = kept.pop(0)
+            self._remove_entry(entry)
+            total -= entry['bytes']
+            self.evicted += 1
+
+        self.entries = len(kept) + len(pinned)
+        self.current_bytes = total
+        return total
+
+    def clear(self):
+        """Remove every stored upload, pinned or not (e.g. between benchmark runs)"""
+        for entry in self.scan():
+            self._remove_entry(entry)
+        self.entries = 0
+        self.current_bytes = 0
+
+    def request_sweep(self):
+        self._wake.set()
+
+    def start(self, interval=300):
+        """Sweep in a background thread every interval seconds, or sooner on request"""
+        if self._sweeper is not None:
+            return
+        self._sweeper = threading.Thread(target=self._sweep_loop, args=(interval,), name='upload-sweeper',
+                                         daemon=True)
+        self._sweeper.start()
+
+    def stats(self):
+        return {
+            'entries': self.entries,
+            'current_bytes': self.current_bytes,
+            'quota_bytes': self.quota_bytes,
+            'ttl_seconds': self.ttl_seconds,
+            'stored': self.stored,
+            'dedup_hits': self.dedup_hits,
+            'expired': self.expired,
+            'evicted': self.evicted
+        }
+
+    def _sweep_loop(self, interval):
+        while True:
+            self._wake.wait(interval)
+            self._wake.clear()
+            try:
+                self.sweep()
+            except Exception:
+                logger.exception("Upload storage sweep failed")
+
+    def _remove_entry(self, entry):
+        self._remove_files(entry['files'])
+        with self._lock:
+            self._last_touch.pop(entry['name'], None)
+        if self.on_remove:
+            self.on_remove(entry['name'])
+
+    @staticmethod
+    def _remove_files(paths):
+        for path in paths:
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass